@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Admission Control
+Bounds how many requests of each class run at once and how many may queue
+for a slot. Free slots go to trades first, then price reads, then tweet
+analysis, so an analysis storm waits its turn (or is turned away with a
+Retry-After) instead of crowding out trading
+"""
+import logging
+import math
+import threading
+import time
+from bisect import insort
+from itertools import count
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SERVICE_TIME_SMOOTHING = 0.2
+
+
+class AdmissionRejected(Exception):
+    """No slot for this request: its class's queue is full, or it waited too long"""
+
+    def __init__(self, request_class: str, reason: str, retry_after: int):
+        super().__init__(f"{request_class}: {reason}")
+        self.request_class = request_class
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class RequestClass:
+    """
+    One class of endpoints: lower priority numbers are admitted first.
+    degrade_depth, if set, is the queue depth at which admitted requests
+    are told to run degraded (cheaper) instead of at full cost
+    """
+
+    def __init__(self, name: str, priority: int, max_concurrent: int, max_queue: int,
+                 queue_timeout: float, degrade_depth: Optional[int] = None):
+        self.name = name
+        self.priority = priority
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.degrade_depth = degrade_depth
+        self.running = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.degraded = 0
+        self.service_seconds = 1.0  # Smoothed time a request holds its slot
+
+
+class Ticket:
+    """A held slot; hand it back with AdmissionController.release()"""
+
+    def __init__(self, request_class: RequestClass, waited: float, degraded: bool):
+        self.request_class = request_class
+        self.waited = waited
+        self.degraded = degraded
+        self.started = time.monotonic()
+
+
+class AdmissionController:
+    """
+    Priority admission over a shared pool of slots
+
+    A request runs when its class is under max_concurrent, the pool has a
+    free slot, and no waiter ahead of it (higher priority, or same class
+    and earlier) could take that slot instead. Classes whose limits add
+    up to less than total_slots leave the rest to the classes above them:
+    with trades allowed the whole pool, whatever prices and analysis can't
+    use is always there for a trade.
+    """
+
+    def __init__(self, total_slots: int, classes: List[RequestClass]):
+        self.total_slots = total_slots
+        self.classes = {request_class.name: request_class for request_class in classes}
+        self.running = 0
+        self._waiters: List[Tuple[int, int, RequestClass]] = []
+        self._sequence = count()
+        self._condition = threading.Condition()
+
+    def _first_in_line(self, waiter: Tuple[int, int, RequestClass]) -> bool:
+        """Whether waiter may take a free slot now; caller holds the lock"""
+        request_class = waiter[2]
+        if request_class.running >= request_class.max_concurrent or self.running >= self.total_slots:
+            return False
+        for ahead in self._waiters:
+            if ahead is waiter:
+                return True
+            if ahead[2].running < ahead[2].max_concurrent:
+                return False  # Someone ahead could use this slot
+        return True
+
+    def _retry_after(self, request_class: RequestClass) -> int:
+        backlog = request_class.running + request_class.waiting
+        return max(1, math.ceil(request_class.service_seconds * backlog / request_class.max_concurrent))
+
+    def _reject(self, request_class: RequestClass, reason: str) -> AdmissionRejected:
+        request_class.rejected += 1
+        retry_after = self._retry_after(request_class)
+        logger.warning("🚦 Shedding %s request (%s), retry in %ds", request_class.name, reason, retry_after)
+        return AdmissionRejected(request_class.name, reason, retry_after)
+
+    def admit(self, name: str) -> Ticket:
+        """Block until a slot is free for this class; raises AdmissionRejected when it can't queue or times out"""
+        request_class = self.classes[name]
+        arrived = time.monotonic()
+        with self._condition:
+            if request_class.waiting >= request_class.max_queue:
+                raise self._reject(request_class, 'queue full')
+            waiter = (request_class.priority, next(self._sequence), request_class)
+            insort(self._waiters, waiter)  # Sequence numbers are unique, so classes never get compared
+            request_class.waiting += 1
+            deadline = arrived + request_class.queue_timeout
+            try:
+                while not self._first_in_line(waiter):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise self._reject(request_class, 'queue timeout')
+                    self._condition.wait(remaining)
+            finally:
+                self._waiters.remove(waiter)
+                request_class.waiting -= 1
+                # Leaving the queue (either way) may unblock whoever is behind
+                self._condition.notify_all()
+
+            request_class.running += 1
+            request_class.admitted += 1
+            self.running += 1
+            # Deep queue behind this one: answer it cheaply so the queue drains
+            degraded = request_class.degrade_depth is not None and request_class.waiting >= request_class.degrade_depth
+            if degraded:
+                request_class.degraded += 1
+        return Ticket(request_class, time.monotonic() - arrived, degraded)
+
+    def release(self, ticket: Ticket) -> None:
+        request_class = ticket.request_class
+        held = time.monotonic() - ticket.started
+        with self._condition:
+            request_class.running -= 1
+            self.running -= 1
+            request_class.service_seconds += SERVICE_TIME_SMOOTHING * (held - request_class.service_seconds)
+            self._condition.notify_all()
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Closed Positions Store
+Append-only, per-user on-disk log of closed positions with paged upstream
+ingestion and cursor pagination that never loads the whole history
+"""
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import requests
+
+from positions_service import DATA_API_URL, PAGE_SIZES, create_session, normalize_address, position_key
+
+logger = logging.getLogger(__name__)
+
+
+def encode_cursor(timestamp: float, offset: int) -> str:
+    # repr round-trips the float exactly; the cursor must match an index entry
+    return f"{timestamp!r}:{offset}"
+
+
+def decode_cursor(cursor: str) -> Tuple[float, int]:
+    """Inverse of encode_cursor; raises ValueError on a malformed cursor"""
+    timestamp, offset = cursor.split(':', 1)
+    return float(timestamp), int(offset)
+
+
+def row_timestamp(row: Dict[str, Any]) -> float:
+    try:
+        return float(row.get('timestamp') or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class ClosedPositionsLog:
+    """
+    One user's closed positions as a JSONL file
+
+    Closed positions never change, so rows are only ever appended. Memory
+    holds an index of (timestamp, byte offset) per row plus the set of
+    row keys; the rows themselves stay on disk and are read back one page
+    at a time, newest first.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.state_path = path[:-len('.jsonl')] + '.state.json'
+        self.complete = False  # Whole upstream history ingested
+        self.synced_at = 0.0
+        self.realized_pnl = 0.0  # Running total over every stored row
+        self._index: List[Tuple[float, int]] = []  # (-timestamp, offset), newest first
+        self._keys = set()
+        self._lock = threading.Lock()
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._keys
+
+    @property
+    def newest_timestamp(self) -> Optional[float]:
+        return -self._index[0][0] if self._index else None
+
+    def append(self, rows: List[Dict[str, Any]]) -> int:
+        """Append rows not already stored; returns how many were new"""
+        added = 0
+        with self._lock, open(self.path, 'ab') as f:
+            for row in rows:
+                key = position_key(row)
+                if key in self._keys:
+                    continue
+                offset = f.tell()
+                f.write(json.dumps(row, separators=(',', ':')).encode() + b'\n')
+                self._keys.add(key)
+                self.realized_pnl += float(row.get('realizedPnl') or 0)
+                bisect.insort(self._index, (-row_timestamp(row), offset))
+                added += 1
+        return added
+
+    def mark_complete(self) -> None:
+        self.complete = True
+        with open(self.state_path, 'w') as f:
+            json.dump({'complete': True}, f)
+
+    def page(self, cursor: Optional[str] = None, limit: int = 50) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Up to `limit` rows after cursor, newest first, and the cursor for the next page"""
+        rows = []
+        next_cursor = None
+        for timestamp, offset, row in self.iter_rows(cursor):
+            if len(rows) == limit:
+                break
+            rows.append(row)
+            next_cursor = encode_cursor(timestamp, offset)
+        else:
+            next_cursor = None
+        return rows, next_cursor
+
+    def iter_rows(self, cursor: Optional[str] = None) -> Iterator[Tuple[float, int, Dict[str, Any]]]:
+        """
+        Yield (timestamp, offset, row) after cursor, newest first
+
+        Cursors are (timestamp, offset) positions rather than list indices,
+        so rows appended while a client is paging don't shift its pages;
+        iteration itself resumes the same way after each row, so a row
+        inserted mid-walk neither repeats nor skips one.
+        """
+        last = decode_cursor(cursor) if cursor else None
+        with open(self.path, 'rb') as f:
+            while True:
+                with self._lock:
+                    position = bisect.bisect_right(self._index, (-last[0], last[1])) if last else 0
+                    if position >= len(self._index):
+                        return
+                    negative_timestamp, offset = self._index[position]
+                last = (-negative_timestamp, offset)
+                f.seek(offset)
+                yield -negative_timestamp, offset, json.loads(f.readline())
+
+    def _load(self) -> None:
+        if os.path.exists(self.state_path):
+            with open(self.state_path) as f:
+                self.complete = json.load(f).get('complete', False)
+        if not os.path.exists(self.path):
+            open(self.path, 'ab').close()
+            return
+
+        offset = 0
+        with open(self.path, 'rb') as f:
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                row = json.loads(line)
+                self._keys.add(position_key(row))
+                self.realized_pnl += float(row.get('realizedPnl') or 0)
+                self._index.append((-row_timestamp(row), offset))
+                offset += len(line)
+        if offset < os.path.getsize(self.path):
+            # Torn final write from a crash mid-append
+            with open(self.path, 'r+b') as f:
+                f.truncate(offset)
+        self._index.sort()
+
+
+class ClosedPositionsStore:
+    """
+    Per-user closed-positions logs kept in sync with data-api
+
+    Upstream is read newest first (sortBy=TIMESTAMP). A user's first
+    request waits for a single page; the rest of the history is backfilled
+    in the background. Later syncs page from the top only until they reach
+    rows that are already stored.
+
+    Users must be 0x wallet addresses (one file per lowercased address). At
+    most max_logs logs stay open, least recently used first out, and never
+    one that is still syncing.
+    """
+
+    def __init__(self, directory: str, base_url: str = DATA_API_URL, ttl: float = 30.0,
+                 timeout: float = 10.0, session: Optional[requests.Session] = None, max_logs: int = 200):
+        self.directory = directory
+        self.base_url = base_url
+        self.ttl = ttl
+        self.timeout = timeout
+        self.page_size = PAGE_SIZES['closed-positions']
+        self.session = session or create_session()
+        self.max_logs = max_logs
+        self._logs: 'OrderedDict[str, ClosedPositionsLog]' = OrderedDict()
+        self._syncing = set()
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def get(self, user: str) -> ClosedPositionsLog:
+        """The user's log, synced enough to serve a first page; ValueError unless user is a 0x address"""
+        user = normalize_address(user)
+        log = self._log(user)
+        if not len(log) and not log.complete:
+            self._sync_new(user, log, max_pages=1)
+            if not log.complete:
+                self._sync_in_background(user, log)
+        elif time.time() - log.synced_at > self.ttl:
+            self._sync_in_background(user, log)
+        return log
+
+    def _log(self, user: str) -> ClosedPositionsLog:
+        with self._lock:
+            log = self._logs.get(user)
+            if log is not None:
+                self._logs.move_to_end(user)
+                return log
+            log = self._logs[user] = ClosedPositionsLog(os.path.join(self.directory, f'{user}.jsonl'))
+            for stale in list(self._logs):
+                if len(self._logs) <= self.max_logs:
+                    break
+                if stale != user and stale not in self._syncing:
+                    del self._logs[stale]
+            return log
+
+    def _sync_in_background(self, user: str, log: ClosedPositionsLog) -> None:
+        with self._lock:
+            if user in self._syncing:
+                return
+            self._syncing.add(user)
+
+        def run():
+            try:
+                if time.time() - log.synced_at > self.ttl:
+                    self._sync_new(user, log)
+                if not log.complete:
+                    self._backfill(user, log)
+            except Exception as e:
+                logger.warning("⚠️ [CLOSED] Sync for %.10s... failed: %s", user, e)
+            finally:
+                with self._lock:
+                    self._syncing.discard(user)
+
+        threading.Thread(target=run, name='closed-positions-sync', daemon=True).start()
+
+    def _sync_new(self, user: str, log: ClosedPositionsLog, max_pages: Optional[int] = None) -> int:
+        """Page from the newest row down until reaching rows already stored"""
+        added = 0
+        offset = 0
+        pages = 0
+        while max_pages is None or pages < max_pages:
+            page = self._fetch_page(user, offset)
+            pages += 1
+            new = log.append(page)
+            added += new
+            if len(page) < self.page_size:
+                # Reached the oldest upstream row; stored rows are the whole history
+                if not log.complete:
+                    log.mark_complete()
+                break
+            if new < len(page):
+                break
+            offset += self.page_size
+        log.synced_at = time.time()
+        if added:
+            logger.info("📥 [CLOSED] Stored %d new closed positions for %.10s... (%d total)", added, user, len(log))
+        return added
+
+    def _backfill(self, user: str, log: ClosedPositionsLog) -> None:
+        """Ingest older history; resumes from the stored row count after a restart"""
+        # Stored rows are a contiguous newest-first prefix of upstream; new
+        # closes only push older rows further down, so this never skips one
+        offset = len(log)
+        while True:
+            page = self._fetch_page(user, offset)
+            log.append(page)
+            if len(page) < self.page_size:
+                log.mark_complete()
+                logger.info("✅ [CLOSED] Backfill complete for %.10s... (%d closed positions)", user, len(log))
+                return
+            offset += self.page_size
+
+    def _fetch_page(self, user: str, offset: int) -> List[Dict[str, Any]]:
+        response = self.session.get(
+            f"{self.base_url}/closed-positions",
+            params={
+                'user': user,
+                'limit': self.page_size,
+                'offset': offset,
+                'sortBy': 'TIMESTAMP',
+                'sortDirection': 'DESC'
+            },
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+        return response.json()
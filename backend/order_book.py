@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Order Book Cache
+Local per-token CLOB order books, seeded from REST snapshots and kept
+current by market-channel deltas, plus pre-trade fill quotes
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+
+class InsufficientDepthError(Exception):
+    """The visible book can't fill the whole order (a FOK order would be killed)"""
+
+    def __init__(self, quote: Dict[str, Any]):
+        super().__init__(
+            f"Only ${quote['amount'] - quote['unfilled_amount']:.2f} of ${quote['amount']:.2f} fillable at current depth"
+        )
+        self.quote = quote
+
+
+class OrderBook:
+    """
+    Price-level order book for a single token
+
+    Deltas arrive on the market-channel thread while quotes read from
+    request threads, so both go through the book's own lock. The sorted
+    level lists handed out are never mutated afterwards (a change builds
+    new ones), so a caller can walk one without holding the lock.
+    """
+
+    def __init__(self, token_id: str):
+        self.token_id = token_id
+        self.bids: Dict[float, float] = {}
+        self.asks: Dict[float, float] = {}
+        self.updated_at = 0.0
+        self._ask_levels: Optional[List[Tuple[float, float]]] = None
+        self._bid_levels: Optional[List[Tuple[float, float]]] = None
+        self._lock = threading.Lock()
+
+    def apply_snapshot(self, bids: Iterable[Dict[str, Any]], asks: Iterable[Dict[str, Any]]) -> None:
+        """Replace the whole book with a snapshot of {'price', 'size'} levels"""
+        new_bids = {float(level['price']): float(level['size']) for level in bids if float(level['size']) > 0}
+        new_asks = {float(level['price']): float(level['size']) for level in asks if float(level['size']) > 0}
+        with self._lock:
+            self.bids = new_bids
+            self.asks = new_asks
+            self._touch()
+
+    def apply_change(self, side: str, price: float, size: float) -> None:
+        """Set the size of one price level; size 0 removes it"""
+        with self._lock:
+            levels = self.bids if side.upper() == 'BUY' else self.asks
+            if size > 0:
+                levels[price] = size
+            else:
+                levels.pop(price, None)
+            self._touch()
+
+    def ask_levels(self) -> List[Tuple[float, float]]:
+        """Asks as (price, size), cheapest first"""
+        with self._lock:
+            if self._ask_levels is None:
+                self._ask_levels = sorted(self.asks.items())
+            return self._ask_levels
+
+    def bid_levels(self) -> List[Tuple[float, float]]:
+        """Bids as (price, size), highest first"""
+        with self._lock:
+            if self._bid_levels is None:
+                self._bid_levels = sorted(self.bids.items(), reverse=True)
+            return self._bid_levels
+
+    @property
+    def best_bid(self) -> Optional[float]:
+        levels = self.bid_levels()
+        return levels[0][0] if levels else None
+
+    @property
+    def best_ask(self) -> Optional[float]:
+        levels = self.ask_levels()
+        return levels[0][0] if levels else None
+
+    def _touch(self) -> None:
+        self._ask_levels = None
+        self._bid_levels = None
+        self.updated_at = time.time()
+
+
+def quote_market_buy(book: OrderBook, amount: float) -> Dict[str, Any]:
+    """
+    Walk the asks to price a market BUY of `amount` dollars
+
+    Mirrors how a FOK market order fills: cheapest asks first until the
+    dollar amount is spent. `fillable` is False when the visible depth
+    can't absorb the whole amount, i.e. the FOK order would be killed.
+    """
+    levels = book.ask_levels()  # One consistent snapshot for the whole walk
+    remaining = amount
+    shares = 0.0
+    worst_price = None
+
+    for price, size in levels:
+        worst_price = price
+        level_cost = price * size
+        if level_cost >= remaining:
+            shares += remaining / price
+            remaining = 0.0
+            break
+        shares += size
+        remaining -= level_cost
+
+    spent = amount - remaining
+    best_ask = levels[0][0] if levels else None
+    avg_price = spent / shares if shares else None
+    slippage = avg_price - best_ask if avg_price is not None else None
+
+    return {
+        'token_id': book.token_id,
+        'amount': amount,
+        'fillable': remaining <= 1e-9 and shares > 0,
+        'shares': shares,
+        'avg_price': avg_price,
+        'best_ask': best_ask,
+        'worst_price': worst_price,
+        'slippage': slippage,
+        'slippage_bps': slippage / best_ask * 10000 if slippage is not None else None,
+        'unfilled_amount': remaining,
+        'potential_payout': shares,  # Each winning share pays $1
+        'potential_profit': shares - spent
+    }
+
+
+class OrderBookCache:
+    """
+    Bounded cache of order books keyed by token id
+
+    Books for tokens that are live on the market channel are kept current
+    by deltas; any other book is re-seeded from a REST snapshot once it is
+    older than max_age seconds.
+    """
+
+    def __init__(
+        self,
+        fetch_snapshot: Callable[[str], Dict[str, Any]],
+        is_live: Callable[[str], bool] = lambda token_id: False,
+        on_change: Optional[Callable[[Dict[str, Any]], None]] = None,
+        max_age: float = 5.0,
+        max_books: int = 500
+    ):
+        self.fetch_snapshot = fetch_snapshot
+        self.is_live = is_live
+        self.on_change = on_change
+        self.max_age = max_age
+        self.max_books = max_books
+        self._books: 'OrderedDict[str, OrderBook]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, token_id: str) -> OrderBook:
+        """Return a current book for token_id, fetching a snapshot if needed"""
+        with self._lock:
+            book = self._books.get(token_id)
+            if book is not None:
+                self._books.move_to_end(token_id)
+
+        fresh = book is not None and (
+            self.is_live(token_id) or time.time() - book.updated_at <= self.max_age
+        )
+        if fresh:
+            self.hits += 1
+            return book
+
+        self.misses += 1
+        snapshot = self.fetch_snapshot(token_id)
+        with self._lock:
+            book = self._get_or_create(token_id)
+            book.apply_snapshot(snapshot.get('bids', []), snapshot.get('asks', []))
+        return book
+
+    def on_event(self, event: Dict[str, Any]) -> None:
+        """Market-channel listener: apply book snapshots and price-level deltas"""
+        event_type = event.get('event_type')
+        touched = set()
+
+        with self._lock:
+            if event_type == 'book' and event.get('asset_id'):
+                token_id = event['asset_id']
+                book = self._get_or_create(token_id)
+                book.apply_snapshot(event.get('bids', event.get('buys', [])), event.get('asks', event.get('sells', [])))
+                touched.add(token_id)
+
+            elif event_type == 'price_change':
+                # Current format: one entry per level in price_changes
+                for change in event.get('price_changes', []):
+                    book = self._books.get(change.get('asset_id'))
+                    if book is not None:
+                        book.apply_change(change['side'], float(change['price']), float(change['size']))
+                        touched.add(book.token_id)
+                # Legacy format: asset_id at the top level with a changes list
+                book = self._books.get(event.get('asset_id'))
+                if book is not None:
+                    for change in event.get('changes', []):
+                        book.apply_change(change['side'], float(change['price']), float(change['size']))
+                    touched.add(book.token_id)
+
+            updates = [
+                {'token_id': token_id, 'best_bid': self._books[token_id].best_bid, 'best_ask': self._books[token_id].best_ask}
+                for token_id in touched
+            ]
+
+        if self.on_change:
+            for update in updates:
+                self.on_change(update)
+
+    def _get_or_create(self, token_id: str) -> OrderBook:
+        book = self._books.get(token_id)
+        if book is None:
+            book = self._books[token_id] = OrderBook(token_id)
+            while len(self._books) > self.max_books:
+                self._books.popitem(last=False)
+        else:
+            self._books.move_to_end(token_id)
+        return book
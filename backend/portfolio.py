@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Portfolio Aggregation
+Columnar NumPy view of a user's positions with vectorized P&L and
+exposure roll-ups per event, tag and outcome
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+UNTAGGED = 'Untagged'
+
+
+def _encode(labels: List[str]) -> Tuple[List[str], np.ndarray]:
+    """Dictionary-encode labels into (unique labels, int codes per row)"""
+    uniques, codes = np.unique(np.array(labels, dtype=object).astype(str), return_inverse=True)
+    return uniques.tolist(), codes.astype(np.int64)
+
+
+class PositionArrays:
+    """
+    Open positions as parallel columns
+
+    Built once per positions payload; every aggregate is then a handful of
+    array ops instead of a walk over row dicts.
+    """
+
+    def __init__(
+        self,
+        positions: List[Dict[str, Any]],
+        tags_for: Callable[[str], Iterable[str]] = lambda asset: ()
+    ):
+        n = len(positions)
+        self.assets = [p.get('asset', '') for p in positions]
+        self.titles = [p.get('title', '') for p in positions]
+        self.size = np.fromiter((float(p.get('size') or 0) for p in positions), dtype=np.float64, count=n)
+        self.avg_price = np.fromiter((float(p.get('avgPrice') or 0) for p in positions), dtype=np.float64, count=n)
+        self.cur_price = np.fromiter((float(p.get('curPrice') or 0) for p in positions), dtype=np.float64, count=n)
+        self.realized_pnl = np.fromiter((float(p.get('realizedPnl') or 0) for p in positions), dtype=np.float64, count=n)
+        self.row_of = {asset: index for index, asset in enumerate(self.assets)}
+
+        self.event_labels, self.event_codes = _encode(
+            [p.get('eventSlug') or p.get('conditionId') or '' for p in positions]
+        )
+        self.event_titles: Dict[str, str] = {}
+        for position, code in zip(positions, self.event_codes):
+            self.event_titles.setdefault(self.event_labels[code], position.get('title', ''))
+        self.outcome_labels, self.outcome_codes = _encode([p.get('outcome') or '' for p in positions])
+
+        # Positions can carry several tags: keep (row, tag) pairs
+        tag_rows, tag_names = [], []
+        for index, asset in enumerate(self.assets):
+            tags = list(tags_for(asset)) or [UNTAGGED]
+            tag_rows.extend([index] * len(tags))
+            tag_names.extend(tags)
+        self.tag_rows = np.array(tag_rows, dtype=np.int64)
+        self.tag_labels, self.tag_codes = _encode(tag_names) if tag_names else ([], np.array([], dtype=np.int64))
+
+    def __len__(self) -> int:
+        return len(self.assets)
+
+    def with_prices(self, prices: Dict[str, float]) -> np.ndarray:
+        """cur_price with live prices substituted for the given assets"""
+        cur_price = self.cur_price.copy()
+        for asset, price in prices.items():
+            index = self.row_of.get(asset)
+            if index is not None and price is not None:
+                cur_price[index] = price
+        return cur_price
+
+
+def _group(labels: List[str], codes: np.ndarray, columns: Dict[str, np.ndarray]) -> List[Dict[str, Any]]:
+    """Sum each column per group code; groups sorted by market value, largest first"""
+    count = len(labels)
+    sums = {name: np.bincount(codes, weights=values, minlength=count) for name, values in columns.items()}
+    positions = np.bincount(codes, minlength=count)
+    order = np.argsort(-sums['market_value'], kind='stable')
+    return [
+        dict({'name': labels[i], 'positions': int(positions[i])}, **{name: float(values[i]) for name, values in sums.items()})
+        for i in order
+    ]
+
+
+def summarize(
+    arrays: PositionArrays,
+    prices: Optional[Dict[str, float]] = None,
+    closed_realized_pnl: float = 0.0
+) -> Dict[str, Any]:
+    """
+    Portfolio totals and exposure breakdowns
+
+    prices optionally overrides curPrice per asset (e.g. live prices from
+    the price hub); closed_realized_pnl adds P&L already realized on
+    closed positions.
+    """
+    started = time.perf_counter()
+    cur_price = arrays.with_prices(prices) if prices else arrays.cur_price
+
+    cost = arrays.size * arrays.avg_price
+    market_value = arrays.size * cur_price
+    unrealized = market_value - cost
+    columns = {
+        'cost_basis': cost,
+        'market_value': market_value,
+        'unrealized_pnl': unrealized,
+        'max_payout': arrays.size  # Each winning share pays $1
+    }
+
+    total_cost = float(cost.sum())
+    total_unrealized = float(unrealized.sum())
+    realized = float(arrays.realized_pnl.sum()) + closed_realized_pnl
+
+    by_event = _group(arrays.event_labels, arrays.event_codes, columns)
+    for group in by_event:
+        group['title'] = arrays.event_titles.get(group['name'], '')
+
+    by_tag = []
+    if len(arrays.tag_rows):
+        by_tag = _group(
+            arrays.tag_labels,
+            arrays.tag_codes,
+            {name: values[arrays.tag_rows] for name, values in columns.items()}
+        )
+
+    return {
+        'totals': {
+            'positions': len(arrays),
+            'cost_basis': total_cost,
+            'market_value': float(market_value.sum()),
+            'unrealized_pnl': total_unrealized,
+            'unrealized_pnl_pct': total_unrealized / total_cost * 100 if total_cost else 0.0,
+            'realized_pnl': realized,
+            'total_pnl': total_unrealized + realized,
+            'max_payout': float(arrays.size.sum())
+        },
+        'by_event': by_event,
+        'by_tag': by_tag,  # A position counts toward every tag of its event
+        'by_outcome': _group(arrays.outcome_labels, arrays.outcome_codes, columns),
+        'compute_ms': (time.perf_counter() - started) * 1000
+    }
+
+
+class PortfolioCache:
+    """
+    PositionArrays per user, rebuilt only when the positions ETag changes;
+    least recently used users first out past max_users
+    """
+
+    def __init__(self, tags_for: Callable[[str], Iterable[str]] = lambda asset: (), max_users: int = 1000):
+        self.tags_for = tags_for
+        self.max_users = max_users
+        self._arrays: 'OrderedDict[str, Tuple[Optional[str], PositionArrays]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user: str, etag: Optional[str], positions: List[Dict[str, Any]]) -> PositionArrays:
+        with self._lock:
+            cached = self._arrays.get(user)
+            if cached is not None and etag is not None and cached[0] == etag:
+                self._arrays.move_to_end(user)
+                return cached[1]
+        arrays = PositionArrays(positions, self.tags_for)
+        with self._lock:
+            self._arrays[user] = (etag, arrays)
+            self._arrays.move_to_end(user)
+            while len(self._arrays) > self.max_users:
+                self._arrays.popitem(last=False)
+        return arrays
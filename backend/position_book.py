@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Position Book
+In-memory open positions per user, marked to market incrementally as
+prices arrive from the price hub
+"""
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional
+
+from positions_service import position_key
+
+
+def mark_position(position: Dict[str, Any], price: float) -> Dict[str, Any]:
+    """Copy of a data-api position row revalued at price"""
+    marked = dict(position)
+    size = float(position.get('size') or 0)
+    initial_value = float(position.get('initialValue') or size * float(position.get('avgPrice') or 0))
+    marked['curPrice'] = price
+    marked['currentValue'] = size * price
+    marked['cashPnl'] = marked['currentValue'] - initial_value
+    marked['percentPnl'] = marked['cashPnl'] / initial_value * 100 if initial_value else 0.0
+    return marked
+
+
+def mark_price(update: Dict[str, Any]) -> Optional[float]:
+    """Mid of the top of book when both sides are known, else the hub's price"""
+    best_bid, best_ask = update.get('best_bid'), update.get('best_ask')
+    if best_bid is not None and best_ask is not None:
+        return (best_bid + best_ask) / 2
+    return update.get('price')
+
+
+class PositionBook:
+    """
+    One user's open positions keyed by token id
+
+    load() replaces the rows from a data-api payload; apply_prices() only
+    touches rows whose token moved and keeps portfolio totals up to date
+    with O(1) adjustments, so a price tick never rescans the book.
+    """
+
+    def __init__(self, user: str):
+        self.user = user
+        self.etag: Optional[str] = None
+        self.rows: Dict[str, Dict[str, Any]] = {}
+        self.market_value = 0.0
+        self.cost_basis = 0.0
+        self._lock = threading.Lock()
+
+    def load(self, positions: List[Dict[str, Any]], etag: Optional[str] = None) -> bool:
+        """Replace the book; False (no-op) when etag matches what's loaded"""
+        with self._lock:
+            if etag is not None and etag == self.etag:
+                return False
+            self.rows = {position_key(p): p for p in positions}
+            self.market_value = sum(float(p.get('currentValue') or 0) for p in positions)
+            self.cost_basis = sum(float(p.get('initialValue') or 0) for p in positions)
+            self.etag = etag
+            return True
+
+    def token_ids(self) -> List[str]:
+        with self._lock:
+            return [row['asset'] for row in self.rows.values() if row.get('asset')]
+
+    def positions(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self.rows.values())
+
+    def get_rows(self, token_ids: Iterable[str]) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [self.rows[token_id] for token_id in token_ids if token_id in self.rows]
+
+    def apply_prices(self, updates: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Mark held tokens to the given price updates
+
+        Returns the rows that changed; updates for tokens not in the book
+        or at the price already marked are ignored.
+        """
+        changed = []
+        with self._lock:
+            for update in updates:
+                price = mark_price(update)
+                row = self.rows.get(update.get('token_id'))
+                if row is None or price is None or price == row.get('curPrice'):
+                    continue
+                marked = mark_position(row, float(price))
+                self.market_value += marked['currentValue'] - float(row.get('currentValue') or 0)
+                self.rows[update['token_id']] = marked
+                changed.append(marked)
+        return changed
+
+    def totals(self) -> Dict[str, Any]:
+        with self._lock:
+            unrealized = self.market_value - self.cost_basis
+            return {
+                'positions': len(self.rows),
+                'market_value': self.market_value,
+                'cost_basis': self.cost_basis,
+                'unrealized_pnl': unrealized,
+                'unrealized_pnl_pct': unrealized / self.cost_basis * 100 if self.cost_basis else 0.0
+            }
+
+
+class PositionBooks:
+    """PositionBook per user, least recently used first out past max_books"""
+
+    def __init__(self, max_books: int = 1000):
+        self.max_books = max_books
+        self._books: 'OrderedDict[str, PositionBook]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user: str) -> PositionBook:
+        with self._lock:
+            book = self._books.get(user)
+            if book is None:
+                book = self._books[user] = PositionBook(user)
+                while len(self._books) > self.max_books:
+                    self._books.popitem(last=False)
+            else:
+                self._books.move_to_end(user)
+            return book
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Positions Service
+Pooled, cached access to the Polymarket data-api positions endpoints with
+background refresh and ETags for the extension
+"""
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+DATA_API_URL = "https://data-api.polymarket.com"
+
+ADDRESS = re.compile(r'^0x[0-9a-fA-F]{40}$')
+
+# data-api page size limits per endpoint
+PAGE_SIZES = {
+    'positions': 500,
+    'closed-positions': 50
+}
+
+
+def position_key(position: Dict[str, Any]) -> str:
+    """Stable identity of a position row (one per outcome token)"""
+    return position.get('asset') or f"{position.get('conditionId')}:{position.get('outcomeIndex')}"
+
+
+def normalize_address(value: Optional[str]) -> str:
+    """Lowercased 0x wallet address; raises ValueError for anything else"""
+    if not isinstance(value, str) or not ADDRESS.match(value.strip()):
+        raise ValueError('user must be a 0x wallet address')
+    return value.strip().lower()
+
+
+def compute_etag(positions: List[Dict[str, Any]]) -> str:
+    return hashlib.sha1(json.dumps(positions, sort_keys=True, default=str).encode()).hexdigest()[:20]
+
+
+def create_session(pool_size: int = 16) -> requests.Session:
+    """requests session with keep-alive pooling and retries on transient upstream errors"""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=pool_size,
+        max_retries=Retry(total=2, backoff_factor=0.2, status_forcelist=[502, 503, 504], allowed_methods=['GET'])
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+class PositionsEntry:
+    """Cached positions for one (endpoint, user)"""
+
+    def __init__(self):
+        self.positions: List[Dict[str, Any]] = []
+        self.etag: Optional[str] = None
+        self.fetched_at = 0.0
+        self.upstream_etag: Optional[str] = None
+        self.changed: List[str] = []
+        self.removed: List[str] = []
+        self.refreshing = False
+        self.error: Optional[str] = None
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.fetched_at
+
+
+class PositionsService:
+    """
+    Per-user positions cache in front of data-api
+
+    Fresh entries (younger than ttl) are served from memory. Stale entries
+    are still served immediately while one background refresh per entry
+    brings them up to date; only a user's very first request waits on
+    data-api. A refresh that finds no changed rows keeps the previous
+    ETag, so the extension gets 304s until something actually moves.
+    At most max_entries (endpoint, user) entries are kept, least recently
+    used first out.
+    """
+
+    def __init__(self, base_url: str = DATA_API_URL, ttl: float = 15.0, timeout: float = 10.0,
+                 session: Optional[requests.Session] = None, max_entries: int = 1000):
+        self.base_url = base_url
+        self.ttl = ttl
+        self.timeout = timeout
+        self.session = session or create_session()
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: 'OrderedDict[Tuple[str, str], PositionsEntry]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user: str, kind: str = 'positions') -> PositionsEntry:
+        key = (kind, user)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = PositionsEntry()
+                self._evict()
+            else:
+                self._entries.move_to_end(key)
+
+        if entry.fetched_at and entry.age <= self.ttl:
+            self.hits += 1
+            return entry
+
+        if entry.fetched_at:
+            # Stale: serve what we have, refresh behind the response
+            self.hits += 1
+            self._refresh_in_background(user, kind, entry)
+            return entry
+
+        self.misses += 1
+        self.refresh(user, kind, entry)
+        return entry
+
+    def refresh(self, user: str, kind: str, entry: PositionsEntry) -> None:
+        """Pull positions from data-api and merge them into entry"""
+        rows, upstream_etag = self._fetch(user, kind, entry.upstream_etag if entry.fetched_at else None)
+        entry.fetched_at = time.time()
+        entry.error = None
+        if rows is None:
+            # 304 from upstream: nothing changed
+            entry.changed, entry.removed = [], []
+            return
+
+        previous = {position_key(p): p for p in entry.positions}
+        current_keys = set()
+        changed = []
+        for row in rows:
+            key = position_key(row)
+            current_keys.add(key)
+            if previous.get(key) != row:
+                changed.append(key)
+        removed = [key for key in previous if key not in current_keys]
+
+        entry.upstream_etag = upstream_etag
+        entry.changed, entry.removed = changed, removed
+        if changed or removed or entry.etag is None:
+            entry.positions = rows
+            entry.etag = compute_etag(rows)
+
+    def invalidate(self, user: str, kind: str = 'positions') -> None:
+        """Force the next get() to refresh, e.g. after a trade fills"""
+        with self._lock:
+            entry = self._entries.get((kind, user))
+        if entry is not None:
+            entry.fetched_at = min(entry.fetched_at, time.time() - self.ttl - 1)
+
+    def _evict(self) -> None:
+        """Drop least recently used entries past max_entries (caller holds the lock)"""
+        for key in list(self._entries):
+            if len(self._entries) <= self.max_entries:
+                return
+            if not self._entries[key].refreshing:
+                del self._entries[key]
+
+    def _refresh_in_background(self, user: str, kind: str, entry: PositionsEntry) -> None:
+        with self._lock:
+            if entry.refreshing:
+                return
+            entry.refreshing = True
+
+        def run():
+            try:
+                self.refresh(user, kind, entry)
+            except Exception as e:
+                entry.error = str(e)
+                logger.warning("⚠️ [POSITIONS] Background refresh of %s failed: %s", kind, e)
+            finally:
+                entry.refreshing = False
+
+        threading.Thread(target=run, name=f'refresh-{kind}', daemon=True).start()
+
+    def _fetch(self, user: str, kind: str, upstream_etag: Optional[str]) -> Tuple[Optional[List[Dict[str, Any]]], Optional[str]]:
+        """
+        Page through data-api; returns (rows, upstream ETag)
+
+        rows is None when upstream answered 304 to our If-None-Match.
+        """
+        page_size = PAGE_SIZES.get(kind, 100)
+        rows: List[Dict[str, Any]] = []
+        etag = None
+        offset = 0
+
+        while True:
+            headers = {'If-None-Match': upstream_etag} if upstream_etag and offset == 0 else {}
+            response = self.session.get(
+                f"{self.base_url}/{kind}",
+                params={'user': user, 'limit': page_size, 'offset': offset},
+                headers=headers,
+                timeout=self.timeout
+            )
+            if response.status_code == 304:
+                return None, upstream_etag
+            response.raise_for_status()
+
+            if offset == 0:
+                etag = response.headers.get('ETag')
+            page = response.json()
+            rows.extend(page)
+            if len(page) < page_size:
+                # A single ETag only covers the whole result when it fit in one page
+                return rows, etag if offset == 0 else None
+            offset += page_size
@@ -0,0 +1,393 @@
+#!/usr/bin/env python3
+"""
+Live Price Hub
+Keeps one upstream CLOB market-channel subscription per active token and
+fans price updates out to any number of extension clients
+"""
+import json
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+CLOB_MARKET_WS_URL = "wss://ws-subscriptions-clob.polymarket.com/ws/market"
+# Slowest per-client rate a subscriber may ask for (one update every 10s)
+MIN_RATE_HZ = 0.1
+
+
+def _best_price(levels: Iterable[Dict[str, Any]], highest: bool) -> Optional[float]:
+    """Best price from a list of {'price', 'size'} book levels"""
+    prices = [float(level['price']) for level in levels if float(level.get('size', 0)) > 0]
+    if not prices:
+        return None
+    return max(prices) if highest else min(prices)
+
+
+def price_updates_from_event(event: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Extract top-of-book / last trade updates from a market-channel event
+
+    Returns a list of partial price dicts keyed by token_id. Events that
+    carry no top-of-book information (e.g. legacy price_change deltas)
+    produce no updates here.
+    """
+    event_type = event.get('event_type')
+    updates = []
+
+    if event_type == 'book':
+        updates.append({
+            'token_id': event.get('asset_id'),
+            'best_bid': _best_price(event.get('bids', event.get('buys', [])), highest=True),
+            'best_ask': _best_price(event.get('asks', event.get('sells', [])), highest=False)
+        })
+    elif event_type == 'price_change':
+        for change in event.get('price_changes', []):
+            if 'best_bid' in change or 'best_ask' in change:
+                updates.append({
+                    'token_id': change.get('asset_id'),
+                    'best_bid': float(change['best_bid']) if change.get('best_bid') else None,
+                    'best_ask': float(change['best_ask']) if change.get('best_ask') else None
+                })
+    elif event_type == 'best_bid_ask':
+        updates.append({
+            'token_id': event.get('asset_id'),
+            'best_bid': float(event['best_bid']) if event.get('best_bid') else None,
+            'best_ask': float(event['best_ask']) if event.get('best_ask') else None
+        })
+    elif event_type == 'last_trade_price':
+        updates.append({
+            'token_id': event.get('asset_id'),
+            'last_trade': float(event['price'])
+        })
+
+    return [update for update in updates if update.get('token_id')]
+
+
+class MarketFeed:
+    """Upstream source of CLOB market-channel events"""
+
+    def __init__(self):
+        self._listeners: List[Callable[[Dict[str, Any]], None]] = []
+
+    def add_listener(self, listener: Callable[[Dict[str, Any]], None]) -> None:
+        """Register a callback invoked with every raw market-channel event"""
+        self._listeners.append(listener)
+
+    def subscribe(self, token_id: str) -> None:
+        raise NotImplementedError
+
+    def unsubscribe(self, token_id: str) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+    def _dispatch(self, event: Dict[str, Any]) -> None:
+        for listener in self._listeners:
+            try:
+                listener(event)
+            except Exception as e:
+                logger.warning("⚠️ [PRICES] Listener error on %s: %s", event.get('event_type'), e)
+
+
+class LocalMarketFeed(MarketFeed):
+    """
+    In-process stand-in for the CLOB market channel
+
+    Used by tests and offline development: events are injected with
+    publish() / publish_price() instead of arriving over a websocket.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.subscribed: Set[str] = set()
+
+    def subscribe(self, token_id: str) -> None:
+        self.subscribed.add(token_id)
+
+    def unsubscribe(self, token_id: str) -> None:
+        self.subscribed.discard(token_id)
+
+    def publish(self, event: Dict[str, Any]) -> None:
+        """Inject a raw market-channel event"""
+        self._dispatch(event)
+
+    def publish_price(
+        self,
+        token_id: str,
+        best_bid: Optional[float] = None,
+        best_ask: Optional[float] = None
+    ) -> None:
+        """Inject a top-of-book change for one token"""
+        self._dispatch({
+            'event_type': 'best_bid_ask',
+            'asset_id': token_id,
+            'best_bid': None if best_bid is None else str(best_bid),
+            'best_ask': None if best_ask is None else str(best_ask),
+            'timestamp': str(int(time.time() * 1000))
+        })
+
+
+class ClobMarketFeed(MarketFeed):
+    """
+    Single websocket connection to the CLOB market channel
+
+    Tokens are added and removed with subscribe/unsubscribe operations on
+    the open connection; after a reconnect every active token is
+    resubscribed in the initial handshake.
+    """
+
+    PING_INTERVAL = 10
+    MAX_BACKOFF = 30
+
+    def __init__(self, url: str = CLOB_MARKET_WS_URL):
+        super().__init__()
+        self.url = url
+        self._tokens: Set[str] = set()
+        self._lock = threading.Lock()
+        self._ws = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = False
+
+    def subscribe(self, token_id: str) -> None:
+        with self._lock:
+            self._tokens.add(token_id)
+            ws = self._ws
+        self._ensure_started()
+        if ws is not None:
+            self._send(ws, {'assets_ids': [token_id], 'operation': 'subscribe'})
+
+    def unsubscribe(self, token_id: str) -> None:
+        with self._lock:
+            self._tokens.discard(token_id)
+            ws = self._ws
+        if ws is not None:
+            self._send(ws, {'assets_ids': [token_id], 'operation': 'unsubscribe'})
+
+    def close(self) -> None:
+        self._stopped = True
+        with self._lock:
+            ws = self._ws
+        if ws is not None:
+            ws.close()
+
+    def _ensure_started(self) -> None:
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name='clob-market-feed', daemon=True)
+            self._thread.start()
+
+    def _send(self, ws, payload: Dict[str, Any]) -> None:
+        try:
+            ws.send(json.dumps(payload))
+        except Exception as e:
+            logger.warning("⚠️ [PRICES] Market channel send failed: %s", e)
+
+    def _run(self) -> None:
+        import websocket
+
+        backoff = 1
+        while not self._stopped:
+            ws = websocket.WebSocketApp(
+                self.url,
+                on_open=self._on_open,
+                on_message=self._on_message,
+                on_error=lambda ws, error: logger.warning("⚠️ [PRICES] Market channel error: %s", error)
+            )
+            opened_at = time.time()
+            ws.run_forever(ping_interval=self.PING_INTERVAL)
+            with self._lock:
+                self._ws = None
+            if self._stopped:
+                break
+            # Reset the backoff once a connection has stayed up for a while
+            if time.time() - opened_at > self.MAX_BACKOFF:
+                backoff = 1
+            logger.info("🔄 [PRICES] Market channel closed, reconnecting in %ss", backoff)
+            time.sleep(backoff)
+            backoff = min(backoff * 2, self.MAX_BACKOFF)
+
+    def _on_open(self, ws) -> None:
+        with self._lock:
+            self._ws = ws
+            tokens = list(self._tokens)
+        logger.info("📡 [PRICES] Market channel connected, subscribing %d tokens", len(tokens))
+        self._send(ws, {'assets_ids': tokens, 'type': 'market'})
+
+    def _on_message(self, ws, message: str) -> None:
+        if message == 'PONG':
+            return
+        try:
+            payload = json.loads(message)
+        except ValueError:
+            return
+        for event in payload if isinstance(payload, list) else [payload]:
+            if isinstance(event, dict):
+                self._dispatch(event)
+
+
+class PriceSubscription:
+    """
+    One client's view of a set of tokens
+
+    Updates are coalesced per token: if several arrive between two reads
+    only the latest is delivered, and reads are spaced at least
+    min_interval seconds apart.
+    """
+
+    def __init__(self, hub: 'PriceHub', token_ids: List[str], min_interval: float):
+        self.hub = hub
+        self.token_ids = token_ids
+        self.min_interval = min_interval
+        self.closed = False
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._cond = threading.Condition()
+        self._last_flush = 0.0
+
+    def offer(self, price: Dict[str, Any]) -> None:
+        with self._cond:
+            self._pending[price['token_id']] = price
+            self._cond.notify()
+
+    def next_batch(self, timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Block until updates are available (or timeout) and return them
+
+        Returns an empty list on timeout or once the subscription is closed.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while not self._pending and not self.closed:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return []
+                self._cond.wait(remaining)
+
+            # Rate limit: let further updates coalesce into this batch; past
+            # the timeout they stay pending for the next call
+            wait = self._last_flush + self.min_interval - time.monotonic()
+            while wait > 0 and not self.closed:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return []
+                self._cond.wait(wait if remaining is None else min(wait, remaining))
+                wait = self._last_flush + self.min_interval - time.monotonic()
+
+            batch = list(self._pending.values())
+            self._pending.clear()
+            self._last_flush = time.monotonic()
+            return batch
+
+    def close(self) -> None:
+        with self._cond:
+            if self.closed:
+                return
+            self.closed = True
+            self._cond.notify_all()
+        self.hub.release(self)
+
+    def __enter__(self) -> 'PriceSubscription':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class PriceHub:
+    """
+    Reference-counted fan-out of upstream price updates
+
+    The first client viewing a token opens its upstream subscription and
+    the last one to leave closes it, so upstream load is O(tokens) no
+    matter how many clients are watching.
+    """
+
+    def __init__(self, feed: MarketFeed, max_rate_hz: float = 4.0):
+        self.feed = feed
+        self.max_rate_hz = max_rate_hz
+        self._lock = threading.Lock()
+        self._refcounts: Dict[str, int] = {}
+        self._latest: Dict[str, Dict[str, Any]] = {}
+        self._subscribers: Dict[str, Set[PriceSubscription]] = {}
+        feed.add_listener(self._on_event)
+
+    def subscribe(self, token_ids: Iterable[str], max_rate_hz: Optional[float] = None) -> PriceSubscription:
+        """
+        Start watching token_ids; close() the returned subscription when done
+
+        max_rate_hz may only lower the hub's rate, down to MIN_RATE_HZ;
+        anything not a positive number gets the hub's rate.
+        """
+        token_ids = list(dict.fromkeys(t for t in token_ids if t))
+        rate = self.max_rate_hz
+        if max_rate_hz is not None and max_rate_hz > 0:  # False for NaN too
+            rate = max(min(max_rate_hz, self.max_rate_hz), min(MIN_RATE_HZ, self.max_rate_hz))
+        subscription = PriceSubscription(self, token_ids, 1.0 / rate)
+
+        new_tokens = []
+        with self._lock:
+            for token_id in token_ids:
+                self._subscribers.setdefault(token_id, set()).add(subscription)
+                self._refcounts[token_id] = self._refcounts.get(token_id, 0) + 1
+                if self._refcounts[token_id] == 1:
+                    new_tokens.append(token_id)
+                elif token_id in self._latest:
+                    subscription.offer(dict(self._latest[token_id]))
+
+        for token_id in new_tokens:
+            self.feed.subscribe(token_id)
+        return subscription
+
+    def release(self, subscription: PriceSubscription) -> None:
+        stale_tokens = []
+        with self._lock:
+            for token_id in subscription.token_ids:
+                self._subscribers.get(token_id, set()).discard(subscription)
+                self._refcounts[token_id] -= 1
+                if self._refcounts[token_id] == 0:
+                    del self._refcounts[token_id]
+                    self._subscribers.pop(token_id, None)
+                    self._latest.pop(token_id, None)
+                    stale_tokens.append(token_id)
+
+        for token_id in stale_tokens:
+            self.feed.unsubscribe(token_id)
+
+    def latest(self, token_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            price = self._latest.get(token_id)
+            return dict(price) if price else None
+
+    def is_active(self, token_id: str) -> bool:
+        """Whether token_id currently has an upstream subscription"""
+        with self._lock:
+            return token_id in self._refcounts
+
+    def active_tokens(self) -> Dict[str, int]:
+        """Token id -> number of clients currently watching it"""
+        with self._lock:
+            return dict(self._refcounts)
+
+    def _on_event(self, event: Dict[str, Any]) -> None:
+        for update in price_updates_from_event(event):
+            self.apply_update(update)
+
+    def apply_update(self, update: Dict[str, Any]) -> None:
+        """Merge a partial price update and notify the token's watchers"""
+        token_id = update['token_id']
+        with self._lock:
+            if token_id not in self._refcounts:
+                return
+            price = self._latest.setdefault(token_id, {'token_id': token_id})
+            price.update(update)
+            # Buy-side price, matching what /api/prices reports
+            price['price'] = price.get('best_ask') if price.get('best_ask') is not None else price.get('last_trade')
+            price['timestamp'] = time.time()
+            snapshot = dict(price)
+            subscribers = list(self._subscribers.get(token_id, ()))
+
+        for subscription in subscribers:
+            subscription.offer(snapshot)
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+On-Demand Profiling
+A statistical profiler that samples every thread's stack for a few
+seconds of live traffic, and tracemalloc allocation diffs, for finding hot
+spots in the running server without restarting it
+"""
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+MAX_PROFILE_SECONDS = 60.0
+MIN_INTERVAL = 0.001
+
+
+class ProfilerBusy(RuntimeError):
+    """Only one profile (of each kind) runs at a time"""
+
+
+def frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """
+    Samples sys._current_frames() from the calling thread
+
+    Output is collapsed stacks ("thread;outer;...;inner count" per line),
+    the input format of flamegraph.pl, speedscope and inferno. Overhead is
+    one stack walk per thread per interval, and nothing at all when idle.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def profile(self, seconds: float, interval: float = 0.005) -> Dict[str, Any]:
+        seconds = min(max(seconds, 0.1), MAX_PROFILE_SECONDS)
+        interval = max(interval, MIN_INTERVAL)
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusy("A profile is already running")
+        try:
+            return self._sample(seconds, interval)
+        finally:
+            self._lock.release()
+
+    def _sample(self, seconds: float, interval: float) -> Dict[str, Any]:
+        stacks: Counter = Counter()
+        me = threading.get_ident()
+        samples = 0
+        started = time.perf_counter()
+        deadline = started + seconds
+        logger.info("🔬 [PROFILE] Sampling all threads for %.1fs every %.1fms", seconds, interval * 1000)
+
+        while time.perf_counter() < deadline:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack: List[str] = []
+                while frame is not None:
+                    stack.append(frame_label(frame))
+                    frame = frame.f_back
+                stack.append(names.get(ident, f'thread-{ident}'))
+                stacks[';'.join(reversed(stack))] += 1
+            samples += 1
+            time.sleep(interval)
+
+        elapsed = time.perf_counter() - started
+        logger.info("🔬 [PROFILE] %d samples, %d distinct stacks", samples, len(stacks))
+        return {
+            'seconds': round(elapsed, 3),
+            'interval_ms': interval * 1000,
+            'samples': samples,
+            'stacks': stacks
+        }
+
+
+def collapsed(stacks: Counter) -> str:
+    return ''.join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+def top_functions(stacks: Counter, limit: int = 20) -> List[Dict[str, Any]]:
+    """Innermost frames by share of samples (self time)"""
+    total = sum(stacks.values()) or 1
+    leaves: Counter = Counter()
+    for stack, count in stacks.items():
+        leaves[stack.rsplit(';', 1)[-1]] += count
+    return [{'function': name, 'samples': count, 'share': round(count / total, 4)}
+            for name, count in leaves.most_common(limit)]
+
+
+class AllocationProfile:
+    """
+    tracemalloc diff over a window (one request, or a sampling profile)
+
+    tracemalloc is process-wide, so allocations made by other threads in
+    the same window are counted too. One profile runs at a time.
+    """
+
+    _lock = threading.Lock()
+
+    def __init__(self, frames: int = 10):
+        self.frames = frames
+        self._started_tracing = False
+        self._before: Optional[tracemalloc.Snapshot] = None
+
+    def start(self) -> 'AllocationProfile':
+        if not AllocationProfile._lock.acquire(blocking=False):
+            raise ProfilerBusy("An allocation profile is already running")
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            self._started_tracing = True
+        self._before = self._snapshot()
+        return self
+
+    @staticmethod
+    def _snapshot() -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+
+    def stop(self, limit: int = 25) -> Dict[str, Any]:
+        try:
+            after = self._snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            diff = after.compare_to(self._before, 'lineno')
+            return {
+                'traced_current_kb': round(current / 1024, 1),
+                'traced_peak_kb': round(peak / 1024, 1),
+                'top': [{
+                    'location': str(stat.traceback[0]),
+                    'size_diff_kb': round(stat.size_diff / 1024, 1),
+                    'count_diff': stat.count_diff
+                } for stat in diff[:limit]]
+            }
+        finally:
+            if self._started_tracing:
+                tracemalloc.stop()
+            AllocationProfile._lock.release()
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Hermetic latency benchmark for the tweet pipeline and trading backend
+
+Starts fake Cohere, Gamma and CLOB servers (fake_upstreams.py), points the
+code at them, and drives each scenario at a fixed concurrency:
+  - analyze_tweet         the pipeline called in-process
+  - api_analyze_tweet     POST /api/analyze-tweet on a local backend
+  - api_prices            GET /api/prices on a local backend
+
+Reports p50/p95/p99 latency and throughput per scenario to a JSON file, so
+runs can be compared across commits without network access:
+    python testing/benchmark_latency.py --output before.json
+    git checkout my-branch
+    python testing/benchmark_latency.py --output after.json --compare before.json
+
+Usage (from the backend directory):
+    python testing/benchmark_latency.py [--concurrency 8] [--requests 50]
+        [--scenarios analyze_tweet,api_prices] [--cohere 400:1500]
+        [--gamma 150:600] [--clob 60:250] [--error-rate 0.01]
+"""
+import argparse
+import json
+import math
+import os
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List
+
+TESTING_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(TESTING_DIR)
+sys.path.insert(0, TESTING_DIR)
+
+from fake_upstreams import LatencyProfile, environment_for, start_all
+
+SCENARIOS = ('analyze_tweet', 'api_analyze_tweet', 'api_prices')
+
+TWEETS = [
+    "Bitcoin just broke $100k, ETF inflows are insane right now",
+    "No way BTC holds these levels through the halving",
+    "Crypto winter is over, institutions are buying every dip",
+    "Bitcoin price is going to be wild this week after the Fed meeting"
+]
+
+# Throwaway key: only used to sign L1 auth headers against the fake CLOB
+BENCHMARK_PRIVATE_KEY = '0x' + '11' * 32
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    # Nearest-rank
+    index = max(0, math.ceil(q / 100 * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+def run_fixed_concurrency(call: Callable[[int], bool], concurrency: int, total: int) -> Dict[str, Any]:
+    """Run `total` calls from `concurrency` threads; call(i) returns False on a failed request"""
+    latencies: List[float] = []
+    errors = 0
+    lock = threading.Lock()
+    counter = iter(range(total))
+
+    def worker():
+        nonlocal errors
+        while True:
+            with lock:
+                index = next(counter, None)
+            if index is None:
+                return
+            started = time.perf_counter()
+            try:
+                ok = call(index)
+            except Exception:
+                ok = False
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            with lock:
+                latencies.append(elapsed_ms)
+                if not ok:
+                    errors += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for _ in range(concurrency):
+            pool.submit(worker)
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'requests': total,
+        'errors': errors,
+        'error_rate': round(errors / total, 4) if total else 0.0,
+        'p50_ms': round(percentile(latencies, 50), 2),
+        'p95_ms': round(percentile(latencies, 95), 2),
+        'p99_ms': round(percentile(latencies, 99), 2),
+        'mean_ms': round(sum(latencies) / len(latencies), 2) if latencies else 0.0,
+        'max_ms': round(latencies[-1], 2) if latencies else 0.0,
+        'throughput_rps': round(total / wall, 2) if wall else 0.0,
+        'wall_s': round(wall, 3)
+    }
+
+
+def http_call(url: str, payload: Any = None, timeout: float = 120) -> bool:
+    data = json.dumps(payload).encode() if payload is not None else None
+    request = urllib.request.Request(url, data=data, headers={'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+            return response.status == 200
+    except urllib.error.HTTPError as e:
+        e.read()
+        return False
+
+
+def start_backend():
+    """Serve trading_backend.app on a free port in this process"""
+    from werkzeug.serving import make_server
+    import trading_backend
+
+    server = make_server('127.0.0.1', 0, trading_backend.app, threaded=True)
+    threading.Thread(target=server.serve_forever, name='benchmark-backend', daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_port}'
+
+
+def build_scenarios(names: List[str]) -> Dict[str, Callable[[int], bool]]:
+    calls: Dict[str, Callable[[int], bool]] = {}
+
+    if 'analyze_tweet' in names:
+        from tweet_analyzer import analyze_tweet
+
+        def analyze(i):
+            result = analyze_tweet(TWEETS[i % len(TWEETS)], 'benchmark', 5, save_to_file=False, verbose=False)
+            return 'error' not in result
+        calls['analyze_tweet'] = analyze
+
+    if any(name.startswith('api_') for name in names):
+        _, base_url = start_backend()
+        if 'api_analyze_tweet' in names:
+            calls['api_analyze_tweet'] = lambda i: http_call(
+                f'{base_url}/api/analyze-tweet', {'tweet_text': TWEETS[i % len(TWEETS)], 'author': 'benchmark', 'top_n': 5}
+            )
+        if 'api_prices' in names:
+            calls['api_prices'] = lambda i: http_call(f'{base_url}/api/prices')
+
+    return calls
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def print_comparison(report: Dict[str, Any], baseline: Dict[str, Any]) -> None:
+    print(f"\n📊 {baseline.get('commit', '?')} → {report['commit']}")
+    print(f"{'scenario':<20}{'metric':<16}{'before':>10}{'after':>10}{'change':>10}")
+    for name, after in report['scenarios'].items():
+        before = baseline.get('scenarios', {}).get(name)
+        if not before:
+            continue
+        for metric in ('p50_ms', 'p95_ms', 'p99_ms', 'throughput_rps'):
+            change = (after[metric] - before[metric]) / before[metric] * 100 if before[metric] else 0.0
+            print(f"{name:<20}{metric:<16}{before[metric]:>10.1f}{after[metric]:>10.1f}{change:>+9.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline latency benchmark against fake upstreams')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS))
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=50, help='measured requests per scenario')
+    parser.add_argument('--warmup', type=int, default=4, help='unmeasured requests per scenario')
+    parser.add_argument('--cohere', default='400:1500', help='median[:p99] latency in ms')
+    parser.add_argument('--gamma', default='150:600', help='median[:p99] latency in ms')
+    parser.add_argument('--clob', default='60:250', help='median[:p99] latency in ms')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of upstream calls that fail')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='benchmark_latency.json')
+    parser.add_argument('--compare', help='earlier report to diff against')
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = set(names) - set(SCENARIOS)
+    if unknown:
+        raise SystemExit(f"❌ Unknown scenarios: {', '.join(sorted(unknown))}")
+
+    profiles = {
+        'cohere': LatencyProfile.parse(args.cohere, args.error_rate),
+        'gamma': LatencyProfile.parse(args.gamma, args.error_rate),
+        'clob': LatencyProfile.parse(args.clob, args.error_rate)
+    }
+    fakes = start_all(profiles['cohere'], profiles['gamma'], profiles['clob'], args.seed)
+
+    # Must be in place before the pipeline config and backend are imported
+    os.environ.update(environment_for(fakes))
+    os.environ.update({
+        'magickey': BENCHMARK_PRIVATE_KEY,
+        'funder': '',
+        'PRICE_FEED': 'local',
+        'LOG_LEVEL': os.getenv('LOG_LEVEL', 'WARNING')
+    })
+    os.chdir(BACKEND_DIR)
+    sys.path.insert(0, BACKEND_DIR)
+    sys.path.insert(0, os.path.join(BACKEND_DIR, 'tweet-market-pipeline'))
+    sys.path.insert(0, os.path.join(BACKEND_DIR, 'tweet-market-pipeline', 'include'))
+
+    calls = build_scenarios(names)
+    report = {
+        'commit': git_commit(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'config': {
+            'concurrency': args.concurrency,
+            'requests': args.requests,
+            'warmup': args.warmup,
+            'seed': args.seed,
+            'upstreams': {name: profile.to_dict() for name, profile in profiles.items()}
+        },
+        'scenarios': {}
+    }
+
+    for name in names:
+        print(f"⏱️  {name}: {args.requests} requests at concurrency {args.concurrency}...")
+        run_fixed_concurrency(calls[name], args.concurrency, args.warmup)
+        result = run_fixed_concurrency(calls[name], args.concurrency, args.requests)
+        report['scenarios'][name] = result
+        print(f"   p50 {result['p50_ms']:.0f}ms | p95 {result['p95_ms']:.0f}ms | p99 {result['p99_ms']:.0f}ms | "
+              f"{result['throughput_rps']:.1f} req/s | {result['errors']} errors")
+
+    report['upstream_calls'] = {name: fake.stats() for name, fake in fakes.items()}
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"💾 Results saved to: {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            print_comparison(report, json.load(f))
+
+    for fake in fakes.values():
+        fake.stop()
+
+
+if __name__ == '__main__':
+    main()
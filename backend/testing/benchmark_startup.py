@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark for the trading backend
+
+Measures, in fresh interpreters:
+  1. Import time of trading_backend (and the slowest modules it pulls in,
+     from python -X importtime)
+  2. Time from process start until the server answers /api/ready (bind)
+     and until it reports ready (warmup finished)
+
+Usage (from the backend directory):
+    python testing/benchmark_startup.py [iterations]
+"""
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure_import(iterations):
+    samples = []
+    slowest = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', 'import trading_backend'],
+            cwd=BACKEND_DIR, capture_output=True, text=True
+        )
+        samples.append((time.perf_counter() - started) * 1000)
+        if result.returncode != 0:
+            print(result.stderr[-2000:])
+            raise SystemExit("❌ Importing trading_backend failed")
+
+    # "import time: self [us] | cumulative | imported package" lines from the last run
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, self_us, cumulative_us, name = [part.strip() for part in line.replace('import time:', '|', 1).split('|')]
+        slowest.append((int(cumulative_us), name))
+    slowest.sort(reverse=True)
+    return samples, slowest[:10]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def measure_bind(timeout=60):
+    port = free_port()
+    env = dict(os.environ, PORT=str(port), FLASK_RELOAD='0')
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, 'trading_backend.py'],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    bind_ms = ready_ms = None
+    try:
+        while time.perf_counter() - started < timeout:
+            try:
+                with urllib.request.urlopen(f'http://127.0.0.1:{port}/api/ready', timeout=1) as response:
+                    status = response.status
+            except urllib.error.HTTPError as e:
+                status = e.code
+            except OSError:
+                time.sleep(0.01)
+                continue
+
+            elapsed = (time.perf_counter() - started) * 1000
+            if bind_ms is None:
+                bind_ms = elapsed
+            if status == 200:
+                ready_ms = elapsed
+                break
+            time.sleep(0.05)
+    finally:
+        process.terminate()
+        process.wait()
+    return bind_ms, ready_ms
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    print(f"🚀 Startup benchmark ({iterations} iterations)")
+    print("=" * 60)
+
+    samples, slowest = measure_import(iterations)
+    print(f"📦 import trading_backend   mean {statistics.mean(samples):8.1f} ms | min {min(samples):8.1f} ms")
+    print("🐢 Slowest imports (cumulative):")
+    for cumulative_us, name in slowest:
+        print(f"   {cumulative_us / 1000:8.1f} ms  {name}")
+
+    binds, readies = [], []
+    for _ in range(iterations):
+        bind_ms, ready_ms = measure_bind()
+        if bind_ms is not None:
+            binds.append(bind_ms)
+        if ready_ms is not None:
+            readies.append(ready_ms)
+
+    print("=" * 60)
+    if binds:
+        print(f"🌐 Accepting traffic          mean {statistics.mean(binds):8.1f} ms | max {max(binds):8.1f} ms")
+    else:
+        print("❌ Server never answered /api/ready")
+    if readies:
+        print(f"🔥 Warmup finished (ready)    mean {statistics.mean(readies):8.1f} ms | max {max(readies):8.1f} ms")
+    else:
+        print("⚠️ Warmup did not report ready (check credentials / network)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Click-to-post latency benchmark for /api/trade order preparation
+
+Compares the old path (fresh client + create_market_order, which derives
+API creds and looks up tick size, neg-risk and the order book over the
+network) with the cached path (shared client + build_market_buy). Orders
+are signed but never posted, so the post itself - identical in both
+paths - is left out of the numbers.
+
+Usage (needs magickey/funder in .env and network access):
+    python testing/benchmark_trade_signing.py <token_id> [amount] [iterations]
+"""
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import trading_backend
+from py_clob_client.clob_types import MarketOrderArgs, OrderType
+from py_clob_client.order_builder.constants import BUY
+
+
+def time_calls(fn, iterations):
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def report(label, samples):
+    samples = sorted(samples)
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    print(f"{label:<32} mean {statistics.mean(samples):8.1f} ms | p50 {statistics.median(samples):8.1f} ms | p95 {p95:8.1f} ms")
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        return
+
+    token_id = sys.argv[1]
+    amount = float(sys.argv[2]) if len(sys.argv) > 2 else 1.0
+    iterations = int(sys.argv[3]) if len(sys.argv) > 3 else 10
+
+    print(f"⏱️  Signing a ${amount} FOK BUY on {token_id[:16]}... ({iterations} iterations)")
+    print("=" * 60)
+
+    def before():
+        client = trading_backend.setup_client()
+        order = MarketOrderArgs(token_id=token_id, amount=amount, side=BUY, order_type=OrderType.FOK)
+        client.create_market_order(order)
+
+    # Warm the shared client, metadata and a live order book the way
+    # /api/analyze-tweet and an open price stream would
+    client = trading_backend.get_trading_client()
+    trading_backend.token_metadata.get(token_id)
+    subscription = trading_backend.price_hub.subscribe([token_id])
+    subscription.next_batch(timeout=5)
+
+    def after():
+        trading_backend.build_market_buy(client, token_id, amount)
+
+    try:
+        report("before (fresh client, lookups)", time_calls(before, iterations))
+        report("after (cached metadata + book)", time_calls(after, iterations))
+    finally:
+        subscription.close()
+
+
+if __name__ == "__main__":
+    main()
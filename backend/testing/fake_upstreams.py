@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+Local stand-ins for Cohere, Gamma and the CLOB
+
+Each fake is a small threaded HTTP server that answers the handful of
+endpoints the pipeline and trading backend call, after a latency drawn
+from a log-normal distribution (given as median and p99) and with a
+configurable error rate. Seeded, so two runs see the same delays.
+
+Point the code at them with COHERE_BASE_URL, POLYMARKET_BASE_URL and
+CLOB_HOST (benchmark_latency.py does this for you), or run this file to
+serve all three by hand:
+    python testing/fake_upstreams.py [--cohere 400:1500] [--error-rate 0.01]
+"""
+import argparse
+import json
+import math
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+Z_99 = 2.326  # p99 of the standard normal
+
+
+class LatencyProfile:
+    """Log-normal delay with the given median and p99, plus an error rate"""
+
+    def __init__(self, median_ms: float = 50.0, p99_ms: Optional[float] = None, error_rate: float = 0.0):
+        self.median_ms = median_ms
+        self.p99_ms = p99_ms if p99_ms is not None else median_ms * 3
+        self.error_rate = error_rate
+        self.sigma = math.log(self.p99_ms / self.median_ms) / Z_99 if self.median_ms > 0 and self.p99_ms > self.median_ms else 0.0
+
+    @classmethod
+    def parse(cls, spec: str, error_rate: float = 0.0) -> 'LatencyProfile':
+        """'median' or 'median:p99' in milliseconds"""
+        median, _, p99 = spec.partition(':')
+        return cls(float(median), float(p99) if p99 else None, error_rate)
+
+    def sample(self, rng: random.Random) -> Tuple[float, bool]:
+        """(delay in seconds, whether to fail)"""
+        delay_ms = self.median_ms * math.exp(rng.gauss(0, self.sigma)) if self.median_ms > 0 else 0.0
+        return delay_ms / 1000, rng.random() < self.error_rate
+
+    def to_dict(self) -> Dict[str, float]:
+        return {'median_ms': self.median_ms, 'p99_ms': self.p99_ms, 'error_rate': self.error_rate}
+
+
+class FakeUpstream:
+    """Threaded HTTP server; subclasses implement route(method, path, query, body)"""
+
+    name = 'upstream'
+
+    def __init__(self, profile: Optional[LatencyProfile] = None, seed: int = 0, port: int = 0):
+        self.profile = profile or LatencyProfile()
+        self.requests = 0
+        self.errors = 0
+        self._rng = random.Random(f'{self.name}:{seed}')
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self) -> 'FakeUpstream':
+        self._thread = threading.Thread(target=self._server.serve_forever, name=f'fake-{self.name}', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {'url': self.url, 'requests': self.requests, 'errors': self.errors, **self.profile.to_dict()}
+
+    def route(self, method: str, path: str, query: Dict[str, str], body: Any) -> Tuple[int, Any]:
+        raise NotImplementedError
+
+    def _draw(self) -> Tuple[float, bool]:
+        with self._lock:
+            self.requests += 1
+            delay, fail = self.profile.sample(self._rng)
+            if fail:
+                self.errors += 1
+            return delay, fail
+
+    def _handler_class(self):
+        upstream = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def _handle(self, method):
+                parsed = urlparse(self.path)
+                query = {key: values[0] for key, values in parse_qs(parsed.query).items()}
+                length = int(self.headers.get('Content-Length') or 0)
+                raw = self.rfile.read(length) if length else b''
+                try:
+                    body = json.loads(raw) if raw else None
+                except ValueError:
+                    body = None
+
+                delay, fail = upstream._draw()
+                time.sleep(delay)
+                if fail:
+                    status, payload = 500, {'error': f'fake {upstream.name} error'}
+                else:
+                    status, payload = upstream.route(method, parsed.path, query, body)
+
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                self._handle('GET')
+
+            def do_POST(self):
+                self._handle('POST')
+
+            def do_DELETE(self):
+                self._handle('DELETE')
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+class FakeCohere(FakeUpstream):
+    """Chat endpoint answering the pipeline's four prompt shapes"""
+
+    name = 'cohere'
+
+    def route(self, method, path, query, body):
+        if not path.rstrip('/').endswith('/chat'):
+            return 404, {'message': f'no route for {path}'}
+        prompt = (body or {}).get('message', '')
+        if 'RESPOND WITH ONE BLOCK PER MARKET' in prompt:
+            # Relevance: deterministic per market title so rankings are stable
+            blocks = []
+            for number, title in enumerate(re.findall(r'^Title: (.*)$', prompt, re.MULTILINE), 1):
+                score = (sum(map(ord, title)) % 100) / 100
+                blocks.append(f"[{number}]\nSCORE: {score:.2f}\nEXPLANATION: Synthetic relevance.\nKEY_MATCHES: bitcoin, price")
+            text = '\n\n'.join(blocks)
+        elif prompt.rstrip().endswith('Search query:'):
+            text = 'Bitcoin price'
+        elif prompt.rstrip().endswith('Topics:'):
+            text = 'Bitcoin, ETF, crypto markets'
+        else:
+            text = '0.4'
+        return 200, {
+            'text': text,
+            'generation_id': uuid.uuid4().hex,
+            'finish_reason': 'COMPLETE',
+            'meta': {'billed_units': {'input_tokens': len(prompt) // 4, 'output_tokens': len(text) // 4}}
+        }
+
+
+def synthetic_event(index: int, markets_per_event: int = 3) -> Dict[str, Any]:
+    """A Gamma event with the fields the ranker, formatter and metadata cache read"""
+    markets = []
+    for m in range(markets_per_event):
+        market_id = f'{index}{m:02d}'
+        price = round(0.05 + ((index * 7 + m * 13) % 90) / 100, 2)
+        markets.append({
+            'id': market_id,
+            'question': f'Will Bitcoin close above ${100 + index * 5 + m}k on benchmark day {index}?',
+            'groupItemTitle': f'${100 + index * 5 + m}k',
+            'clobTokenIds': json.dumps([f'9{market_id}1', f'9{market_id}2']),
+            'outcomes': json.dumps(['Yes', 'No']),
+            'outcomePrices': json.dumps([str(price), str(round(1 - price, 2))]),
+            'orderPriceMinTickSize': 0.01,
+            'negRisk': False,
+            'active': True,
+            'volume': str(10000 * (index + 1))
+        })
+    return {
+        'id': str(1000 + index),
+        'title': f'Bitcoin price benchmark event {index}',
+        'description': 'Synthetic event served by the fake Gamma API.',
+        'tags': [{'label': 'Crypto'}, {'label': 'Bitcoin'}],
+        'negRisk': False,
+        'volume': str(50000 * (index + 1)),
+        'markets': markets
+    }
+
+
+class FakeGamma(FakeUpstream):
+    """/public-search and /events (the catalog) returning a fixed number of synthetic events"""
+
+    name = 'gamma'
+
+    def __init__(self, profile=None, seed=0, port=0, events: int = 10):
+        super().__init__(profile, seed, port)
+        self.events = [synthetic_event(i) for i in range(events)]
+
+    def route(self, method, path, query, body):
+        if path.rstrip('/') == '/public-search':
+            return 200, {'events': self.events}
+        if path.rstrip('/') == '/events':
+            return 200, self.events[:int(query.get('limit', len(self.events)))]
+        return 404, {'error': f'no route for {path}'}
+
+
+class FakeClob(FakeUpstream):
+    """Public reads (price, book, tick size, neg risk), API key derivation and order posting"""
+
+    name = 'clob'
+
+    def route(self, method, path, query, body):
+        token_id = query.get('token_id', '0')
+        mid = 0.05 + (sum(map(ord, token_id)) % 90) / 100
+        if path == '/':
+            return 200, 'OK'
+        if path == '/price':
+            return 200, {'price': f'{mid:.2f}'}
+        if path == '/book':
+            return 200, {
+                'market': '0x' + '0' * 64,
+                'asset_id': token_id,
+                'timestamp': str(int(time.time() * 1000)),
+                'hash': uuid.uuid4().hex,
+                'min_order_size': '5',
+                'tick_size': '0.01',
+                'neg_risk': False,
+                'bids': [{'price': f'{mid - 0.01 * i:.2f}', 'size': '500'} for i in range(1, 6)],
+                'asks': [{'price': f'{mid + 0.01 * i:.2f}', 'size': '500'} for i in range(1, 6)]
+            }
+        if path == '/tick-size':
+            return 200, {'minimum_tick_size': 0.01}
+        if path == '/neg-risk':
+            return 200, {'neg_risk': False}
+        if path in ('/auth/api-key', '/auth/derive-api-key'):
+            return 200, {'apiKey': str(uuid.UUID(int=1)), 'secret': 'ZmFrZS1zZWNyZXQ=', 'passphrase': 'fake'}
+        if path == '/order':
+            return 200, {'success': True, 'orderID': '0x' + uuid.uuid4().hex, 'status': 'matched', 'errorMsg': ''}
+        if path == '/orders':
+            orders = body if isinstance(body, list) else []
+            return 200, [{'success': True, 'orderID': '0x' + uuid.uuid4().hex, 'status': 'matched', 'errorMsg': ''}
+                         for _ in orders]
+        return 404, {'error': f'no route for {path}'}
+
+
+def start_all(cohere: Optional[LatencyProfile] = None, gamma: Optional[LatencyProfile] = None,
+              clob: Optional[LatencyProfile] = None, seed: int = 0) -> Dict[str, FakeUpstream]:
+    """Start one of each fake on a free port"""
+    return {
+        'cohere': FakeCohere(cohere or LatencyProfile(400, 1500), seed).start(),
+        'gamma': FakeGamma(gamma or LatencyProfile(150, 600), seed).start(),
+        'clob': FakeClob(clob or LatencyProfile(60, 250), seed).start()
+    }
+
+
+def environment_for(fakes: Dict[str, FakeUpstream]) -> Dict[str, str]:
+    """Environment variables that point the pipeline and backend at the fakes"""
+    return {
+        'COHERE_BASE_URL': fakes['cohere'].url,
+        'COHERE_API_KEY': 'fake-cohere-key',
+        'POLYMARKET_BASE_URL': fakes['gamma'].url,
+        'CLOB_HOST': fakes['clob'].url
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve fake Cohere, Gamma and CLOB APIs')
+    parser.add_argument('--cohere', default='400:1500', help='median[:p99] latency in ms')
+    parser.add_argument('--gamma', default='150:600', help='median[:p99] latency in ms')
+    parser.add_argument('--clob', default='60:250', help='median[:p99] latency in ms')
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    fakes = start_all(
+        LatencyProfile.parse(args.cohere, args.error_rate),
+        LatencyProfile.parse(args.gamma, args.error_rate),
+        LatencyProfile.parse(args.clob, args.error_rate),
+        args.seed
+    )
+    print("🧪 Fake upstreams running; export these before starting the backend:")
+    for key, value in environment_for(fakes).items():
+        print(f"   export {key}={value}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        for fake in fakes.values():
+            fake.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Open-loop load test for the trading backend
+
+Replays a JSONL tweet corpus ({"text", "author"} per line) against
+/api/analyze-tweet, mixed with /api/prices and /api/positions reads, at a
+series of target request rates. Arrivals are scheduled on a Poisson clock
+and sent whether or not earlier requests have finished, so a slow backend
+shows up as growing latency and errors instead of a politely slower client.
+
+A share of tweets (--duplicate-rate) repeats one that was already sent,
+the way a viral tweet gets opened by many users at once.
+
+For each rate step it reports achieved throughput, p50/p95/p99 latency,
+queueing delay (p50 above the lightest step's p50) and error rate, then
+the saturation point: the first step where throughput falls behind the
+offered rate, errors pass --max-error-rate, or p95 passes --max-p95-ms.
+
+Usage (from the backend directory, with the backend running; point it at
+testing/fake_upstreams.py to keep it offline):
+    python testing/load_test.py --rps 1,2,4,8,16 --duration 30
+        [--url http://127.0.0.1:5000] [--corpus testing/tweet_corpus.jsonl]
+        [--mix analyze=1,prices=2,positions=2] [--duplicate-rate 0.3]
+        [--user 0x...] [--output load_test.json]
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import time
+from typing import Any, Dict, List, Optional
+
+import aiohttp
+
+TESTING_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def load_corpus(path: str) -> List[Dict[str, str]]:
+    with open(path, encoding='utf-8') as f:
+        tweets = [json.loads(line) for line in f if line.strip()]
+    if not tweets:
+        raise SystemExit(f"❌ Corpus {path} is empty")
+    return tweets
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    mix = {}
+    for part in spec.split(','):
+        name, _, weight = part.partition('=')
+        if name.strip() not in ('analyze', 'prices', 'positions'):
+            raise SystemExit(f"❌ Unknown endpoint in --mix: {name}")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[max(0, math.ceil(q / 100 * len(sorted_values)) - 1)]
+
+
+class TweetPicker:
+    """Draws tweets from the corpus, repeating recent ones at duplicate_rate"""
+
+    def __init__(self, corpus: List[Dict[str, str]], duplicate_rate: float, rng: random.Random):
+        self.corpus = corpus
+        self.duplicate_rate = duplicate_rate
+        self.rng = rng
+        self.sent: List[Dict[str, str]] = []
+
+    def next(self) -> Dict[str, str]:
+        if self.sent and self.rng.random() < self.duplicate_rate:
+            # Recent tweets are the ones going viral
+            return self.rng.choice(self.sent[-10:])
+        tweet = self.rng.choice(self.corpus)
+        self.sent.append(tweet)
+        return tweet
+
+
+async def send(session: aiohttp.ClientSession, base_url: str, endpoint: str, tweet: Optional[Dict[str, str]],
+               user: Optional[str], timeout: float) -> Dict[str, Any]:
+    if endpoint == 'analyze':
+        method, url = 'POST', f'{base_url}/api/analyze-tweet'
+        kwargs = {'json': {'tweet_text': tweet['text'], 'author': tweet.get('author', 'LoadTest'), 'top_n': 5}}
+    elif endpoint == 'prices':
+        method, url, kwargs = 'GET', f'{base_url}/api/prices', {}
+    else:
+        method, url = 'GET', f'{base_url}/api/positions'
+        kwargs = {'params': {'user': user}} if user else {}
+
+    started = time.perf_counter()
+    try:
+        async with session.request(method, url, timeout=aiohttp.ClientTimeout(total=timeout), **kwargs) as response:
+            await response.read()
+            status = response.status
+        # A 404 from analyze-tweet means "no relevant markets", which is a real answer
+        error = None if status < 400 or (status == 404 and endpoint == 'analyze') else f'HTTP {status}'
+        if status == 429:
+            error = 'shed'  # Turned away by admission control with a Retry-After
+    except asyncio.TimeoutError:
+        status, error = None, 'timeout'
+    except aiohttp.ClientError as e:
+        status, error = None, type(e).__name__
+    finished = time.perf_counter()
+    return {'endpoint': endpoint, 'latency_ms': (finished - started) * 1000, 'finished': finished, 'status': status, 'error': error}
+
+
+async def run_step(base_url: str, rps: float, duration: float, mix: Dict[str, float], picker: TweetPicker,
+                   user: Optional[str], timeout: float, rng: random.Random) -> Dict[str, Any]:
+    """Offer rps for duration seconds; returns per-request samples plus send lag"""
+    endpoints, weights = list(mix), list(mix.values())
+    connector = aiohttp.TCPConnector(limit=0)  # No client-side cap: open loop
+    tasks = []
+    send_lags = []
+
+    async with aiohttp.ClientSession(connector=connector) as session:
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        scheduled = 0.0
+        while scheduled < duration:
+            delay = started + scheduled - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            send_lags.append(max(0.0, loop.time() - started - scheduled) * 1000)
+
+            endpoint = rng.choices(endpoints, weights)[0]
+            tweet = picker.next() if endpoint == 'analyze' else None
+            tasks.append(asyncio.ensure_future(send(session, base_url, endpoint, tweet, user, timeout)))
+            scheduled += rng.expovariate(rps)
+
+        samples = await asyncio.gather(*tasks)
+
+    return {'samples': samples, 'send_lags': send_lags}
+
+
+def summarize(rps: float, step: Dict[str, Any]) -> Dict[str, Any]:
+    samples = step['samples']
+    ok = sorted(sample['latency_ms'] for sample in samples if not sample['error'])
+    errors = [sample for sample in samples if sample['error']]
+    # Completion rate between the first and last success: a backend that keeps
+    # up finishes requests as fast as they arrive, a saturated one stretches out
+    finishes = sorted(sample['finished'] for sample in samples if not sample['error'])
+    span = finishes[-1] - finishes[0] if len(finishes) > 1 else 0.0
+    summary = {
+        'offered_rps': rps,
+        'sent': len(samples),
+        'achieved_rps': round((len(finishes) - 1) / span, 2) if span else 0.0,
+        'error_rate': round(len(errors) / len(samples), 4) if samples else 0.0,
+        'errors': {},
+        'p50_ms': round(percentile(ok, 50), 1),
+        'p95_ms': round(percentile(ok, 95), 1),
+        'p99_ms': round(percentile(ok, 99), 1),
+        'send_lag_p99_ms': round(percentile(sorted(step['send_lags']), 99), 1),
+        'endpoints': {}
+    }
+    for sample in errors:
+        summary['errors'][sample['error']] = summary['errors'].get(sample['error'], 0) + 1
+    for endpoint in sorted({sample['endpoint'] for sample in samples}):
+        rows = [sample for sample in samples if sample['endpoint'] == endpoint]
+        latencies = sorted(sample['latency_ms'] for sample in rows if not sample['error'])
+        summary['endpoints'][endpoint] = {
+            'sent': len(rows),
+            'error_rate': round(sum(1 for sample in rows if sample['error']) / len(rows), 4),
+            'p50_ms': round(percentile(latencies, 50), 1),
+            'p95_ms': round(percentile(latencies, 95), 1),
+            'p99_ms': round(percentile(latencies, 99), 1)
+        }
+    return summary
+
+
+def find_saturation(steps: List[Dict[str, Any]], max_error_rate: float, max_p95_ms: float) -> Dict[str, Any]:
+    for index, step in enumerate(steps):
+        reasons = []
+        if step['achieved_rps'] < 0.9 * step['offered_rps'] * (1 - step['error_rate']):
+            reasons.append('throughput below offered rate')
+        if step['error_rate'] > max_error_rate:
+            reasons.append(f"error rate {step['error_rate']:.1%}")
+        if step['p95_ms'] > max_p95_ms:
+            reasons.append(f"p95 {step['p95_ms']:.0f}ms")
+        if reasons:
+            return {
+                'saturated_at_rps': step['offered_rps'],
+                'last_healthy_rps': steps[index - 1]['offered_rps'] if index else None,
+                'reasons': reasons
+            }
+    return {'saturated_at_rps': None, 'last_healthy_rps': steps[-1]['offered_rps'] if steps else None, 'reasons': []}
+
+
+async def main_async(args) -> Dict[str, Any]:
+    rng = random.Random(args.seed)
+    picker = TweetPicker(load_corpus(args.corpus), args.duplicate_rate, rng)
+    mix = parse_mix(args.mix)
+    steps = []
+
+    for rps in [float(value) for value in args.rps.split(',')]:
+        print(f"🚦 Offering {rps:g} req/s for {args.duration:g}s...")
+        step = summarize(rps, await run_step(
+            args.url.rstrip('/'), rps, args.duration, mix, picker, args.user, args.timeout, rng
+        ))
+        step['queueing_delay_ms'] = round(max(0.0, step['p50_ms'] - (steps[0]['p50_ms'] if steps else step['p50_ms'])), 1)
+        steps.append(step)
+        print(f"   {step['achieved_rps']:.1f} req/s ok | p50 {step['p50_ms']:.0f}ms | p95 {step['p95_ms']:.0f}ms | "
+              f"p99 {step['p99_ms']:.0f}ms | queueing +{step['queueing_delay_ms']:.0f}ms | errors {step['error_rate']:.1%}")
+        if step['send_lag_p99_ms'] > 50:
+            print(f"   ⚠️ Load generator fell behind schedule (p99 send lag {step['send_lag_p99_ms']:.0f}ms)")
+        if args.pause:
+            await asyncio.sleep(args.pause)
+
+    return {
+        'url': args.url,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'config': {
+            'duration_s': args.duration,
+            'mix': mix,
+            'duplicate_rate': args.duplicate_rate,
+            'corpus': args.corpus,
+            'seed': args.seed
+        },
+        'steps': steps,
+        'saturation': find_saturation(steps, args.max_error_rate, args.max_p95_ms)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Open-loop load test for the trading backend')
+    parser.add_argument('--url', default='http://127.0.0.1:5000')
+    parser.add_argument('--rps', default='1,2,4,8,16', help='comma-separated target rates, one step each')
+    parser.add_argument('--duration', type=float, default=30, help='seconds per step')
+    parser.add_argument('--pause', type=float, default=5, help='seconds to let the backend drain between steps')
+    parser.add_argument('--corpus', default=os.path.join(TESTING_DIR, 'tweet_corpus.jsonl'))
+    parser.add_argument('--mix', default='analyze=1,prices=2,positions=2', help='relative endpoint weights')
+    parser.add_argument('--duplicate-rate', type=float, default=0.3, help='share of tweets repeating a recent one')
+    parser.add_argument('--user', help='wallet for /api/positions (default: the backend\'s funder)')
+    parser.add_argument('--timeout', type=float, default=60)
+    parser.add_argument('--max-error-rate', type=float, default=0.01)
+    parser.add_argument('--max-p95-ms', type=float, default=10000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='load_test.json')
+    args = parser.parse_args()
+
+    report = asyncio.run(main_async(args))
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    saturation = report['saturation']
+    if saturation['saturated_at_rps'] is None:
+        print(f"✅ No saturation up to {saturation['last_healthy_rps']:g} req/s")
+    else:
+        print(f"🔥 Saturated at {saturation['saturated_at_rps']:g} req/s ({', '.join(saturation['reasons'])}); "
+              f"last healthy step: {saturation['last_healthy_rps']} req/s")
+    print(f"💾 Results saved to: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
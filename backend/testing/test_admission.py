@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Admission control checks: priority order, shedding and degradation
+
+Drives AdmissionController from threads with tiny limits, so no backend or
+upstream is needed.
+
+Usage:
+    python testing/test_admission.py
+"""
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from admission import AdmissionController, AdmissionRejected, RequestClass
+
+
+def check(label, condition):
+    print(f"{'✅' if condition else '❌'} {label}")
+    return condition
+
+
+def make_controller():
+    return AdmissionController(2, [
+        RequestClass('trade', priority=0, max_concurrent=2, max_queue=4, queue_timeout=2),
+        RequestClass('prices', priority=1, max_concurrent=2, max_queue=4, queue_timeout=2),
+        RequestClass('analysis', priority=2, max_concurrent=1, max_queue=2, queue_timeout=0.2, degrade_depth=1)
+    ])
+
+
+def admit_in_thread(controller, name, order, tickets):
+    def run():
+        ticket = controller.admit(name)
+        order.append(name)
+        tickets.append(ticket)
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+def wait_for_waiters(controller, count):
+    deadline = time.monotonic() + 2
+    while sum(c.waiting for c in controller.classes.values()) < count and time.monotonic() < deadline:
+        time.sleep(0.005)
+
+
+def main():
+    print("🔍 Testing AdmissionController")
+    print("=" * 60)
+    results = []
+
+    # Pool full: queued trade beats a price read and an analysis that arrived first
+    controller = make_controller()
+    held = [controller.admit('prices'), controller.admit('prices')]
+    order, tickets = [], []
+    threads = [admit_in_thread(controller, 'analysis', order, tickets)]
+    wait_for_waiters(controller, 1)
+    threads.append(admit_in_thread(controller, 'prices', order, tickets))
+    wait_for_waiters(controller, 2)
+    threads.append(admit_in_thread(controller, 'trade', order, tickets))
+    wait_for_waiters(controller, 3)
+    controller.release(held.pop())
+    time.sleep(0.05)
+    results.append(check("Freed slot goes to the trade first", order == ['trade']))
+    controller.release(held.pop())
+    time.sleep(0.05)
+    results.append(check("Then to the price read", order == ['trade', 'prices']))
+    for ticket in list(tickets):
+        controller.release(ticket)
+    for thread in threads:
+        thread.join(2)
+    results.append(check("Analysis runs last", order == ['trade', 'prices', 'analysis']))
+
+    # Per-class cap: analysis can't take the slot trades still have
+    controller = make_controller()
+    analysis = controller.admit('analysis')
+    results.append(check("Trade admitted beside a running analysis", controller.admit('trade').waited < 0.05))
+    try:
+        controller.admit('analysis')
+        results.append(check("Second analysis over its cap times out", False))
+    except AdmissionRejected as e:
+        results.append(check("Second analysis over its cap times out", e.reason == 'queue timeout'))
+        results.append(check("Rejection carries a Retry-After", e.retry_after >= 1))
+    controller.release(analysis)
+
+    # Queue limit, and degradation with a queue behind
+    controller = make_controller()
+    controller.classes['analysis'].queue_timeout = 2
+    running = controller.admit('analysis')
+    order, tickets = [], []
+    threads = [admit_in_thread(controller, 'analysis', order, tickets)]
+    wait_for_waiters(controller, 1)
+    threads.append(admit_in_thread(controller, 'analysis', order, tickets))
+    wait_for_waiters(controller, 2)
+    try:
+        controller.admit('analysis')
+        results.append(check("Full queue sheds immediately", False))
+    except AdmissionRejected as e:
+        results.append(check("Full queue sheds immediately", e.reason == 'queue full'))
+    controller.release(running)
+    for thread in threads[:1]:
+        thread.join(0.2)
+    time.sleep(0.05)
+    results.append(check("Admitted with a queue behind it runs degraded", tickets and tickets[0].degraded))
+    controller.release(tickets[0])
+    threads[1].join(2)
+    results.append(check("Last in line runs at full cost", len(tickets) == 2 and not tickets[1].degraded))
+    controller.release(tickets[1])
+    results.append(check("Every slot returned", controller.running == 0))
+
+    print("=" * 60)
+    print(f"📊 {sum(results)}/{len(results)} checks passed")
+    return all(results)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Closed positions log and store checks against a fake data-api
+
+Pages through on-disk logs with real epoch timestamps and syncs a store
+from an in-memory data-api stand-in, so no network access is needed.
+
+Usage:
+    python testing/test_closed_positions.py
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from closed_positions import ClosedPositionsLog, ClosedPositionsStore
+
+USER = '0xAbCdEf0123456789aBcDeF0123456789AbCdEf01'
+NOW = 1760000000.123
+
+
+def closed_row(index, timestamp=None):
+    return {'asset': f'token-{index}', 'realizedPnl': 1.5, 'timestamp': NOW - index * 37 if timestamp is None else timestamp}
+
+
+class FakeResponse:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.rows
+
+
+class FakeDataApi:
+    """Serves closed-positions pages newest first, like data-api with sortBy=TIMESTAMP"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.requests = []
+        self.backfill_allowed = threading.Event()
+        self.backfill_allowed.set()
+
+    def get(self, url, params=None, timeout=None):
+        if params['offset']:
+            self.backfill_allowed.wait(5)
+        self.requests.append(params)
+        ordered = sorted(self.rows, key=lambda row: -row['timestamp'])
+        return FakeResponse(ordered[params['offset']:params['offset'] + params['limit']])
+
+
+def check(label, condition):
+    print(f"{'✅' if condition else '❌'} {label}")
+    return condition
+
+
+def wait_synced(store):
+    deadline = time.time() + 5
+    while store._syncing and time.time() < deadline:
+        time.sleep(0.01)
+
+
+def page_all(log, limit):
+    seen, cursor, pages = [], None, 0
+    while True:
+        rows, cursor = log.page(cursor, limit)
+        seen += [row['asset'] for row in rows]
+        pages += 1
+        if cursor is None or pages > 100:
+            return seen, pages
+
+
+def test_paging(directory):
+    log = ClosedPositionsLog(os.path.join(directory, 'paging.jsonl'))
+    log.append([closed_row(index) for index in range(10)])
+    seen, pages = page_all(log, 3)
+
+    results = [
+        check("Paging reaches every row of the log", seen == [f'token-{index}' for index in range(10)]),
+        check("Four pages of three for ten rows", pages == 4)
+    ]
+
+    log.append([closed_row(index, timestamp=NOW) for index in (10, 11)])
+    tied, _ = page_all(log, 1)
+    results.append(check("Rows sharing a timestamp page one at a time", sorted(tied) == sorted(f'token-{i}' for i in range(12))))
+
+    first, cursor = log.page(None, 5)
+    log.append([closed_row(12, timestamp=NOW + 60)])
+    rest = []
+    while cursor:
+        rows, cursor = log.page(cursor, 5)
+        rest += [row['asset'] for row in rows]
+    results += [
+        check("A close landing mid-paging doesn't shift later pages",
+              len(first) + len(rest) == 12 and 'token-12' not in rest),
+        check("Realized P&L totals every stored row", abs(log.realized_pnl - 13 * 1.5) < 1e-9)
+    ]
+
+    walked = []
+    for index, (_, _, row) in enumerate(log.iter_rows()):
+        walked.append(row['asset'])
+        if index == 2:
+            log.append([closed_row(13, timestamp=NOW + 120), closed_row(14, timestamp=NOW - 5)])
+    results += [
+        check("Rows appended mid-iteration don't repeat a row", len(walked) == len(set(walked))),
+        check("Older row appended mid-iteration still reached, newer one left for the next read",
+              'token-14' in walked and 'token-13' not in walked and len(walked) == 14)
+    ]
+
+    with open(log.path, 'ab') as f:
+        f.write(b'{"asset": "torn')
+    reloaded = ClosedPositionsLog(log.path)
+    results.append(check("Torn final write dropped on reload", len(reloaded) == 15 and page_all(reloaded, 50)[0][0] == 'token-13'))
+    return results
+
+
+def test_store(directory):
+    api = FakeDataApi([closed_row(index) for index in range(120)])
+    store = ClosedPositionsStore(directory, ttl=60, session=api, max_logs=2)
+
+    api.backfill_allowed.clear()
+    log = store.get(USER)
+    first_page = len(log)
+    api.backfill_allowed.set()
+    wait_synced(store)
+
+    results = [
+        check("First request waits for a single page", first_page == store.page_size),
+        check("History backfilled in the background", log.complete and len(log) == 120),
+        check("Address normalized for upstream and the file name",
+              api.requests[0]['user'] == USER.lower() and os.path.basename(log.path) == f'{USER.lower()}.jsonl'),
+        check("Case variants share one log", store.get(USER.lower()) is log)
+    ]
+
+    rejected = []
+    for user in ('0x-ab', '../etc/passwd', '', None, USER + '00'):
+        try:
+            store.get(user)
+        except ValueError:
+            rejected.append(user)
+    results.append(check("Anything but a 0x address rejected", len(rejected) == 5))
+
+    for filler in ('0x' + '1' * 40, '0x' + '2' * 40):
+        store.get(filler)
+    wait_synced(store)
+    results.append(check("Open logs bounded by max_logs", len(store._logs) <= 2 and USER.lower() not in store._logs))
+
+    restarted = ClosedPositionsStore(directory, ttl=60, session=FakeDataApi([]))
+    reloaded = restarted.get(USER)
+    results.append(check("History reloads from disk after a restart", len(reloaded) == 120 and reloaded.complete))
+    wait_synced(restarted)
+    return results
+
+
+def main():
+    print("🔍 Testing closed positions log and store")
+    print("=" * 60)
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        results += test_paging(directory)
+        results += test_store(directory)
+
+    print("=" * 60)
+    print(f"📊 {sum(results)}/{len(results)} checks passed")
+    return all(results)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
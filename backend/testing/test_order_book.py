@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Order book, order book cache and fill quote checks
+
+Feeds OrderBookCache with fake REST snapshots and market-channel events,
+so no CLOB access is needed, and quotes market buys against the result.
+
+Usage:
+    python testing/test_order_book.py
+"""
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from order_book import OrderBook, OrderBookCache, quote_market_buy
+
+SNAPSHOT = {
+    'bids': [{'price': '0.40', 'size': '100'}, {'price': '0.38', 'size': '50'}, {'price': '0.35', 'size': '0'}],
+    'asks': [{'price': '0.45', 'size': '10'}, {'price': '0.42', 'size': '20'}, {'price': '0.50', 'size': '100'}]
+}
+
+
+def check(label, condition):
+    print(f"{'✅' if condition else '❌'} {label}")
+    return condition
+
+
+def close(a, b):
+    return a is not None and b is not None and abs(a - b) < 1e-9
+
+
+def test_book():
+    book = OrderBook('yes-token')
+    book.apply_snapshot(SNAPSHOT['bids'], SNAPSHOT['asks'])
+    results = [
+        check("Asks sorted cheapest first", [price for price, _ in book.ask_levels()] == [0.42, 0.45, 0.50]),
+        check("Bids sorted highest first, empty levels dropped", book.bid_levels() == [(0.40, 100.0), (0.38, 50.0)]),
+        check("Best bid and ask", book.best_bid == 0.40 and book.best_ask == 0.42)
+    ]
+
+    before = book.ask_levels()
+    book.apply_change('SELL', 0.41, 5)
+    book.apply_change('SELL', 0.42, 0)
+    book.apply_change('BUY', 0.43, 7)
+    results += [
+        check("Deltas add and remove ask levels", book.ask_levels() == [(0.41, 5.0), (0.45, 10.0), (0.50, 100.0)]),
+        check("Bid delta moves the best bid", book.best_bid == 0.43),
+        check("Levels handed out earlier are left untouched", before == [(0.42, 20.0), (0.45, 10.0), (0.50, 100.0)])
+    ]
+    return results
+
+
+def test_quote():
+    book = OrderBook('yes-token')
+    book.apply_snapshot(SNAPSHOT['bids'], SNAPSHOT['asks'])
+
+    top = quote_market_buy(book, 4.2)
+    walked = quote_market_buy(book, 13.2)  # $8.40 at 0.42, then $4.50 at 0.45, $0.30 at 0.50
+    too_big = quote_market_buy(book, 100.0)
+    empty = quote_market_buy(OrderBook('empty-token'), 10.0)
+
+    return [
+        check("Order inside the top level fills at the best ask",
+              top['fillable'] and close(top['shares'], 10.0) and close(top['slippage'], 0.0)),
+        check("Walk crosses levels cheapest first", close(walked['shares'], 20 + 10 + 0.6)),
+        check("Worst price is the last level touched", walked['worst_price'] == 0.50),
+        check("Average price and slippage", close(walked['avg_price'], 13.2 / 30.6)
+              and close(walked['slippage_bps'], (13.2 / 30.6 - 0.42) / 0.42 * 10000)),
+        check("Payout is one dollar per share", close(walked['potential_profit'], 30.6 - 13.2)),
+        check("Order beyond visible depth is not fillable",
+              not too_big['fillable'] and close(too_big['unfilled_amount'], 100.0 - 8.4 - 4.5 - 50.0)),
+        check("Empty book quotes nothing", not empty['fillable'] and empty['best_ask'] is None and empty['avg_price'] is None)
+    ]
+
+
+def test_cache():
+    fetched = []
+    live = set()
+    changes = []
+    cache = OrderBookCache(
+        lambda token_id: fetched.append(token_id) or SNAPSHOT,
+        is_live=lambda token_id: token_id in live,
+        on_change=changes.append,
+        max_age=60,
+        max_books=2
+    )
+
+    first = cache.get('a')
+    again = cache.get('a')
+    results = [
+        check("First read fetches a snapshot", fetched == ['a'] and cache.misses == 1),
+        check("Fresh book served from the cache", again is first and cache.hits == 1)
+    ]
+
+    cache.max_age = 0
+    live.add('a')
+    cache.get('a')
+    live.discard('a')
+    cache.get('a')
+    results.append(check("Live books skip the age check, stale ones refetch", fetched == ['a', 'a']))
+
+    cache.on_event({'event_type': 'price_change', 'price_changes': [
+        {'asset_id': 'a', 'side': 'SELL', 'price': '0.41', 'size': '3'},
+        {'asset_id': 'unknown', 'side': 'SELL', 'price': '0.10', 'size': '3'}
+    ]})
+    results += [
+        check("Delta applied to the cached book", first.best_ask == 0.41),
+        check("Change reported with the new top of book", changes == [{'token_id': 'a', 'best_bid': 0.40, 'best_ask': 0.41}])
+    ]
+
+    cache.on_event({'event_type': 'price_change', 'asset_id': 'a', 'changes': [{'side': 'SELL', 'price': '0.41', 'size': '0'}]})
+    results.append(check("Legacy delta format applied", first.best_ask == 0.42))
+
+    cache.on_event({'event_type': 'book', 'asset_id': 'b', 'bids': [], 'asks': [{'price': '0.7', 'size': '1'}]})
+    cache.on_event({'event_type': 'book', 'asset_id': 'c', 'bids': [], 'asks': [{'price': '0.9', 'size': '1'}]})
+    cache.max_age = 60
+    cache.get('b')
+    cache.get('a')
+    results += [
+        check("Book events seed books without a fetch", 'b' not in fetched),
+        check("Least recently used book evicted past max_books", fetched[-1] == 'a' and len(fetched) == 3)
+    ]
+    return results
+
+
+def test_concurrent_quotes():
+    """Quotes on request threads while the market-channel thread applies deltas"""
+    cache = OrderBookCache(lambda token_id: SNAPSHOT, max_age=60)
+    book = cache.get('a')
+    errors = []
+    stop = threading.Event()
+
+    def feed():
+        step = 0
+        while not stop.is_set():
+            price = f"{0.46 + (step % 40) / 1000:.3f}"
+            cache.on_event({'event_type': 'price_change', 'price_changes': [
+                {'asset_id': 'a', 'side': 'SELL', 'price': price, 'size': str(step % 2)}
+            ]})
+            step += 1
+
+    def quote():
+        try:
+            for _ in range(3000):
+                result = quote_market_buy(book, 50.0)
+                levels = book.ask_levels()
+                if levels != sorted(levels) or result['best_ask'] != 0.42:
+                    errors.append('inconsistent book')
+                    return
+        except Exception as e:
+            errors.append(repr(e))
+
+    writer = threading.Thread(target=feed)
+    writer.start()
+    readers = [threading.Thread(target=quote) for _ in range(4)]
+    for reader in readers:
+        reader.start()
+    for reader in readers:
+        reader.join()
+    stop.set()
+    writer.join()
+
+    return [check("Quotes stay consistent while deltas land", not errors)]
+
+
+def main():
+    print("🔍 Testing the order book cache and fill quotes")
+    print("=" * 60)
+
+    results = []
+    for test in (test_book, test_quote, test_cache, test_concurrent_quotes):
+        results += test()
+
+    print("=" * 60)
+    print(f"📊 {sum(results)}/{len(results)} checks passed")
+    return all(results)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
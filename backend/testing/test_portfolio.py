@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Portfolio summary checks
+
+Checks the vectorized roll-ups in summarize() against hand-computed
+totals, live price overrides against the position book's marks, and the
+ETag-keyed PortfolioCache.
+
+Usage:
+    python testing/test_portfolio.py
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from portfolio import PortfolioCache, PositionArrays, UNTAGGED, summarize
+from position_book import PositionBook, mark_price
+
+POSITIONS = [
+    {'asset': 'fed-yes', 'size': 100.0, 'avgPrice': 0.40, 'initialValue': 40.0, 'curPrice': 0.50, 'currentValue': 50.0,
+     'eventSlug': 'fed-december', 'title': 'Fed cuts in December?', 'outcome': 'Yes', 'realizedPnl': 2.0},
+    {'asset': 'fed-no', 'size': 20.0, 'avgPrice': 0.55, 'initialValue': 11.0, 'curPrice': 0.50, 'currentValue': 10.0,
+     'eventSlug': 'fed-december', 'title': 'Fed cuts in December?', 'outcome': 'No'},
+    {'asset': 'btc-yes', 'size': 50.0, 'avgPrice': 0.20, 'initialValue': 10.0, 'curPrice': 0.30, 'currentValue': 15.0,
+     'eventSlug': 'btc-200k', 'title': 'Bitcoin above $200K?', 'outcome': 'Yes'}
+]
+TAGS = {'fed-yes': ['Economy', 'Fed'], 'fed-no': ['Economy', 'Fed'], 'btc-yes': ['Crypto']}
+
+
+def check(label, condition):
+    print(f"{'✅' if condition else '❌'} {label}")
+    return condition
+
+
+def close(a, b):
+    return abs(a - b) < 1e-9
+
+
+def test_summarize():
+    arrays = PositionArrays(POSITIONS, lambda asset: TAGS.get(asset, ()))
+    summary = summarize(arrays, closed_realized_pnl=5.0)
+    totals = summary['totals']
+    by_event = {group['name']: group for group in summary['by_event']}
+    by_tag = {group['name']: group for group in summary['by_tag']}
+
+    return [
+        check("Cost basis and market value totals", close(totals['cost_basis'], 61.0) and close(totals['market_value'], 75.0)),
+        check("Unrealized P&L and percent", close(totals['unrealized_pnl'], 14.0) and close(totals['unrealized_pnl_pct'], 14 / 61 * 100)),
+        check("Realized P&L includes closed positions", close(totals['realized_pnl'], 7.0) and close(totals['total_pnl'], 21.0)),
+        check("Max payout is one dollar per share", close(totals['max_payout'], 170.0)),
+        check("Events grouped, largest market value first",
+              [group['name'] for group in summary['by_event']] == ['fed-december', 'btc-200k']
+              and by_event['fed-december']['positions'] == 2 and close(by_event['fed-december']['market_value'], 60.0)),
+        check("Event groups carry their title", by_event['btc-200k']['title'] == 'Bitcoin above $200K?'),
+        check("A position counts toward every tag of its event",
+              close(by_tag['Economy']['market_value'], 60.0) and close(by_tag['Fed']['market_value'], 60.0)
+              and by_tag['Crypto']['positions'] == 1),
+        check("Outcomes grouped", {group['name'] for group in summary['by_outcome']} == {'Yes', 'No'}),
+        check("Untagged positions fall into one bucket",
+              [group['name'] for group in summarize(PositionArrays(POSITIONS))['by_tag']] == [UNTAGGED]),
+        check("Empty portfolio summarizes to zeros", summarize(PositionArrays([]))['totals']['market_value'] == 0.0)
+    ]
+
+
+def test_live_prices():
+    arrays = PositionArrays(POSITIONS)
+    update = {'token_id': 'fed-yes', 'best_bid': 0.58, 'best_ask': 0.62, 'price': 0.62}
+    summary = summarize(arrays, prices={'fed-yes': mark_price(update), 'unknown': 0.9})
+
+    book = PositionBook('0xtest')
+    book.load([dict(position) for position in POSITIONS], etag='v1')
+    book.apply_prices([update])
+
+    return [
+        check("Live prices marked at mid", close(summary['totals']['market_value'], 60.0 + 10.0 + 15.0)),
+        check("Summary matches the position stream's P&L",
+              close(summary['totals']['unrealized_pnl'], book.totals()['unrealized_pnl'])),
+        check("Override leaves the cached arrays untouched", close(arrays.cur_price[0], 0.50)),
+        check("One-sided book marks at the hub's price", mark_price({'best_ask': 0.7, 'price': 0.7}) == 0.7)
+    ]
+
+
+def test_cache():
+    cache = PortfolioCache(lambda asset: TAGS.get(asset, ()), max_users=2)
+    first = cache.get('0xa', 'v1', POSITIONS)
+    results = [
+        check("Same ETag reuses the arrays", cache.get('0xa', 'v1', []) is first),
+        check("New ETag rebuilds", len(cache.get('0xa', 'v2', POSITIONS[:1])) == 1),
+        check("No ETag always rebuilds", cache.get('0xb', None, POSITIONS) is not cache.get('0xb', None, POSITIONS))
+    ]
+    cache.get('0xa', 'v2', [])
+    cache.get('0xc', 'v1', POSITIONS)
+    results.append(check("Least recently used user evicted past max_users", list(cache._arrays) == ['0xa', '0xc']))
+    return results
+
+
+def main():
+    print("🔍 Testing the portfolio summary")
+    print("=" * 60)
+
+    results = []
+    for test in (test_summarize, test_live_prices, test_cache):
+        results += test()
+
+    print("=" * 60)
+    print(f"📊 {sum(results)}/{len(results)} checks passed")
+    return all(results)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Incremental position book checks against a fake price feed
+
+Drives PositionBook through a PriceHub backed by LocalMarketFeed, so no
+websocket or data-api access is needed.
+
+Usage:
+    python testing/test_position_book.py
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from position_book import PositionBook
+from price_hub import LocalMarketFeed, PriceHub
+
+POSITIONS = [
+    {'asset': 'yes-token', 'size': 100.0, 'avgPrice': 0.40, 'initialValue': 40.0, 'curPrice': 0.50, 'currentValue': 50.0, 'cashPnl': 10.0},
+    {'asset': 'no-token', 'size': 50.0, 'avgPrice': 0.20, 'initialValue': 10.0, 'curPrice': 0.20, 'currentValue': 10.0, 'cashPnl': 0.0}
+]
+
+
+def check(label, condition):
+    print(f"{'✅' if condition else '❌'} {label}")
+    return condition
+
+
+def main():
+    print("🔍 Testing PositionBook with a fake price feed")
+    print("=" * 60)
+
+    feed = LocalMarketFeed()
+    hub = PriceHub(feed, max_rate_hz=1000)
+    book = PositionBook('0xtest')
+    book.load([dict(p) for p in POSITIONS], etag='v1')
+    subscription = hub.subscribe(book.token_ids())
+
+    results = [
+        check("Held tokens are subscribed upstream", feed.subscribed == {'yes-token', 'no-token'}),
+        check("Reloading the same etag is a no-op", not book.load(POSITIONS, etag='v1'))
+    ]
+
+    feed.publish_price('yes-token', best_bid=0.59, best_ask=0.61)
+    changed = book.apply_prices(subscription.next_batch(timeout=1))
+    yes_row = book.get_rows(['yes-token'])[0]
+    results += [
+        check("Only the moved position changed", [row['asset'] for row in changed] == ['yes-token']),
+        check("Marked at the mid price", abs(yes_row['curPrice'] - 0.60) < 1e-9),
+        check("Cash P&L recomputed", abs(yes_row['cashPnl'] - 20.0) < 1e-9),
+        check("Untouched row is the original object", book.get_rows(['no-token'])[0] is book.rows['no-token']),
+        check("Totals adjusted incrementally", abs(book.totals()['market_value'] - 70.0) < 1e-9)
+    ]
+
+    feed.publish_price('yes-token', best_bid=0.59, best_ask=0.61)
+    repeat = subscription.next_batch(timeout=1)
+    results.append(check("Same price produces no changed rows", book.apply_prices(repeat) == []))
+
+    results.append(check(
+        "Prices for tokens not held are ignored",
+        book.apply_prices([{'token_id': 'other-token', 'price': 0.9}]) == []
+    ))
+
+    subscription.close()
+    results.append(check("Upstream subscription released on close", feed.subscribed == set()))
+
+    print("=" * 60)
+    print(f"📊 {sum(results)}/{len(results)} checks passed")
+    return all(results)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
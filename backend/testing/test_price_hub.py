@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+PriceHub checks against a fake price feed
+
+Covers upstream reference counting, per-subscription rate limiting and
+coalescing, and the close paths, using LocalMarketFeed so no websocket
+access is needed.
+
+Usage:
+    python testing/test_price_hub.py
+"""
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from price_hub import MIN_RATE_HZ, LocalMarketFeed, PriceHub, price_updates_from_event
+
+
+def check(label, condition):
+    print(f"{'✅' if condition else '❌'} {label}")
+    return condition
+
+
+def test_refcounting():
+    feed = LocalMarketFeed()
+    hub = PriceHub(feed, max_rate_hz=1000)
+    first = hub.subscribe(['yes-token', 'no-token', 'yes-token'])
+    second = hub.subscribe(['yes-token'])
+
+    results = [
+        check("Duplicate tokens in one subscription count once", hub.active_tokens() == {'yes-token': 2, 'no-token': 1}),
+        check("One upstream subscription per token", feed.subscribed == {'yes-token', 'no-token'})
+    ]
+
+    first.close()
+    results += [
+        check("Token still watched by another client stays subscribed", feed.subscribed == {'yes-token'}),
+        check("Refcount dropped to the remaining client", hub.active_tokens() == {'yes-token': 1})
+    ]
+
+    first.close()
+    results.append(check("Closing twice does not release twice", hub.active_tokens() == {'yes-token': 1}))
+
+    second.close()
+    results += [
+        check("Last client leaving unsubscribes upstream", feed.subscribed == set()),
+        check("No tokens left active", hub.active_tokens() == {} and not hub.is_active('yes-token')),
+        check("Latest price dropped with the token", hub.latest('yes-token') is None)
+    ]
+    return results
+
+
+def test_fan_out():
+    feed = LocalMarketFeed()
+    hub = PriceHub(feed, max_rate_hz=1000)
+    first = hub.subscribe(['yes-token'])
+    feed.publish_price('yes-token', best_bid=0.40, best_ask=0.42)
+    batch = first.next_batch(timeout=1)
+
+    late = hub.subscribe(['yes-token'])
+    replayed = late.next_batch(timeout=1)
+    feed.publish_price('other-token', best_bid=0.1, best_ask=0.2)
+
+    results = [
+        check("Update delivered to the watcher", len(batch) == 1 and batch[0]['best_ask'] == 0.42),
+        check("Price is the best ask", batch[0]['price'] == 0.42),
+        check("Late subscriber gets the latest price at once", len(replayed) == 1 and replayed[0]['best_bid'] == 0.40),
+        check("Tokens nobody watches are not tracked", hub.latest('other-token') is None),
+        check("Nothing pending for unwatched tokens", first.next_batch(timeout=0.05) == [])
+    ]
+
+    feed.publish({'event_type': 'last_trade_price', 'asset_id': 'yes-token', 'price': '0.41'})
+    merged = hub.latest('yes-token')
+    results.append(check("Partial updates merge into the latest price",
+                         merged['last_trade'] == 0.41 and merged['best_ask'] == 0.42))
+
+    first.close()
+    late.close()
+    return results
+
+
+def test_rate_limit():
+    feed = LocalMarketFeed()
+    hub = PriceHub(feed, max_rate_hz=10)
+    subscription = hub.subscribe(['yes-token', 'no-token'], max_rate_hz=100)
+
+    results = [check("Client rate is capped at the hub's", abs(subscription.min_interval - 0.1) < 1e-9)]
+
+    feed.publish_price('yes-token', best_ask=0.50)
+    first = subscription.next_batch(timeout=1)
+    started = time.monotonic()
+    feed.publish_price('yes-token', best_ask=0.51)
+    feed.publish_price('yes-token', best_ask=0.52)
+    feed.publish_price('no-token', best_ask=0.30)
+    second = subscription.next_batch(timeout=1)
+    elapsed = time.monotonic() - started
+
+    prices = {price['token_id']: price['best_ask'] for price in second}
+    results += [
+        check("First batch delivered", len(first) == 1),
+        check("Reads are spaced by the minimum interval", elapsed >= 0.09),
+        check("Updates between reads coalesce per token", prices == {'yes-token': 0.52, 'no-token': 0.30})
+    ]
+    subscription.close()
+
+    intervals = {}
+    for label, requested in (('negative', -5.0), ('zero', 0.0), ('nan', float('nan')), ('tiny', 1e-300), ('slower', 2.0)):
+        clamped = hub.subscribe(['yes-token'], max_rate_hz=requested)
+        intervals[label] = clamped.min_interval
+        clamped.close()
+    results += [
+        check("Non-positive or NaN rates get the hub's rate",
+              all(abs(intervals[label] - 0.1) < 1e-9 for label in ('negative', 'zero', 'nan'))),
+        check("Tiny rates floored at MIN_RATE_HZ", abs(intervals['tiny'] - 1 / MIN_RATE_HZ) < 1e-9),
+        check("Slower client rate kept", abs(intervals['slower'] - 0.5) < 1e-9)
+    ]
+
+    slow = hub.subscribe(['yes-token'], max_rate_hz=1e-300)
+    feed.publish_price('yes-token', best_ask=0.60)
+    slow.next_batch(timeout=0.05)
+    feed.publish_price('yes-token', best_ask=0.61)
+    started = time.monotonic()
+    try:
+        waited = slow.next_batch(timeout=0.05)
+        results.append(check("Rate-limited read still returns at its timeout",
+                             waited == [] and time.monotonic() - started < 1))
+    except OverflowError:
+        results.append(check("Rate-limited read still returns at its timeout", False))
+    slow.close()
+    return results
+
+
+def test_close_wakes_reader():
+    feed = LocalMarketFeed()
+    hub = PriceHub(feed, max_rate_hz=1000)
+    subscription = hub.subscribe(['yes-token'])
+    batches = []
+    reader = threading.Thread(target=lambda: batches.append(subscription.next_batch()))
+    reader.start()
+    time.sleep(0.05)
+    with subscription:
+        pass
+    reader.join(timeout=1)
+
+    return [
+        check("Blocked reader returns on close", not reader.is_alive() and batches == [[]]),
+        check("Context manager releases upstream", feed.subscribed == set()),
+        check("Read after close returns nothing", subscription.next_batch(timeout=0.05) == [])
+    ]
+
+
+def test_event_parsing():
+    book = price_updates_from_event({
+        'event_type': 'book', 'asset_id': 'yes-token',
+        'bids': [{'price': '0.40', 'size': '10'}, {'price': '0.45', 'size': '0'}],
+        'asks': [{'price': '0.48', 'size': '5'}, {'price': '0.47', 'size': '3'}]
+    })
+    changes = price_updates_from_event({
+        'event_type': 'price_change',
+        'price_changes': [{'asset_id': 'yes-token', 'best_bid': '0.41', 'best_ask': '0.46'},
+                          {'asset_id': 'no-token', 'price': '0.5'}]
+    })
+    return [
+        check("Book snapshot skips empty levels", book == [{'token_id': 'yes-token', 'best_bid': 0.40, 'best_ask': 0.47}]),
+        check("Price changes without top of book are dropped",
+              changes == [{'token_id': 'yes-token', 'best_bid': 0.41, 'best_ask': 0.46}]),
+        check("Unknown events produce no updates", price_updates_from_event({'event_type': 'tick_size_change'}) == [])
+    ]
+
+
+def main():
+    print("🔍 Testing PriceHub with a fake price feed")
+    print("=" * 60)
+
+    results = []
+    for test in (test_refcounting, test_fan_out, test_rate_limit, test_close_wakes_reader, test_event_parsing):
+        results += test()
+
+    print("=" * 60)
+    print(f"📊 {sum(results)}/{len(results)} checks passed")
+    return all(results)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
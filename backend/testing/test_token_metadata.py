@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Token metadata cache checks against a fake metadata fetch
+
+Covers LRU eviction past max_entries and warming from Gamma events
+without losing fields resolved since (e.g. the fee rate), with no
+network access.
+
+Usage:
+    python testing/test_token_metadata.py
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from token_metadata import TokenMetadata, TokenMetadataCache
+
+
+def check(label, condition):
+    print(f"{'✅' if condition else '❌'} {label}")
+    return condition
+
+
+def fake_fetch(token_id):
+    fake_fetch.calls.append(token_id)
+    return TokenMetadata(token_id=token_id, tick_size='0.01', neg_risk=False)
+
+
+fake_fetch.calls = []
+
+
+def test_eviction():
+    fake_fetch.calls.clear()
+    cache = TokenMetadataCache(fake_fetch, max_entries=2)
+    cache.get('token-a')
+    cache.get('token-b')
+    cache.get('token-a')
+    cache.get('token-c')
+
+    results = [
+        check("Cache holds at most max_entries tokens", len(cache) == 2),
+        check("Least recently used token evicted", cache.peek('token-b') is None),
+        check("Recently read token kept", cache.peek('token-a') is not None)
+    ]
+
+    cache.get('token-b')
+    results.append(check("Evicted token fetched again on next read", fake_fetch.calls.count('token-b') == 2))
+    return results
+
+
+def test_warm_keeps_resolved_fields():
+    cache = TokenMetadataCache(fake_fetch)
+    event = {
+        'id': 'event-1', 'tags': [{'label': 'Politics'}],
+        'markets': [{'id': 'market-1', 'orderPriceMinTickSize': 0.001,
+                     'clobTokenIds': '["yes-token", "no-token"]', 'negRisk': True}]
+    }
+    cache.warm_from_events([event])
+    cache.update('yes-token', fee_rate_bps=200)
+
+    event['markets'][0]['orderPriceMinTickSize'] = 0.01
+    warmed = cache.warm_from_events([event])
+    entry = cache.peek('yes-token')
+
+    return [
+        check("Every token warmed", warmed == 2 and len(cache) == 2),
+        check("Re-warming keeps the resolved fee rate", entry.fee_rate_bps == 200),
+        check("Re-warming refreshes the tick size", entry.tick_size == '0.01'),
+        check("Gamma fields filled in", entry.neg_risk and entry.outcome == 'Yes' and entry.tags == ['Politics']),
+        check("New tokens start without a fee rate", cache.peek('no-token').fee_rate_bps is None)
+    ]
+
+
+def main():
+    print("🔍 Testing the token metadata cache")
+    print("=" * 60)
+
+    results = []
+    for test in (test_eviction, test_warm_keeps_resolved_fields):
+        results += test()
+
+    print("=" * 60)
+    print(f"📊 {sum(results)}/{len(results)} checks passed")
+    return all(results)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Trade request validation checks
+
+Sends malformed trade legs to parse_leg and to /api/trade and /api/trades,
+and malformed amounts to /api/quote, through Flask's test client. Every case is rejected before signing, so no
+CLOB access or credentials are needed.
+
+Usage:
+    python testing/test_trade_requests.py
+"""
+import os
+import sys
+
+os.environ.setdefault('PRICE_FEED', 'local')
+os.environ.setdefault('LLM_PROVIDER', 'local')
+os.environ.setdefault('LOG_LEVEL', 'CRITICAL')
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import trading_backend
+from trading_backend import parse_leg
+
+LEG = {'side': 'YES', 'amount': 5, 'yes_token_id': 'yes-token', 'no_token_id': 'no-token'}
+
+
+def check(label, condition):
+    print(f"{'✅' if condition else '❌'} {label}")
+    return condition
+
+
+def rejected(leg):
+    try:
+        parse_leg(leg)
+    except ValueError:
+        return True
+    return False
+
+
+def test_parse_leg():
+    return [
+        check("Valid leg parsed", parse_leg(LEG) == ('YES', 5.0, 'yes-token')),
+        check("NO side picks the NO token", parse_leg(dict(LEG, side='NO'))[2] == 'no-token'),
+        check("Non-object leg rejected", rejected(['YES', 5])),
+        check("Missing or non-numeric amount rejected", rejected(dict(LEG, amount=None)) and rejected(dict(LEG, amount='five'))),
+        check("Zero and negative amounts rejected", rejected(dict(LEG, amount=0)) and rejected(dict(LEG, amount=-1))),
+        check("NaN and infinite amounts rejected",
+              all(rejected(dict(LEG, amount=value)) for value in ('nan', 'NaN', float('nan'), 'inf', float('-inf'), '1e400'))),
+        check("Unknown side rejected", rejected(dict(LEG, side='MAYBE'))),
+        check("Missing token ids rejected", rejected(dict(LEG, no_token_id=None)))
+    ]
+
+
+def test_endpoints():
+    client = trading_backend.app.test_client()
+    headers = {'Content-Type': 'application/json'}
+    # Python's json (and Flask's parser) accept these bare literals
+    nan_trade = client.post('/api/trade', data='{"side": "YES", "amount": NaN, "yes_token_id": "y", "no_token_id": "n"}',
+                            headers=headers)
+    inf_batch = client.post('/api/trades', data='{"legs": [{"side": "YES", "amount": Infinity, "yes_token_id": "y", '
+                            '"no_token_id": "n"}]}', headers=headers)
+    return [
+        check("/api/trade rejects a NaN amount with 400", nan_trade.status_code == 400),
+        check("Rejected amount echoed as valid JSON", b'NaN' not in nan_trade.data and nan_trade.get_json()['amount'] == 'nan'),
+        check("/api/trades rejects an infinite amount with 400", inf_batch.status_code == 400),
+        check("/api/trade rejects a non-object body with 400",
+              client.post('/api/trade', json=[LEG]).status_code == 400),
+        check("/api/quote rejects NaN and infinite amounts with 400",
+              all(client.get(f'/api/quote?token_id=yes-token&amount={value}').status_code == 400
+                  for value in ('nan', 'inf', '-inf', '0')))
+    ]
+
+
+def main():
+    print("🔍 Testing trade request validation")
+    print("=" * 60)
+
+    results = []
+    for test in (test_parse_leg, test_endpoints):
+        results += test()
+
+    print("=" * 60)
+    print(f"📊 {sum(results)}/{len(results)} checks passed")
+    return all(results)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
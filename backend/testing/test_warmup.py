@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Background warmup checks
+
+Runs warmup steps that fail a few times before succeeding and checks that
+required steps are retried until the server is ready, while optional
+failures are left alone.
+
+Usage:
+    python testing/test_warmup.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from warmup import Warmup
+
+
+def check(label, condition):
+    print(f"{'✅' if condition else '❌'} {label}")
+    return condition
+
+
+def flaky(failures):
+    """Step that raises `failures` times, then succeeds"""
+    calls = []
+
+    def step():
+        calls.append(time.monotonic())
+        if len(calls) <= failures:
+            raise ConnectionError('CLOB unreachable')
+    step.calls = calls
+    return step
+
+
+def wait_finished(warmup, timeout=5):
+    deadline = time.time() + timeout
+    while warmup.finished_at is None and time.time() < deadline:
+        time.sleep(0.01)
+
+
+def test_retries():
+    credentials = flaky(3)
+    cache = flaky(10)
+    warmup = Warmup(retry_delay=0.02, max_retry_delay=0.05)
+    warmup.add_step('clob_credentials', credentials)
+    warmup.add_step('token_metadata', cache, required=False)
+    warmup.add_step('tweet_pipeline', lambda: None)
+    warmup.start()
+    wait_finished(warmup)
+    status = warmup.status()
+    gaps = [b - a for a, b in zip(credentials.calls, credentials.calls[1:])]
+
+    return [
+        check("Required step retried until it succeeds", warmup.ready and len(credentials.calls) == 4),
+        check("Retries back off", gaps[-1] >= gaps[0] and gaps[0] >= 0.015),
+        check("Attempts and cleared error reported",
+              status['steps']['clob_credentials']['attempts'] == 4 and status['steps']['clob_credentials']['error'] is None),
+        check("Optional step not retried", len(cache.calls) == 1 and status['steps']['token_metadata']['status'] == 'failed'),
+        check("Steps after a failure still run first time round", status['steps']['tweet_pipeline']['attempts'] == 1),
+        check("Finished with full progress", status['finished'] and status['progress'] == 1.0)
+    ]
+
+
+def test_not_ready_while_retrying():
+    warmup = Warmup(retry_delay=0.5)
+    warmup.add_step('clob_connection', flaky(1))
+    warmup.start()
+    time.sleep(0.1)
+    status = warmup.status()
+    results = [
+        check("Not ready while a required step waits to retry", not warmup.ready and not status['finished']),
+        check("Failed required step doesn't count as progress", status['progress'] == 0.0)
+    ]
+    wait_finished(warmup)
+    results.append(check("Ready after the retry", warmup.ready))
+    return results
+
+
+def main():
+    print("🔍 Testing background warmup")
+    print("=" * 60)
+
+    results = []
+    for test in (test_retries, test_not_ready_while_retrying):
+        results += test()
+
+    print("=" * 60)
+    print(f"📊 {sum(results)}/{len(results)} checks passed")
+    return all(results)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Token Metadata Cache
+Per-token order-signing metadata (tick size, neg-risk flag) so market
+orders can be signed without network lookups
+"""
+import json
+import math
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field, replace
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+
+@dataclass
+class TokenMetadata:
+    """Everything needed to sign an order for one CLOB token"""
+    token_id: str
+    tick_size: str
+    neg_risk: bool
+    market_id: Optional[str] = None
+    event_id: Optional[str] = None
+    outcome: Optional[str] = None
+    tags: List[str] = field(default_factory=list)
+    fee_rate_bps: Optional[int] = None  # None until resolved
+    cached_at: float = field(default_factory=time.time)
+    tick_checked_at: float = field(default_factory=time.time)
+
+
+def normalize_tick_size(value: Any) -> str:
+    """Gamma reports tick sizes as floats (0.001); the CLOB client wants '0.001'"""
+    return f"{float(value):g}"
+
+
+def buy_limit_price(price: float, tick_size: str) -> float:
+    """
+    Round a market BUY's limit price up onto the tick grid and check it is
+    tradeable, as ClobClient.create_market_order does before signing
+    """
+    tick = float(tick_size)
+    rounded = round(math.ceil(round(price / tick, 6)) * tick, 6)
+    if rounded < tick or rounded > 1 - tick:
+        raise ValueError(f"price ({rounded}), min: {tick_size} - max: {1 - tick:g}")
+    return rounded
+
+
+class TokenMetadataCache:
+    """
+    Token id -> TokenMetadata
+
+    Warmed from Gamma event payloads (which already carry
+    orderPriceMinTickSize and negRisk) as events are served, and filled
+    lazily through `fetch` for tokens that were never seen.
+
+    Tick sizes change as a market's price nears 0 or 1, so they are held
+    for only tick_size_ttl seconds: after that the tick size alone is
+    refetched through `fetch_tick_size`, and tick_size_change events from
+    the market channel update it in between. Least recently used tokens
+    are dropped past max_entries.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[str], TokenMetadata],
+        ttl: float = 3600.0,
+        fetch_tick_size: Optional[Callable[[str], str]] = None,
+        tick_size_ttl: float = 30.0,
+        max_entries: int = 20000
+    ):
+        self.fetch = fetch
+        self.ttl = ttl
+        self.fetch_tick_size = fetch_tick_size
+        self.tick_size_ttl = tick_size_ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: 'OrderedDict[str, TokenMetadata]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token_id: str) -> TokenMetadata:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(token_id)
+            fresh = entry is not None and now - entry.cached_at <= self.ttl
+            if fresh and (self.fetch_tick_size is None or now - entry.tick_checked_at <= self.tick_size_ttl):
+                self.hits += 1
+                self._entries.move_to_end(token_id)
+                return entry
+            self.misses += 1
+
+        if fresh:
+            entry = replace(entry, tick_size=normalize_tick_size(self.fetch_tick_size(token_id)), tick_checked_at=time.time())
+        else:
+            entry = self.fetch(token_id)
+        self.put(entry)
+        return entry
+
+    def update(self, token_id: str, **fields: Any) -> None:
+        """Change fields of a cached entry (no-op if the token was never seen)"""
+        with self._lock:
+            entry = self._entries.get(token_id)
+            if entry is not None:
+                self._entries[token_id] = replace(entry, **fields)
+
+    def on_event(self, event: Dict[str, Any]) -> None:
+        """Market-channel listener: pick up tick size changes as they happen"""
+        if event.get('event_type') == 'tick_size_change' and event.get('asset_id') and event.get('new_tick_size'):
+            self.update(event['asset_id'], tick_size=normalize_tick_size(event['new_tick_size']),
+                        tick_checked_at=time.time())
+
+    def peek(self, token_id: str) -> Optional[TokenMetadata]:
+        """Cached entry without fetching (None if never seen)"""
+        with self._lock:
+            entry = self._entries.get(token_id)
+            if entry is not None:
+                self._entries.move_to_end(token_id)
+            return entry
+
+    def put(self, entry: TokenMetadata) -> None:
+        with self._lock:
+            self._store(entry)
+
+    def _store(self, entry: TokenMetadata) -> None:
+        self._entries[entry.token_id] = entry
+        self._entries.move_to_end(entry.token_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _refresh(self, token_id: str, **fields: Any) -> None:
+        """Overwrite fields of a token's entry, keeping the rest (e.g. a resolved fee rate); create it if new"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(token_id)
+            if entry is None:
+                entry = TokenMetadata(token_id=token_id, cached_at=now, tick_checked_at=now, **fields)
+            else:
+                entry = replace(entry, cached_at=now, tick_checked_at=now, **fields)
+            self._store(entry)
+
+    def warm_from_events(self, events: Iterable[Dict[str, Any]]) -> int:
+        """Cache metadata for every token in a list of Gamma events; returns tokens cached"""
+        count = 0
+        for event in events:
+            tags = [tag.get('label', '') for tag in event.get('tags', []) or [] if isinstance(tag, dict)]
+            for market in event.get('markets', []) or []:
+                tick_size = market.get('orderPriceMinTickSize')
+                token_ids = market.get('clobTokenIds')
+                if tick_size is None or not token_ids:
+                    continue
+                try:
+                    if isinstance(token_ids, str):
+                        token_ids = json.loads(token_ids)
+                    outcomes = market.get('outcomes', '["Yes", "No"]')
+                    if isinstance(outcomes, str):
+                        outcomes = json.loads(outcomes)
+                except ValueError:
+                    continue
+
+                neg_risk = bool(market.get('negRisk', event.get('negRisk', False)))
+                for index, token_id in enumerate(token_ids):
+                    self._refresh(
+                        token_id,
+                        tick_size=normalize_tick_size(tick_size),
+                        neg_risk=neg_risk,
+                        market_id=market.get('id'),
+                        event_id=event.get('id'),
+                        outcome=outcomes[index] if index < len(outcomes) else None,
+                        tags=tags
+                    )
+                    count += 1
+        return count
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Trade Submitter
+Queues trades behind client idempotency keys and posts them from a
+dedicated worker thread, so request threads never block on post_order
+"""
+import logging
+import queue
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = ('posted', 'partial', 'failed')
+
+
+class OrderHandle:
+    """Server-side record of one submitted trade (one or more legs)"""
+
+    def __init__(self, legs: List[Dict[str, Any]], idempotency_key: Optional[str] = None):
+        self.id = uuid.uuid4().hex
+        self.idempotency_key = idempotency_key
+        self.legs = legs
+        self.status = 'queued'
+        self.results: List[Dict[str, Any]] = []
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.updated_at = self.created_at
+        self._done = threading.Event()
+
+    @property
+    def done(self) -> bool:
+        return self.status in TERMINAL_STATUSES
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the handle reaches a terminal status; False on timeout"""
+        return self._done.wait(timeout)
+
+    def finish(self, results: List[Dict[str, Any]], error: Optional[str] = None) -> None:
+        self.results = results
+        self.error = error
+        succeeded = sum(1 for result in results if result.get('success'))
+        if succeeded == len(self.legs) and not error:
+            self.status = 'posted'
+        elif succeeded:
+            self.status = 'partial'
+        else:
+            self.status = 'failed'
+        self.updated_at = time.time()
+        self._done.set()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'order_handle': self.id,
+            'idempotency_key': self.idempotency_key,
+            'status': self.status,
+            'done': self.done,
+            'results': self.results,
+            'error': self.error,
+            'created_at': self.created_at,
+            'updated_at': self.updated_at
+        }
+
+
+class TradeSubmitter:
+    """
+    Single worker that signs and posts queued trades
+
+    Whatever is queued when the worker wakes up is drained into one
+    batched post (up to max_batch_legs legs), so throughput grows with
+    load instead of being bound to one post per request thread. A repeated
+    idempotency key returns the original handle instead of trading twice.
+    If a combined batch raises, each handle is retried on its own, so one
+    client's bad leg can't fail another client's trade.
+    """
+
+    def __init__(
+        self,
+        execute_legs: Callable[[List[Dict[str, Any]]], List[Dict[str, Any]]],
+        max_batch_legs: int = 15,
+        handle_ttl: float = 3600.0
+    ):
+        self.execute_legs = execute_legs
+        self.max_batch_legs = max_batch_legs
+        self.handle_ttl = handle_ttl
+        self._queue: 'queue.Queue[OrderHandle]' = queue.Queue()
+        self._handles: Dict[str, OrderHandle] = {}
+        self._by_key: Dict[str, OrderHandle] = {}
+        self._lock = threading.Lock()
+        self._worker: Optional[threading.Thread] = None
+        self._carry: Optional[OrderHandle] = None
+
+    def submit(self, legs: List[Dict[str, Any]], idempotency_key: Optional[str] = None) -> Tuple[OrderHandle, bool]:
+        """
+        Queue legs for posting
+
+        Returns (handle, created); created is False when the idempotency key
+        was already used and the existing handle is returned instead.
+        """
+        with self._lock:
+            self._evict_expired()
+            if idempotency_key and idempotency_key in self._by_key:
+                return self._by_key[idempotency_key], False
+
+            handle = OrderHandle(legs, idempotency_key)
+            self._handles[handle.id] = handle
+            if idempotency_key:
+                self._by_key[idempotency_key] = handle
+            self._ensure_worker()
+
+        self._queue.put(handle)
+        return handle, True
+
+    def get(self, handle_id: str) -> Optional[OrderHandle]:
+        with self._lock:
+            return self._handles.get(handle_id)
+
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def _ensure_worker(self) -> None:
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._run, name='trade-submitter', daemon=True)
+            self._worker.start()
+
+    def _evict_expired(self) -> None:
+        cutoff = time.time() - self.handle_ttl
+        expired = [h for h in self._handles.values() if h.done and h.updated_at < cutoff]
+        for handle in expired:
+            del self._handles[handle.id]
+            if handle.idempotency_key:
+                self._by_key.pop(handle.idempotency_key, None)
+
+    def _next_batch(self) -> List[OrderHandle]:
+        batch = [self._carry or self._queue.get()]
+        self._carry = None
+        legs = len(batch[0].legs)
+        while legs < self.max_batch_legs:
+            try:
+                handle = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if legs + len(handle.legs) > self.max_batch_legs:
+                # Doesn't fit; it leads the next batch
+                self._carry = handle
+                break
+            batch.append(handle)
+            legs += len(handle.legs)
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            self._post(self._next_batch())
+
+    def _post(self, batch: List[OrderHandle]) -> None:
+        for handle in batch:
+            handle.status = 'posting'
+            handle.updated_at = time.time()
+
+        legs = [leg for handle in batch for leg in handle.legs]
+        try:
+            results = self.execute_legs(legs)
+        except Exception as e:
+            if len(batch) == 1:
+                logger.exception("❌ [TRADE] Worker failed to post batch of %d legs: %s", len(legs), e)
+                batch[0].finish([], error=str(e))
+                return
+            logger.warning("⚠️ [TRADE] Batch of %d trades failed (%s), retrying each on its own", len(batch), e)
+            results = None
+
+        if results is None:
+            for handle in batch:
+                self._post([handle])
+            return
+
+        offset = 0
+        for handle in batch:
+            handle.finish(results[offset:offset + len(handle.legs)])
+            offset += len(handle.legs)
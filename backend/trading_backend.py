@@ -1,17 +1,31 @@
 #!/usr/bin/env python3
 
+import hmac
 import json
+import math
 import os
 import sys
-from flask import Flask, request, jsonify
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from flask import Flask, Response, g, request, jsonify, stream_with_context
 from flask_cors import CORS
 from dotenv import load_dotenv
-from py_clob_client.client import ClobClient
-from py_clob_client.clob_types import MarketOrderArgs, OrderType
-from py_clob_client.order_builder.constants import BUY, SELL
+from price_hub import PriceHub, ClobMarketFeed, LocalMarketFeed, CLOB_MARKET_WS_URL
+from order_book import InsufficientDepthError, OrderBookCache, quote_market_buy
+from token_metadata import TokenMetadata, TokenMetadataCache, buy_limit_price
+from trade_submitter import TradeSubmitter
+from positions_service import DATA_API_URL, PositionsService, normalize_address
+from closed_positions import ClosedPositionsStore, decode_cursor, encode_cursor
+from portfolio import PortfolioCache, summarize
+from position_book import PositionBooks, mark_price
+from warmup import Warmup
+from admission import AdmissionController, AdmissionRejected, RequestClass
+from profiler import AllocationProfile, ProfilerBusy, SamplingProfiler, collapsed, top_functions
 
 # Add tweet-market-pipeline to path
-import os
 current_dir = os.path.dirname(os.path.abspath(__file__))
 tweet_pipeline_path = os.path.join(current_dir, 'tweet-market-pipeline')
 tweet_include_path = os.path.join(current_dir, 'tweet-market-pipeline', 'include')
@@ -21,65 +35,68 @@ sys.path.insert(0, tweet_include_path)
 
 load_dotenv()
 
-# Import tweet analyzer (add error handling for missing dependencies)
-TWEET_ANALYSIS_AVAILABLE = False
+# Imported through the include package, as the pipeline does, so both share
+# one metrics registry and one fixture store
+from include.logging_config import get_logger, log_payload
+from include.metrics import CONTENT_TYPE, REGISTRY, counter, gauge, histogram, observe_session, outbound
+from include.fixtures import get_fixture_store, mount_fixtures
+from include.cancellation import CancelRegistry
+from include.degradation import degraded_analysis
+from include.token_usage import start_usage
+from include.tracing import get_recorder, start_span
+
+logger = get_logger('trading_backend')
+
+# Tweet analyzer is imported on first use (or by warmup): it pulls in cohere and
+# the whole pipeline, which would otherwise hold up binding the server
+TWEET_ANALYSIS_AVAILABLE = None  # Unknown until the first import attempt
 analyze_tweet = None
-
-try:
-    print(f"🔍 [DEBUG] Attempting to import from: {tweet_pipeline_path}")
-    print(f"🔍 [DEBUG] Include path: {tweet_include_path}")
-    print(f"🔍 [DEBUG] Current working dir: {os.getcwd()}")
-    print(f"🔍 [DEBUG] Pipeline path exists: {os.path.exists(tweet_pipeline_path)}")
-    print(f"🔍 [DEBUG] tweet_analyzer.py exists: {os.path.exists(os.path.join(tweet_pipeline_path, 'tweet_analyzer.py'))}")
-    print(f"🔍 [DEBUG] Python path: {sys.path[:3]}...")
-    
-    # Test import step by step
-    print(f"🔍 [DEBUG] Testing imports...")
-    import tweet_analyzer
-    print(f"✅ [DEBUG] tweet_analyzer module imported")
-    
-    from tweet_analyzer import analyze_tweet
-    print(f"✅ [DEBUG] analyze_tweet function imported")
-    
-    # Test if it actually works
-    test_result = analyze_tweet("test", save_to_file=False, top_n=1)
-    print(f"✅ [DEBUG] Test analysis completed, keys: {list(test_result.keys()) if isinstance(test_result, dict) else type(test_result)}")
-    
-    TWEET_ANALYSIS_AVAILABLE = True
-    print("✅ [DEBUG] Tweet analysis pipeline loaded successfully")
-    
-except ImportError as e:
-    print(f"❌ [DEBUG] IMPORT ERROR: {e}")
-    print(f"❌ [DEBUG] Import error type: {type(e).__name__}")
-    import traceback
-    traceback.print_exc()
-    TWEET_ANALYSIS_AVAILABLE = False
-    
-except Exception as e:
-    print(f"❌ [DEBUG] OTHER ERROR: {e}")
-    print(f"❌ [DEBUG] Error type: {type(e).__name__}")
-    import traceback
-    traceback.print_exc()
-    TWEET_ANALYSIS_AVAILABLE = False
-    
-print(f"🔍 TWEET_ANALYSIS_AVAILABLE = {TWEET_ANALYSIS_AVAILABLE}")
+_tweet_analyzer_lock = threading.Lock()
+
+def load_tweet_analyzer():
+    """Import the tweet analysis pipeline once; returns analyze_tweet or None"""
+    global TWEET_ANALYSIS_AVAILABLE, analyze_tweet
+    with _tweet_analyzer_lock:
+        if TWEET_ANALYSIS_AVAILABLE is None:
+            try:
+                from tweet_analyzer import analyze_tweet as pipeline_analyze_tweet
+                analyze_tweet = pipeline_analyze_tweet
+                TWEET_ANALYSIS_AVAILABLE = True
+                logger.info("✅ Tweet analysis pipeline loaded")
+            except Exception as e:
+                logger.exception("❌ Tweet analysis pipeline unavailable: %s: %s", type(e).__name__, e)
+                TWEET_ANALYSIS_AVAILABLE = False
+        return analyze_tweet
 
 app = Flask(__name__)
 CORS(app, resources={
     r"/api/*": {
         "origins": ["chrome-extension://*", "http://localhost:*", "https://x.com", "https://twitter.com"],
         "methods": ["GET", "POST", "OPTIONS"],
-        "allow_headers": ["Content-Type", "Authorization"]
+        "allow_headers": ["Content-Type", "Authorization", "Idempotency-Key", "If-None-Match", "X-Admin-Token", "X-Profile-Allocations", "X-Request-Id"],
+        "expose_headers": ["ETag", "Retry-After", "X-Trace-Id"]
     }
 })
 
-HOST = "https://clob.polymarket.com"
+HOST = os.getenv("CLOB_HOST", "https://clob.polymarket.com")
 CHAIN_ID = 137
 PRIVATE_KEY = os.getenv("magickey")
 FUNDER_ADDRESS = os.getenv("funder")
 
+# Live price streaming: "clob" uses the real market channel, "local" a stand-in feed
+PRICE_FEED = os.getenv("PRICE_FEED", "clob")
+CLOB_WS_URL = os.getenv("CLOB_WS_URL", CLOB_MARKET_WS_URL)
+PRICE_STREAM_MAX_HZ = float(os.getenv("PRICE_STREAM_MAX_HZ", "4"))
+PRICE_STREAM_KEEPALIVE = 15
+# How often a position stream rechecks the positions cache, however busy its prices are
+POSITIONS_STREAM_RECHECK = float(os.getenv("POSITIONS_STREAM_RECHECK", "5"))
+
+price_feed = LocalMarketFeed() if PRICE_FEED == "local" else ClobMarketFeed(CLOB_WS_URL)
+price_hub = PriceHub(price_feed, max_rate_hz=PRICE_STREAM_MAX_HZ)
+
 def setup_client():
     """Setup authenticated Magic wallet client"""
+    from py_clob_client.client import ClobClient
     client = ClobClient(
         HOST,
         key=PRIVATE_KEY,
@@ -87,9 +104,112 @@ def setup_client():
         signature_type=1,  # Magic wallet
         funder=FUNDER_ADDRESS
     )
-    client.set_api_creds(client.create_or_derive_api_creds())
+    with outbound('clob', 'derive_api_creds'):
+        client.set_api_creds(client.create_or_derive_api_creds())
     return client
 
+_public_client = None
+
+def get_public_client():
+    """Shared unauthenticated client for public CLOB reads (books, prices)"""
+    global _public_client
+    if _public_client is None:
+        from py_clob_client.client import ClobClient
+        _public_client = ClobClient(HOST, chain_id=CHAIN_ID)
+    return _public_client
+
+def fetch_order_book_snapshot(token_id):
+    """REST order book snapshot in market-channel level format"""
+    with outbound('clob', 'order_book'):
+        summary = get_public_client().get_order_book(token_id)
+    return {
+        'bids': [{'price': level.price, 'size': level.size} for level in summary.bids or []],
+        'asks': [{'price': level.price, 'size': level.size} for level in summary.asks or []]
+    }
+
+order_books = OrderBookCache(
+    fetch_order_book_snapshot,
+    is_live=price_hub.is_active,
+    on_change=price_hub.apply_update,
+    max_age=float(os.getenv("ORDER_BOOK_MAX_AGE", "5"))
+)
+price_feed.add_listener(order_books.on_event)
+
+_trading_client = None
+_trading_client_lock = threading.Lock()
+
+def get_trading_client():
+    """Long-lived authenticated client, so API creds are derived once per process"""
+    global _trading_client
+    with _trading_client_lock:
+        if _trading_client is None:
+            _trading_client = setup_client()
+        return _trading_client
+
+def fetch_tick_size(token_id):
+    with outbound('clob', 'tick_size'):
+        return get_public_client().get_tick_size(token_id)
+
+def fetch_token_metadata(token_id):
+    """Look up signing metadata for a token the cache has never seen"""
+    client = get_public_client()
+    tick_size = fetch_tick_size(token_id)
+    with outbound('clob', 'neg_risk'):
+        neg_risk = client.get_neg_risk(token_id)
+    return TokenMetadata(token_id=token_id, tick_size=tick_size, neg_risk=neg_risk)
+
+token_metadata = TokenMetadataCache(
+    fetch_token_metadata,
+    fetch_tick_size=fetch_tick_size,
+    tick_size_ttl=float(os.getenv("TICK_SIZE_TTL", "30"))
+)
+price_feed.add_listener(token_metadata.on_event)
+
+def resolve_fee_rate(client, metadata):
+    """
+    Fee rate for the token, as ClobClient.create_market_order resolves it;
+    looked up once per token and kept with its metadata
+    """
+    if metadata.fee_rate_bps is not None:
+        return metadata.fee_rate_bps
+    fee_rate_bps = 0
+    get_fee_rate = getattr(client, 'get_fee_rate_bps', None)  # Only in newer py-clob-client releases
+    if get_fee_rate is not None:
+        with outbound('clob', 'fee_rate'):
+            fee_rate_bps = int(get_fee_rate(metadata.token_id) or 0)
+    token_metadata.update(metadata.token_id, fee_rate_bps=fee_rate_bps)
+    return fee_rate_bps
+
+def build_market_buy(client, token_id, amount):
+    """
+    Sign a FOK market BUY without network lookups
+
+    ClobClient.create_market_order fetches tick size, neg-risk, the fee rate
+    and the order book before signing; here they come from the metadata and
+    order book caches, and the limit price is the worst level the quote
+    walks to, rounded onto the tick grid and range-checked the same way the
+    client would.
+    Raises InsufficientDepthError instead of posting an order that would be killed.
+    """
+    from py_clob_client.clob_types import CreateOrderOptions, MarketOrderArgs, OrderType
+    from py_clob_client.order_builder.constants import BUY
+
+    metadata = token_metadata.get(token_id)
+    quote = quote_market_buy(order_books.get(token_id), amount)
+    if not quote['fillable']:
+        raise InsufficientDepthError(quote)
+
+    order = MarketOrderArgs(
+        token_id=token_id,
+        amount=amount,
+        side=BUY,
+        price=buy_limit_price(quote['worst_price'], metadata.tick_size),
+        fee_rate_bps=resolve_fee_rate(client, metadata),
+        order_type=OrderType.FOK  # Fill or Kill
+    )
+    options = CreateOrderOptions(tick_size=metadata.tick_size, neg_risk=metadata.neg_risk)
+    return client.builder.create_market_order(order, options), quote
+
 def load_single_market_data():
     """Load single market data from samplein.json"""
     try:
@@ -112,7 +232,7 @@ def load_single_market_data():
             'type': 'single'
         }
     except Exception as e:
-        print(f"Error loading samplein.json: {e}")
+        logger.error("Error loading samplein.json: %s", e)
         return None
 
 def load_multi_market_data():
@@ -177,7 +297,7 @@ def load_multi_market_data():
             'event_id': event['id']
         }
     except Exception as e:
-        print(f"Error loading samplemultimarkets.json: {e}")
+        logger.error("Error loading samplemultimarkets.json: %s", e)
         return None
 
 def load_market_data():
@@ -229,52 +349,29 @@ def load_all_events():
 def convert_pipeline_to_events(pipeline_result):
     """Convert tweet pipeline result to event format compatible with frontend"""
     try:
-        print(f"🔍 Converting pipeline result: {pipeline_result.keys() if isinstance(pipeline_result, dict) else type(pipeline_result)}")
-        
         # Handle new format (Option 1) with original API objects
         if 'events' in pipeline_result and 'relevance_metadata' in pipeline_result:
-            print(f"✅ Processing NEW format with original Polymarket API objects")
             return convert_new_format_to_events(pipeline_result)
         
         # Handle old format (for backward compatibility)
         elif 'top_relevant_markets' in pipeline_result:
-            print(f"⚠️ Processing OLD format - consider updating to new format")
+            logger.warning("⚠️ Processing OLD pipeline format - consider updating to new format")
             return convert_old_format_to_events(pipeline_result)
         
         else:
-            print(f"❌ Unknown pipeline result format")
-            print(f"🔍 Available keys: {list(pipeline_result.keys()) if isinstance(pipeline_result, dict) else 'Not a dict'}")
+            logger.error("❌ Unknown pipeline result format, keys: %s",
+                         list(pipeline_result.keys()) if isinstance(pipeline_result, dict) else type(pipeline_result))
             return None
             
     except Exception as e:
-        print(f"❌ Error converting pipeline result: {e}")
-        print(f"❌ Pipeline result structure: {pipeline_result}")
-        import traceback
-        print(f"❌ Full traceback: {traceback.format_exc()}")
+        logger.exception("❌ Error converting pipeline result: %s", e)
         return None
 
 def convert_new_format_to_events(pipeline_result):
     """Return PURE Polymarket events array - UNMODIFIED"""
     try:
         events = pipeline_result['events']  # Original Polymarket API objects
-        print(f"🎯 Returning {len(events)} PURE Polymarket events")
-        print(f"✅ NO CONVERSION - exact Polymarket API format")
-        
-        # LOG: Show what we're actually returning
-        print(f"\n🔍 [CONVERSION] EVENTS BEING RETURNED:")
-        for i, event in enumerate(events[:2]):  # Show first 2 events
-            print(f"Event {i+1} keys: {list(event.keys()) if isinstance(event, dict) else type(event)}")
-            if isinstance(event, dict):
-                # Show critical fields that frontend needs
-                critical_fields = ['id', 'title', 'question', 'description', 'markets', 'outcomePrices', 'clobTokenIds']
-                for field in critical_fields:
-                    if field in event:
-                        value = event[field]
-                        if isinstance(value, (list, dict)):
-                            print(f"  {field}: {type(value).__name__} with {len(value)} items" if hasattr(value, '__len__') else f"  {field}: {type(value).__name__}")
-                        else:
-                            print(f"  {field}: {value}"[:100] + ("..." if len(str(value)) > 100 else ""))
-            print("---")
+        logger.debug("🎯 Returning %d PURE Polymarket events", len(events))
         
         # Return EXACTLY what the AI pipeline found - pure Polymarket events
         return {
@@ -285,19 +382,17 @@ def convert_new_format_to_events(pipeline_result):
         }
         
     except Exception as e:
-        print(f"❌ Error: {e}")
+        logger.error("❌ Error: %s", e)
         return None
 
 def convert_old_format_to_events(pipeline_result):
     """Convert old format (transformed objects) to frontend format - DEPRECATED"""
     try:
         markets = pipeline_result['top_relevant_markets']
-        print(f"🎯 Processing {len(markets)} markets from OLD pipeline format")
+        logger.debug("🎯 Processing %d markets from OLD pipeline format", len(markets))
         
         events = []
         for i, market_data in enumerate(markets):
-            print(f"📊 Processing market {i+1}: {market_data.get('title', 'Unknown')}")
-            
             # Extract market data from the old pipeline result structure
             market_info = market_data.get('market_data', {})
             
@@ -334,7 +429,7 @@ def convert_old_format_to_events(pipeline_result):
                         yes_price = float(prices[0])
                         no_price = float(prices[1])
                 except Exception as parse_error:
-                    print(f"⚠️ Could not parse outcome prices: {parse_error}")
+                    logger.warning("⚠️ Could not parse outcome prices: %s", parse_error)
                     # Use random but realistic prices for demo
                     import random
                     yes_price = random.uniform(0.3, 0.7)
@@ -361,9 +456,8 @@ def convert_old_format_to_events(pipeline_result):
                 'active': market_info.get('active', True)
             }
             events.append(event)
-            print(f"✅ Converted market {i+1}: {event['title']} (Score: {event['relevance_score']:.2f})")
 
-        print(f"🎯 Successfully converted {len(events)} events using OLD format")
+        logger.debug("🎯 Successfully converted %d events using OLD format", len(events))
         
         return {
             'events': events,
@@ -378,7 +472,7 @@ def convert_old_format_to_events(pipeline_result):
         }
         
     except Exception as e:
-        print(f"❌ Error converting old format: {e}")
+        logger.error("❌ Error converting old format: %s", e)
         return None
 
         events = []
@@ -519,31 +613,33 @@ def get_all_events():
             'error': str(e)
         }), 500
 
+analysis_runs = CancelRegistry()
+
+@app.route('/api/analyze-tweet/cancel', methods=['POST'])
+def cancel_analysis():
+    """Stop an analysis the client no longer wants: {"request_id": ...} as sent to /api/analyze-tweet"""
+    data = request.get_json(silent=True) or {}
+    request_id = data.get('request_id')
+    if not request_id:
+        return jsonify({'success': False, 'error': 'Missing request_id'}), 400
+    return jsonify({'success': True, 'request_id': request_id, 'cancelled': analysis_runs.cancel(request_id)})
+
 @app.route('/api/analyze-tweet', methods=['POST'])
 def analyze_tweet_endpoint():
     """Analyze tweet text and return relevant markets"""
     try:
-        print(f"\n{'='*60}")
-        print(f"🚀 TWEET ANALYSIS ENDPOINT CALLED")
-        print(f"{'='*60}")
-        
-        # Check if tweet analysis is available
-        print(f"🔍 [DEBUG] TWEET_ANALYSIS_AVAILABLE = {TWEET_ANALYSIS_AVAILABLE}")
-        print(f"🔍 [DEBUG] analyze_tweet function = {analyze_tweet}")
-        
+        analyze_tweet = load_tweet_analyzer()
         if not TWEET_ANALYSIS_AVAILABLE:
-            print(f"❌ [DEBUG] Tweet analysis pipeline not available")
-            print(f"❌ [DEBUG] This is why the endpoint is returning 503")
+            logger.error("❌ Tweet analysis pipeline not available, returning 503")
             return jsonify({
                 'success': False,
                 'error': 'Tweet analysis pipeline not available - dependencies may be missing'
             }), 503
 
         data = request.get_json()
-        print(f"📝 Request data: {data}")
         
         if not data or 'tweet_text' not in data:
-            print(f"❌ Missing tweet_text in request")
+            logger.warning("❌ Missing tweet_text in request")
             return jsonify({
                 'success': False,
                 'error': 'Missing tweet_text in request body'
@@ -552,33 +648,22 @@ def analyze_tweet_endpoint():
         tweet_text = data['tweet_text']
         author = data.get('author', 'TwitterUser')
         top_n = data.get('top_n', 5)
+        # Clients that may abandon the request send an id to cancel it by
+        request_id = data.get('request_id') or request.headers.get('X-Request-Id') or uuid.uuid4().hex
 
-        print(f"🔍 Analyzing tweet from @{author}: '{tweet_text[:100]}{'...' if len(tweet_text) > 100 else ''}'")
-        print(f"📊 Requesting top {top_n} markets")
+        logger.info("🔍 Analyzing tweet from @%s (top %s): '%.100s'", author, top_n, tweet_text)
 
-        # Run the tweet analysis pipeline
-        print(f"🤖 Starting AI analysis pipeline...")
-        pipeline_result = analyze_tweet(tweet_text, author, top_n, save_to_file=False)
-        print(f"✅ Pipeline analysis complete")
-        print(f"📋 Pipeline result keys: {list(pipeline_result.keys()) if isinstance(pipeline_result, dict) else 'Not a dict'}")
-        
-        # LOG STEP 1: Raw pipeline result
-        print(f"\n🔍 [STEP 1] RAW PIPELINE RESULT:")
-        print(f"Pipeline type: {type(pipeline_result)}")
-        if isinstance(pipeline_result, dict):
-            for key in pipeline_result.keys():
-                value = pipeline_result[key]
-                if key == 'events' and isinstance(value, list):
-                    print(f"  {key}: list of {len(value)} items")
-                    for i, item in enumerate(value[:2]):  # Show first 2
-                        print(f"    Event {i+1}: {json.dumps(item, indent=6, default=str)[:800]}...")
-                else:
-                    print(f"  {key}: {json.dumps(value, indent=4, default=str)[:500]}...")
-        else:
-            print(json.dumps(pipeline_result, indent=2, default=str)[:1500] + "...")
+        # Run the tweet analysis pipeline, without LLM calls if admitted under load
+        degraded = 'admission' in g and g.admission.degraded
+        with analysis_runs.register(request_id), degraded_analysis(degraded):
+            pipeline_result = analyze_tweet(tweet_text, author, top_n, save_to_file=False, verbose=False)
+        log_payload(logger, "🔍 Raw pipeline result", pipeline_result)
+
+        if pipeline_result.get('cancelled'):
+            return jsonify({'success': False, 'error': 'Analysis cancelled', 'request_id': request_id}), 499
 
         if 'error' in pipeline_result:
-            print(f"❌ Pipeline returned error: {pipeline_result['error']}")
+            logger.error("❌ Pipeline returned error: %s", pipeline_result['error'])
             return jsonify({
                 'success': False,
                 'error': f"Pipeline error: {pipeline_result['error']}"
@@ -587,25 +672,26 @@ def analyze_tweet_endpoint():
         # Check if pipeline found any markets - handle both formats
         if 'events' in pipeline_result:  # NEW format
             markets_count = len(pipeline_result['events'])
-            print(f"🎯 Pipeline found {markets_count} relevant markets (NEW format)")
             
             if markets_count == 0:
                 tweet_analysis = pipeline_result.get('tweet_analysis', {})
-                print(f"⚠️ No markets found for this tweet")
+                search_metadata = pipeline_result.get('search_metadata', {})
+                logger.info("⚠️ No markets found for this tweet")
                 return jsonify({
                     'success': False,
-                    'error': 'No relevant markets found for this tweet content',
+                    'error': ('Tweet has no prediction-market angle' if search_metadata.get('skipped')
+                              else 'No relevant markets found for this tweet content'),
                     'debug_info': {
                         'search_query': tweet_analysis.get('search_query', 'Unknown'),
-                        'sentiment_score': tweet_analysis.get('sentiment_score', 0)
+                        'sentiment_score': tweet_analysis.get('sentiment_score', 0),
+                        'market_classifier': search_metadata.get('market_classifier')
                     }
                 }), 404
         elif 'top_relevant_markets' in pipeline_result:  # OLD format
             markets_count = len(pipeline_result['top_relevant_markets'])
-            print(f"🎯 Pipeline found {markets_count} relevant markets (OLD format)")
             
             if markets_count == 0:
-                print(f"⚠️ No markets found for this tweet")
+                logger.info("⚠️ No markets found for this tweet")
                 return jsonify({
                     'success': False,
                     'error': 'No relevant markets found for this tweet content',
@@ -615,7 +701,7 @@ def analyze_tweet_endpoint():
                     }
                 }), 404
         else:
-            print(f"❌ Pipeline result missing both 'events' and 'top_relevant_markets' fields")
+            logger.error("❌ Pipeline result missing both 'events' and 'top_relevant_markets' fields")
             return jsonify({
                 'success': False,
                 'error': 'Invalid pipeline response format',
@@ -625,56 +711,24 @@ def analyze_tweet_endpoint():
             }), 500
 
         # Convert pipeline result to our event format
-        print(f"🔄 Converting pipeline result to event format...")
-        
-        # LOG STEP 2: Before conversion
-        print(f"\n🔍 [STEP 2] BEFORE CONVERSION:")
-        print(f"Input keys: {list(pipeline_result.keys()) if isinstance(pipeline_result, dict) else 'Not dict'}")
-        if 'events' in pipeline_result:
-            print(f"Events count: {len(pipeline_result['events'])}")
-            print(f"First event structure: {list(pipeline_result['events'][0].keys()) if pipeline_result['events'] else 'No events'}")
-        
         events_data = convert_pipeline_to_events(pipeline_result)
-        
-        # LOG STEP 3: After conversion
-        print(f"\n🔍 [STEP 3] AFTER CONVERSION:")
-        if events_data:
-            print(f"Converted data keys: {list(events_data.keys())}")
-            if 'events' in events_data:
-                print(f"Converted events count: {len(events_data['events'])}")
-                if events_data['events']:
-                    first_event = events_data['events'][0]
-                    print(f"First converted event keys: {list(first_event.keys()) if isinstance(first_event, dict) else type(first_event)}")
-                    print(f"First converted event sample:")
-                    print(json.dumps(first_event, indent=4, default=str)[:1000] + "...")
-        else:
-            print("Conversion returned None")
 
         if events_data and events_data.get('events'):
-            events_count = len(events_data['events'])
-            print(f"✅ Successfully converted to {events_count} events")
-            print(f"🎯 Returning events for carousel display")
-            
+            # Warm signing metadata so a buy on any of these markets signs locally
+            warmed = token_metadata.warm_from_events(events_data['events'])
+            logger.debug("🔥 Cached signing metadata for %d tokens", warmed)
+
             response = {
                 'success': True,
                 **events_data  # Spread the events data
             }
-            
-            print(f"📤 Response keys: {list(response.keys())}")
-            
-            # LOG STEP 4: Final response to frontend
-            print(f"\n🔍 [STEP 4] FINAL RESPONSE TO FRONTEND:")
-            print(f"Response structure: success={response.get('success')}, total_count={response.get('total_count')}, carousel={response.get('carousel')}")
-            print(f"Events array length: {len(response.get('events', []))}")
-            if response.get('events'):
-                print(f"First response event sample:")
-                first_event = response['events'][0]
-                print(json.dumps(first_event, indent=4, default=str)[:1200] + "...")
-            
-            print(f"{'='*60}")
+            if degraded:
+                response['degraded'] = True  # Keyword-ranked; the client may retry later for a full analysis
+            logger.info("✅ Returning %d events for @%s", len(events_data['events']), author)
+            log_payload(logger, "📤 First response event", events_data['events'][0])
             return jsonify(response)
         else:
-            print(f"❌ Event conversion failed or produced no events")
+            logger.error("❌ Event conversion failed or produced no events")
             return jsonify({
                 'success': False,
                 'error': 'Failed to convert markets to display format',
@@ -685,9 +739,7 @@ def analyze_tweet_endpoint():
             }), 500
 
     except Exception as e:
-        print(f"❌ CRITICAL ERROR in tweet analysis endpoint: {e}")
-        import traceback
-        print(f"❌ Full traceback: {traceback.format_exc()}")
+        logger.exception("❌ CRITICAL ERROR in tweet analysis endpoint: %s", e)
         return jsonify({
             'success': False,
             'error': f"Internal server error: {str(e)}",
@@ -697,287 +749,456 @@ def analyze_tweet_endpoint():
             }
         }), 500
 
+MAX_BATCH_LEGS = 15  # CLOB limit on orders per batched post
+TRADE_WAIT_TIMEOUT = float(os.getenv("TRADE_WAIT_TIMEOUT", "30"))
+
+def post_market_orders(client, signed_orders):
+    """Post FOK orders in one batched request where the client supports it"""
+    from py_clob_client.clob_types import OrderType
+    try:
+        from py_clob_client.clob_types import PostOrdersArgs
+    except ImportError:
+        # Older py_clob_client without batch support: post one at a time
+        results = []
+        for signed in signed_orders:
+            with outbound('clob', 'post_order'):
+                results.append(client.post_order(signed, OrderType.FOK))
+        return results
+    with outbound('clob', 'post_orders'):
+        return client.post_orders([PostOrdersArgs(order=signed, orderType=OrderType.FOK) for signed in signed_orders])
+
+def parse_leg(leg):
+    """Validate one trade leg; returns (side, amount, token_id) or raises ValueError"""
+    if not isinstance(leg, dict):
+        raise ValueError('A leg must be an object with side, amount and token ids')
+    side = leg.get('side')  # 'YES' or 'NO'
+    yes_token_id = leg.get('yes_token_id')  # Token IDs from frontend
+    no_token_id = leg.get('no_token_id')
+    try:
+        amount = float(leg['amount'])  # USD amount
+    except (KeyError, TypeError, ValueError):
+        raise ValueError('A numeric amount is required')
+
+    if side not in ('YES', 'NO'):
+        raise ValueError(f'Side must be YES or NO, got {side}')
+    if not math.isfinite(amount) or amount <= 0:
+        raise ValueError('Amount must be positive')
+    if not yes_token_id or not no_token_id:
+        raise ValueError(f'Token IDs required for real trading. YES: {yes_token_id}, NO: {no_token_id}')
+
+    return side, amount, yes_token_id if side == 'YES' else no_token_id
+
+def execute_legs(legs):
+    """
+    Sign and post validated legs; runs on the trade submitter's worker
+
+    Legs are signed concurrently (book snapshots for cold tokens are fetched
+    in parallel) and every signed leg goes out in one batched post.
+    Returns one result dict per leg, in order.
+    """
+    client = get_trading_client()
+    results = [None] * len(legs)
+    parsed = [parse_leg(leg) for leg in legs]
+
+    def leg_result(i, **fields):
+        side, amount, token_id = parsed[i]
+        return {
+            'side': side,
+            'amount': amount,
+            'market_id': legs[i].get('market_id'),
+            'token_id': token_id,
+            **fields
+        }
+
+    signed = {}
+    with ThreadPoolExecutor(max_workers=min(8, len(legs))) as pool:
+        futures = {
+            i: pool.submit(build_market_buy, client, token_id, amount)
+            for i, (side, amount, token_id) in enumerate(parsed)
+        }
+    for i, future in futures.items():
+        try:
+            signed[i] = future.result()
+        except Exception as e:
+            logger.warning("⚠️ [TRADE] Leg %d not posted: %s", i, e)
+            results[i] = leg_result(i, success=False, error=f'Trade failed: {str(e)}', quote=getattr(e, 'quote', None))
+
+    # One round trip for every signed leg
+    if signed:
+        order_indexes = sorted(signed)
+        try:
+            responses = post_market_orders(client, [signed[i][0] for i in order_indexes])
+        except Exception as e:
+            status = getattr(e, 'status_code', None)
+            if isinstance(status, int) and 400 <= status < 500:
+                raise  # Rejected outright, nothing was placed: the submitter may retry legs apart
+            # The post may have reached the exchange, so it must not be retried
+            logger.error("❌ [TRADE] Batch post of %d orders failed, outcome unknown: %s", len(order_indexes), e)
+            for i in order_indexes:
+                results[i] = leg_result(i, success=False, quote=signed[i][1],
+                                        error=f'Trade failed, order status unknown (check positions): {str(e)}')
+            return results
+        logger.info("💵 [TRADE] Posted %d orders in one batch", len(order_indexes))
+
+        for i, resp in zip(order_indexes, responses):
+            ok = bool(resp.get('success', True)) and not resp.get('errorMsg') if isinstance(resp, dict) else bool(resp)
+            side, amount, token_id = parsed[i]
+            results[i] = leg_result(i, success=ok, order_result=resp, quote=signed[i][1])
+            if ok:
+                results[i]['message'] = f'Successfully placed {side} order for ${amount}'
+            else:
+                reason = resp.get('errorMsg', 'order rejected') if isinstance(resp, dict) else 'order rejected'
+                results[i]['error'] = f"Trade failed: {reason}"
+
+    return results
+
+trade_submitter = TradeSubmitter(execute_legs, max_batch_legs=MAX_BATCH_LEGS)
+
+def get_idempotency_key(data):
+    return request.headers.get('Idempotency-Key') or data.get('idempotency_key')
+
+def order_handle_response(handle, created):
+    """202 for a newly queued trade, 200 when an idempotency key was replayed"""
+    return jsonify({
+        'success': True,
+        'duplicate': not created,
+        'status_url': f"/api/trade/{handle.id}",
+        **handle.to_dict()
+    }), 202 if created else 200
+
 @app.route('/api/trade', methods=['POST'])
 def execute_trade():
-    """Execute a REAL trade on Polymarket"""
+    """
+    Execute a REAL trade on Polymarket
+
+    With an idempotency key (Idempotency-Key header or idempotency_key field)
+    the trade is queued and an order handle is returned immediately; replays
+    of the same key return the original handle. Without one the request
+    waits for the worker and returns the trade result as before.
+    """
     try:
-        data = request.get_json()
-        print(f"\n💵 [TRADE] REAL TRADE REQUEST: {data}")
-        
-        side = data['side']  # 'YES' or 'NO'
-        amount = float(data['amount'])  # USD amount
-        market_id = data.get('market_id')  # For multi-market support
-        yes_token_id = data.get('yes_token_id')  # Token IDs from frontend
-        no_token_id = data.get('no_token_id')
-        
-        print(f"💵 [TRADE] EXECUTING REAL {side} TRADE for ${amount}")
-        print(f"💵 [TRADE] Market ID: {market_id}")
-        print(f"💵 [TRADE] Token IDs - YES: {yes_token_id}, NO: {no_token_id}")
-        
-        # Validate token IDs
-        if not yes_token_id or not no_token_id:
-            print(f"❌ [TRADE] ERROR: Missing token IDs")
+        data = request.get_json() or {}
+        logger.debug("💵 [TRADE] Trade request: %s", data)
+        if not isinstance(data, dict):
+            return jsonify({'success': False, 'error': 'Request body must be a JSON object'}), 400
+
+        try:
+            side, amount, token_id = parse_leg(data)
+        except ValueError as e:
+            logger.warning("❌ [TRADE] Invalid trade: %s", e)
             return jsonify({
                 'success': False,
-                'error': f'Token IDs required for real trading. YES: {yes_token_id}, NO: {no_token_id}',
-                'side': side,
-                'amount': amount,
-                'market_id': market_id
+                'error': str(e),
+                'side': data.get('side'),
+                # NaN/Infinity aren't valid JSON for the client, so they go back as text
+                'amount': str(data['amount']) if isinstance(data.get('amount'), float) and not math.isfinite(data['amount'])
+                          else data.get('amount'),
+                'market_id': data.get('market_id')
             }), 400
-        
-        # Get authenticated client
-        client = setup_client()
-        print(f"💵 [TRADE] Client setup complete")
-        
-        # Select the correct token ID based on side
-        token_id = yes_token_id if side == 'YES' else no_token_id
-        print(f"💵 [TRADE] Using token ID: {token_id} for {side} trade")
-        
-        # Create and execute the market order
-        from py_clob_client.order_builder.constants import BUY
-        from py_clob_client.clob_types import OrderType, MarketOrderArgs
-        
-        order = MarketOrderArgs(
-            token_id=token_id,
-            amount=amount,
-            side=BUY,
-            order_type=OrderType.FOK  # Fill or Kill
-        )
-        
-        print(f"💵 [TRADE] Created order: {order}")
-        
-        # Sign and submit the order
-        signed = client.create_market_order(order)
-        print(f"💵 [TRADE] Order signed")
-        
-        resp = client.post_order(signed, OrderType.FOK)
-        print(f"💵 [TRADE] Order posted, response: {resp}")
-        
+
+        leg = {key: data.get(key) for key in ('side', 'amount', 'market_id', 'yes_token_id', 'no_token_id')}
+        idempotency_key = get_idempotency_key(data)
+        handle, created = trade_submitter.submit([leg], idempotency_key)
+        logger.info("💵 [TRADE] %s $%s on %s -> handle %s (%s)", side, amount, token_id, handle.id, 'queued' if created else 'duplicate')
+
+        if idempotency_key:
+            return order_handle_response(handle, created)
+
+        if not handle.wait(TRADE_WAIT_TIMEOUT):
+            return order_handle_response(handle, created)
+        if handle.error:
+            raise Exception(handle.error)
+
+        result = handle.results[0]
+        if result['success']:
+            return jsonify(result)
+        if result.get('quote') and not result['quote']['fillable']:
+            # Refused locally: the book can't fill it, so nothing was posted
+            return jsonify(result), 409
+        return jsonify(result), 500
+
+    except Exception as e:
+        logger.exception("❌ [TRADE] Trade execution error: %s", e)
         return jsonify({
-            'success': True,
-            'order_result': resp,
-            'side': side,
-            'amount': amount,
-            'market_id': market_id,
-            'token_id': token_id,
-            'message': f'Successfully placed {side} order for ${amount}'
+            'success': False,
+            'error': f'Trade failed: {str(e)}'
+        }), 500
+
+@app.route('/api/trade/<handle_id>', methods=['GET'])
+def get_trade_status(handle_id):
+    """Status and per-leg results of a queued trade"""
+    handle = trade_submitter.get(handle_id)
+    if handle is None:
+        return jsonify({'success': False, 'error': 'Unknown order handle'}), 404
+    return jsonify({'success': True, **handle.to_dict()})
+
+@app.route('/api/trades', methods=['POST'])
+def execute_trades():
+    """Execute several legs (e.g. candidates of one event) as one batched order post"""
+    try:
+        data = request.get_json() or {}
+        if not isinstance(data, dict):
+            return jsonify({'success': False, 'error': 'Request body must be a JSON object'}), 400
+        legs = data.get('legs') or []
+        logger.info("💵 [TRADES] Batch request: %s legs", len(legs) if isinstance(legs, list) else 'invalid')
+
+        if not isinstance(legs, list) or not legs:
+            return jsonify({'success': False, 'error': 'legs must be a non-empty list'}), 400
+        if len(legs) > MAX_BATCH_LEGS:
+            return jsonify({'success': False, 'error': f'At most {MAX_BATCH_LEGS} legs per batch'}), 400
+
+        for i, leg in enumerate(legs):
+            try:
+                parse_leg(leg)
+            except ValueError as e:
+                return jsonify({'success': False, 'error': f'Leg {i}: {str(e)}'}), 400
+
+        idempotency_key = get_idempotency_key(data)
+        handle, created = trade_submitter.submit(legs, idempotency_key)
+
+        if idempotency_key or not handle.wait(TRADE_WAIT_TIMEOUT):
+            return order_handle_response(handle, created)
+        if handle.error:
+            raise Exception(handle.error)
+
+        return jsonify({
+            'success': handle.status == 'posted',
+            'status': handle.status,
+            'results': handle.results,
+            'legs_posted': sum(1 for result in handle.results if 'order_result' in result)
         })
 
     except Exception as e:
-        print(f"❌ [TRADE] Trade execution error: {e}")
-        import traceback
-        print(f"❌ [TRADE] Full traceback: {traceback.format_exc()}")
+        logger.exception("❌ [TRADES] Batch execution error: %s", e)
         return jsonify({
             'success': False,
-            'error': f'Trade failed: {str(e)}'
+            'error': f'Batch trade failed: {str(e)}'
         }), 500
 
-@app.route('/api/positions', methods=['GET'])
-def get_positions():
-    """Get user's positions from Polymarket"""
+@app.route('/api/quote', methods=['GET'])
+def get_quote():
+    """Expected fill for a market BUY of `amount` dollars, from the cached order book"""
+    token_id = request.args.get('token_id')
+    amount = request.args.get('amount', type=float)
+    if not token_id or not amount or not math.isfinite(amount) or amount <= 0:
+        return jsonify({
+            'success': False,
+            'error': 'token_id and a positive amount are required'
+        }), 400
+
     try:
-        import requests
-        
-        # Use the authenticated client to get positions
-        client = setup_client()
-        
-        # Get positions using the authenticated client
-        print(f"Fetching positions for user: {FUNDER_ADDRESS}")
-        
-        # Use the correct positions API endpoint
-        try:
-            # Get API credentials from the authenticated client
-            api_creds = client.creds
-            headers = {
-                'Authorization': f'Bearer {api_creds.api_key}',
-                'Content-Type': 'application/json'
-            }
-            
-            # Use the correct data-api.polymarket.com endpoint
-            positions_url = f"https://data-api.polymarket.com/positions?user={FUNDER_ADDRESS}"
-            print(f"Calling positions API: {positions_url}")
-            
-            # Try with authentication first
-            response = requests.get(positions_url, headers=headers)
-            print(f"Response status: {response.status_code}")
-            
-            if response.ok:
-                positions = response.json()
-                print(f"✅ Got {len(positions)} positions from Polymarket Data API")
-            else:
-                # Try without authentication as data-api might be public
-                print(f"Auth failed ({response.status_code}), trying without auth...")
-                response = requests.get(positions_url)
-                if response.ok:
-                    positions = response.json()
-                    print(f"✅ Got {len(positions)} positions from public Data API")
-                else:
-                    print(f"❌ Both auth and public API failed: {response.status_code} - {response.text[:200]}")
-                    raise Exception(f"API call failed with status {response.status_code}")
-                    
-        except Exception as e:
-            print(f"❌ API call failed: {e}")
-            print(f"⚠️ Falling back to sample data for testing")
-            with open('data/sampleoneopenposition.json', 'r') as f:
-                positions = json.load(f)
-                print(f"Using sample data: {len(positions)} positions")
-        
-        # LOG: Show raw API response structure
-        print(f"\n🔍 [POSITIONS] RAW API RESPONSE:")
-        print(f"Response type: {type(positions)}")
-        print(f"Positions count: {len(positions) if isinstance(positions, list) else 'Not a list'}")
-        if isinstance(positions, list) and positions:
-            print(f"First position keys: {list(positions[0].keys()) if isinstance(positions[0], dict) else type(positions[0])}")
-            print(f"First position sample:")
-            print(json.dumps(positions[0], indent=4, default=str)[:1000] + "...")
-        
-        # RETURN RAW API DATA - NO TRANSFORMATION
-        print(f"✅ Returning PURE Polymarket positions API data - NO CONVERSION")
+        book = order_books.get(token_id)
+    except Exception as e:
+        logger.error("❌ [QUOTE] Order book fetch failed for %s: %s", token_id, e)
+        return jsonify({'success': False, 'error': f'Order book unavailable: {str(e)}'}), 502
+
+    started = time.perf_counter()
+    quote = quote_market_buy(book, amount)
+    quote_us = (time.perf_counter() - started) * 1e6
+
+    return jsonify({
+        'success': True,
+        'quote': quote,
+        'book_age_ms': (time.time() - book.updated_at) * 1000,
+        'live': price_hub.is_active(token_id),
+        'quote_us': quote_us
+    })
+
+positions_service = PositionsService(
+    base_url=os.getenv("DATA_API_URL", DATA_API_URL),
+    ttl=float(os.getenv("POSITIONS_CACHE_TTL", "15"))
+)
+observe_session(positions_service.session, 'data_api')
+
+def load_sample_positions(path):
+    """Sample positions used when data-api is unreachable"""
+    with open(path, 'r') as f:
+        sample = json.load(f)
+    # Wrap a single position in an array to match the API format
+    return sample if isinstance(sample, list) else [sample]
+
+def sample_positions_response(kind, sample_path):
+    """Serve sample positions after a data-api failure"""
+    try:
+        sample_positions = load_sample_positions(sample_path)
+        logger.warning("⚠️ Falling back to sample data: %d %s", len(sample_positions), kind)
         return jsonify({
             'success': True,
-            'positions': positions  # EXACT API response
+            'positions': sample_positions  # EXACT sample data
         })
-        
+    except FileNotFoundError:
+        return jsonify({
+            'success': False,
+            'error': f'Sample {kind} file not found and API failed'
+        }), 500
+    except Exception as fallback_error:
+        return jsonify({
+            'success': False,
+            'error': f'{kind} API failed and sample data error: {str(fallback_error)}'
+        }), 500
+
+def requested_user():
+    """The ?user= wallet (default: our funder), lowercased; ValueError unless it is a 0x address"""
+    return normalize_address(request.args.get('user') or FUNDER_ADDRESS)
+
+def invalid_user_response(error):
+    return jsonify({'success': False, 'error': str(error)}), 400
+
+def positions_response(kind, sample_path):
+    """Serve cached positions with an ETag, falling back to sample data"""
+    try:
+        user = requested_user()
+    except ValueError as e:
+        if request.args.get('user'):
+            return invalid_user_response(e)
+        # No funder configured: nothing to look up
+        return sample_positions_response(kind, sample_path)
+    try:
+        entry = positions_service.get(user, kind)
     except Exception as e:
-        print(f"Error fetching positions: {e}")
-        # Fall back to sample data for testing
-        try:
-            with open('data/sampleoneopenposition.json', 'r') as f:
-                sample_positions = json.load(f)
-                print("Using sample position data as fallback")
-                
-                # LOG: Show sample data structure
-                print(f"\n🔍 [FALLBACK POSITIONS] SAMPLE DATA:")
-                print(f"Sample type: {type(sample_positions)}")
-                print(f"Sample count: {len(sample_positions) if isinstance(sample_positions, list) else 'Not a list'}")
-                if isinstance(sample_positions, list) and sample_positions:
-                    print(f"First sample keys: {list(sample_positions[0].keys()) if isinstance(sample_positions[0], dict) else type(sample_positions[0])}")
-                
-                # RETURN RAW SAMPLE DATA - NO TRANSFORMATION
-                print(f"✅ Returning PURE sample positions data - NO CONVERSION")
-                return jsonify({
-                    'success': True,
-                    'positions': sample_positions  # EXACT sample data
-                })
-        except FileNotFoundError:
-            return jsonify({
-                'success': False,
-                'error': 'Sample position file not found and API failed'
-            }), 500
-        except Exception as fallback_error:
-            return jsonify({
-                'success': False,
-                'error': f'API failed and sample data error: {str(fallback_error)}'
-            }), 500
+        logger.error("❌ %s API call failed: %s", kind, e)
+        return sample_positions_response(kind, sample_path)
+
+    if request.if_none_match.contains(entry.etag):
+        response = app.response_class(status=304)
+    else:
+        logger.debug("✅ Returning %d %s (age %.1fs)", len(entry.positions), kind, entry.age)
+        response = jsonify({
+            'success': True,
+            'positions': entry.positions  # EXACT API response
+        })
+    response.set_etag(entry.etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+@app.route('/api/positions', methods=['GET'])
+def get_positions():
+    """Get user's positions from Polymarket"""
+    return positions_response('positions', 'data/sampleoneopenposition.json')
+
+closed_positions_store = ClosedPositionsStore(
+    os.getenv("CLOSED_POSITIONS_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'closed_positions')),
+    base_url=os.getenv("DATA_API_URL", DATA_API_URL)
+)
+observe_session(closed_positions_store.session, 'data_api')
+
+fixture_store = get_fixture_store()
+if fixture_store:
+    for session in (positions_service.session, closed_positions_store.session):
+        mount_fixtures(session, fixture_store, 'data_api')
+
+MAX_CLOSED_PAGE = 500
 
 @app.route('/api/closed-positions', methods=['GET'])
 def get_closed_positions():
-    """Get user's closed positions from Polymarket"""
+    """
+    Get user's closed positions from Polymarket, newest first
+
+    Query: cursor (from a previous page's next_cursor), limit (default 50).
+    With format=ndjson (or Accept: application/x-ndjson) rows are streamed
+    one per line from disk; without a limit the stream runs to the oldest
+    row, otherwise a final {"next_cursor": ...} line marks where to resume.
+    """
     try:
-        import requests
-        
-        # Use the authenticated client to get closed positions
-        client = setup_client()
-        
-        print(f"Fetching closed positions for user: {FUNDER_ADDRESS}")
-        
-        try:
-            # Use the authenticated client to get closed positions
-            api_creds = client.creds
-            headers = {
-                'Authorization': f'Bearer {api_creds.api_key}',
-                'Content-Type': 'application/json'
-            }
-            
-            # Use the dedicated closed-positions endpoint
-            closed_positions_url = f"https://data-api.polymarket.com/closed-positions?user={FUNDER_ADDRESS}"
-            print(f"Calling closed positions API: {closed_positions_url}")
-            
-            # Try with authentication first
-            response = requests.get(closed_positions_url, headers=headers)
-            
-            if response.ok:
-                closed_positions = response.json()
-                print(f"✅ Got {len(closed_positions)} closed positions from Polymarket Data API")
-            else:
-                # Try without auth as data-api might be public
-                print(f"Auth failed ({response.status_code}), trying without auth...")
-                response = requests.get(closed_positions_url)
-                if response.ok:
-                    closed_positions = response.json()
-                    print(f"✅ Got {len(closed_positions)} closed positions from public Data API")
-                else:
-                    print(f"❌ Both auth and public API failed: {response.status_code} {response.text[:200]}")
-                    raise Exception(f"API call failed with status {response.status_code}")
-            
-            if closed_positions is None:
-                raise Exception("All closed positions endpoints failed")
-                
-        except Exception as e:
-            print(f"❌ Closed positions API call failed: {e}")
-            print(f"⚠️ Falling back to sample closed position data")
-            with open('sample-closed-position.json', 'r') as f:
-                sample_position = json.load(f)
-                closed_positions = [sample_position]
-                print(f"Using sample data: {len(closed_positions)} closed positions")
-        
-        # LOG: Show raw closed positions API response
-        print(f"\n🔍 [CLOSED POSITIONS] RAW API RESPONSE:")
-        print(f"Response type: {type(closed_positions)}")
-        print(f"Closed positions count: {len(closed_positions) if isinstance(closed_positions, list) else 'Not a list'}")
-        if isinstance(closed_positions, list) and closed_positions:
-            print(f"First closed position keys: {list(closed_positions[0].keys()) if isinstance(closed_positions[0], dict) else type(closed_positions[0])}")
-            print(f"First closed position sample:")
-            print(json.dumps(closed_positions[0], indent=4, default=str)[:1000] + "...")
-        
-        # RETURN RAW API DATA - NO TRANSFORMATION
-        print(f"✅ Returning PURE Polymarket closed positions API data - NO CONVERSION")
-        return jsonify({
-            'success': True,
-            'positions': closed_positions  # EXACT API response
-        })
-        
+        user = requested_user()
+    except ValueError as e:
+        return invalid_user_response(e)
+    cursor = request.args.get('cursor') or None
+    ndjson = request.args.get('format') == 'ndjson' or 'application/x-ndjson' in request.headers.get('Accept', '')
+    try:
+        limit = request.args.get('limit', type=int, default=None if ndjson else 50)
+        if limit is not None:
+            limit = max(1, min(limit, MAX_CLOSED_PAGE))
+        if cursor:
+            decode_cursor(cursor)
+    except ValueError:
+        return jsonify({'success': False, 'error': 'Invalid cursor or limit'}), 400
+
+    try:
+        log = closed_positions_store.get(user)
+    except Exception as e:
+        logger.error("❌ closed-positions API call failed: %s", e)
+        if cursor:
+            return jsonify({'success': False, 'error': f'Failed to load closed positions: {e}'}), 502
+        return sample_positions_response('closed-positions', 'sample-closed-position.json')
+
+    if ndjson:
+        def generate():
+            count = 0
+            last_cursor = None
+            for timestamp, offset, row in log.iter_rows(cursor):
+                if limit is not None and count == limit:
+                    yield json.dumps({'next_cursor': last_cursor}) + '\n'
+                    return
+                yield json.dumps(row) + '\n'
+                last_cursor = encode_cursor(timestamp, offset)
+                count += 1
+
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+    positions, next_cursor = log.page(cursor, limit)
+    logger.debug("✅ Returning %d of %d closed positions", len(positions), len(log))
+    return jsonify({
+        'success': True,
+        'positions': positions,
+        'next_cursor': next_cursor,
+        'total': len(log),
+        'complete': log.complete  # False while older history is still backfilling
+    })
+
+def token_tags(token_id):
+    """Event tags for a token, if its event has been seen"""
+    entry = token_metadata.peek(token_id)
+    return entry.tags if entry else ()
+
+portfolio_cache = PortfolioCache(tags_for=token_tags)
+
+@app.route('/api/portfolio/summary', methods=['GET'])
+def get_portfolio_summary():
+    """P&L totals and exposure per event, tag and outcome for a user's positions"""
+    try:
+        user = requested_user()
+    except ValueError as e:
+        return invalid_user_response(e)
+    try:
+        entry = positions_service.get(user, 'positions')
     except Exception as e:
-        print(f"Error fetching closed positions: {e}")
-        # Fall back to sample data for testing
+        logger.error("❌ Portfolio summary failed to load positions: %s", e)
+        return jsonify({'success': False, 'error': f'Failed to load positions: {e}'}), 502
+
+    closed_realized = 0.0
+    if request.args.get('include_closed', 'true').lower() != 'false':
         try:
-            with open('sample-closed-position.json', 'r') as f:
-                sample_position = json.load(f)
-                print("Using sample closed position data as fallback")
-                
-                # Wrap single position in array to match API format
-                sample_positions = [sample_position] if not isinstance(sample_position, list) else sample_position
-                
-                # LOG: Show sample closed position data
-                print(f"\n🔍 [FALLBACK CLOSED POSITIONS] SAMPLE DATA:")
-                print(f"Sample type: {type(sample_positions)}")
-                print(f"Sample count: {len(sample_positions)}")
-                if sample_positions:
-                    print(f"First sample keys: {list(sample_positions[0].keys()) if isinstance(sample_positions[0], dict) else type(sample_positions[0])}")
-                
-                # RETURN RAW SAMPLE DATA - NO TRANSFORMATION
-                print(f"✅ Returning PURE sample closed positions data - NO CONVERSION")
-                return jsonify({
-                    'success': True,
-                    'positions': sample_positions  # EXACT sample data
-                })
-        except FileNotFoundError:
-            return jsonify({
-                'success': False,
-                'error': 'Sample closed position file not found and API failed'
-            }), 500
-        except Exception as fallback_error:
-            return jsonify({
-                'success': False,
-                'error': f'Closed positions API failed and sample data error: {str(fallback_error)}'
-            }), 500
+            closed_realized = closed_positions_store.get(user).realized_pnl
+        except Exception as e:
+            logger.warning("⚠️ Portfolio summary without closed positions: %s", e)
+
+    arrays = portfolio_cache.get(user, entry.etag, entry.positions)
+    # Prefer live prices for tokens the price hub is already watching, marked
+    # at mid like the position stream so both show the same P&L
+    live_prices = {}
+    for token_id in price_hub.active_tokens():
+        if token_id in arrays.row_of:
+            latest = price_hub.latest(token_id)
+            price = mark_price(latest) if latest else None
+            if price is not None:
+                live_prices[token_id] = price
+
+    summary = summarize(arrays, prices=live_prices, closed_realized_pnl=closed_realized)
+    summary['live_prices'] = len(live_prices)
+    summary['positions_age'] = entry.age
+    return jsonify({'success': True, 'summary': summary})
+
+def get_buy_price(client, token_id):
+    with outbound('clob', 'price'):
+        return client.get_price(token_id, side="BUY")
 
 @app.route('/api/prices', methods=['GET'])
 def get_live_prices():
     """Get live market prices"""
     try:
         market_data = load_market_data()
-        client = setup_client()
+        client = get_public_client()
         market_id = request.args.get('market_id')  # For multi-market support
 
         if market_data['type'] == 'multi':
@@ -986,8 +1207,8 @@ def get_live_prices():
                 all_prices = []
                 for market in market_data['markets']:
                     try:
-                        yes_price_resp = client.get_price(market['yes_token_id'], side="BUY")
-                        no_price_resp = client.get_price(market['no_token_id'], side="BUY")
+                        yes_price_resp = get_buy_price(client, market['yes_token_id'])
+                        no_price_resp = get_buy_price(client, market['no_token_id'])
 
                         yes_price = float(yes_price_resp['price']) if yes_price_resp else market['yes_price']
                         no_price = float(no_price_resp['price']) if no_price_resp else market['no_price']
@@ -1023,8 +1244,8 @@ def get_live_prices():
                 if not target_market:
                     return jsonify({'success': False, 'error': 'Market not found'}), 400
 
-                yes_price_resp = client.get_price(target_market['yes_token_id'], side="BUY")
-                no_price_resp = client.get_price(target_market['no_token_id'], side="BUY")
+                yes_price_resp = get_buy_price(client, target_market['yes_token_id'])
+                no_price_resp = get_buy_price(client, target_market['no_token_id'])
 
                 yes_price = float(yes_price_resp['price']) if yes_price_resp else target_market['yes_price']
                 no_price = float(no_price_resp['price']) if no_price_resp else target_market['no_price']
@@ -1038,8 +1259,8 @@ def get_live_prices():
                 })
         else:
             # Single market
-            yes_price_resp = client.get_price(market_data['yes_token_id'], side="BUY")
-            no_price_resp = client.get_price(market_data['no_token_id'], side="BUY")
+            yes_price_resp = get_buy_price(client, market_data['yes_token_id'])
+            no_price_resp = get_buy_price(client, market_data['no_token_id'])
 
             yes_price = float(yes_price_resp['price']) if yes_price_resp else market_data['yes_price']
             no_price = float(no_price_resp['price']) if no_price_resp else market_data['no_price']
@@ -1066,6 +1287,395 @@ def get_live_prices():
 
         return jsonify(fallback_data), 500
 
+@app.route('/api/prices/stream', methods=['GET'])
+def stream_prices():
+    """Server-sent stream of live prices for the requested tokens"""
+    token_ids = [t for t in request.args.get('token_ids', '').split(',') if t]
+    if not token_ids:
+        return jsonify({'success': False, 'error': 'token_ids query parameter required'}), 400
+
+    max_rate_hz = request.args.get('max_rate_hz', type=float)
+    subscription = price_hub.subscribe(token_ids, max_rate_hz)
+
+    def generate():
+        try:
+            yield "retry: 3000\n\n"
+            while not subscription.closed:
+                batch = subscription.next_batch(timeout=PRICE_STREAM_KEEPALIVE)
+                if batch:
+                    yield f"event: prices\ndata: {json.dumps({'prices': batch})}\n\n"
+                else:
+                    yield ": keepalive\n\n"
+        finally:
+            # Runs when the client disconnects and the generator is closed
+            subscription.close()
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+position_books = PositionBooks()
+
+@app.route('/api/positions/stream', methods=['GET'])
+def stream_positions():
+    """
+    Server-sent stream of a user's open positions marked to live prices
+
+    Sends one full snapshot, then only the rows whose token moved. Every
+    POSITIONS_STREAM_RECHECK seconds, ticking or not, the positions cache is
+    rechecked; when the book holds a set of positions this stream hasn't
+    sent (whichever stream loaded it), a new snapshot is sent and the price
+    subscription follows the new set of held tokens.
+    """
+    try:
+        user = requested_user()
+    except ValueError as e:
+        return invalid_user_response(e)
+    book = position_books.get(user)
+    try:
+        entry = positions_service.get(user, 'positions')
+    except Exception as e:
+        return jsonify({'success': False, 'error': f'Failed to load positions: {e}'}), 502
+    book.load(entry.positions, entry.etag)
+
+    def snapshot():
+        return f"event: positions\ndata: {json.dumps({'snapshot': True, 'positions': book.positions(), 'totals': book.totals()})}\n\n"
+
+    def generate():
+        subscription = price_hub.subscribe(book.token_ids())
+        # Last curPrice sent per token; other clients may have marked the shared book already
+        sent = {}
+        # ETag of the positions this stream last sent; the book is shared, so
+        # load() returning False doesn't mean this stream is up to date
+        sent_etag = book.etag
+        next_check = time.monotonic() + POSITIONS_STREAM_RECHECK
+        try:
+            yield "retry: 3000\n\n"
+            yield snapshot()
+            while not subscription.closed:
+                timeout = min(PRICE_STREAM_KEEPALIVE, max(0.0, next_check - time.monotonic()))
+                batch = subscription.next_batch(timeout=timeout)
+                if batch:
+                    book.apply_prices(batch)
+                    changed = [
+                        row for row in book.get_rows(update['token_id'] for update in batch)
+                        if sent.get(row['asset']) != row.get('curPrice')
+                    ]
+                    for row in changed:
+                        sent[row['asset']] = row.get('curPrice')
+                    if changed:
+                        yield f"event: positions\ndata: {json.dumps({'changed': changed, 'totals': book.totals()})}\n\n"
+
+                if time.monotonic() >= next_check:
+                    next_check = time.monotonic() + POSITIONS_STREAM_RECHECK
+                    try:
+                        current = positions_service.get(user, 'positions')
+                        book.load(current.positions, current.etag)
+                    except Exception as e:
+                        logger.warning("⚠️ [POSITIONS] Stream refresh failed: %s", e)
+                    if book.etag != sent_etag:
+                        sent_etag = book.etag
+                        subscription.close()
+                        subscription = price_hub.subscribe(book.token_ids())
+                        sent.clear()
+                        yield snapshot()
+                        continue
+
+                if not batch:
+                    yield ": keepalive\n\n"
+        finally:
+            subscription.close()
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+def warm_token_metadata():
+    """Seed signing metadata from the bundled Gamma event files"""
+    for path in ('data/samplein.json', 'data/samplemultimarkets.json'):
+        with open(path, 'r') as f:
+            token_metadata.warm_from_events(json.load(f).get('events', []))
+
+def warm_tweet_pipeline():
+    if load_tweet_analyzer() is None:
+        raise RuntimeError('Tweet analysis pipeline failed to import')
+
+def warm_gazetteer():
+    """Seed the tweet pre-classifier with names from the live market catalog"""
+    if load_tweet_analyzer() is None:
+        raise RuntimeError('Tweet analysis pipeline failed to import')
+    from include.polymarket_client import seed_gazetteer_sync
+    seed_gazetteer_sync()
+
+def warm_positions():
+    user = normalize_address(FUNDER_ADDRESS)
+    positions_service.get(user, 'positions')
+    closed_positions_store.get(user)
+
+warmup = Warmup()
+warmup.add_step('clob_connection', lambda: get_public_client().get_ok())
+if PRIVATE_KEY:
+    warmup.add_step('clob_credentials', get_trading_client)
+warmup.add_step('tweet_pipeline', warm_tweet_pipeline)
+warmup.add_step('token_metadata', warm_token_metadata, required=False)
+warmup.add_step('market_gazetteer', warm_gazetteer, required=False)
+if FUNDER_ADDRESS:
+    warmup.add_step('positions', warm_positions, required=False)
+
+@app.before_request
+def start_warmup():
+    # Covers servers that import the app without running __main__
+    warmup.start()
+
+@app.route('/api/ready', methods=['GET'])
+def get_ready():
+    """Readiness: 200 once required warmup steps are done, 503 with progress until then"""
+    status = warmup.status()
+    return jsonify(status), 200 if status['ready'] else 503
+
+# Request metrics. SSE endpoints use stream_with_context, which defers
+# teardown, so they count as in flight (and are timed) until the client leaves.
+HTTP_REQUEST_SECONDS = histogram('http_request_seconds', 'Flask request latency', ('endpoint', 'method', 'status'))
+HTTP_REQUESTS_IN_FLIGHT = gauge('http_requests_in_flight', 'Requests currently being handled', ('endpoint',))
+HTTP_LLM_TOKENS = counter('http_llm_tokens_total', 'LLM tokens spent serving each endpoint', ('endpoint', 'kind'))
+HTTP_LLM_COST = counter('http_llm_cost_usd_total', 'Estimated LLM spend serving each endpoint', ('endpoint',))
+
+def metrics_endpoint():
+    return request.url_rule.rule if request.url_rule else 'unmatched'
+
+# Scrapes and trace queries would only crowd real requests out of the buffer
+UNTRACED_ENDPOINTS = ('/api/metrics', '/api/debug/traces', '/api/debug/profile', '/api/debug/allocations')
+
+@app.before_request
+def start_request_timer():
+    endpoint = metrics_endpoint()
+    g.request_started = time.perf_counter()
+    HTTP_REQUESTS_IN_FLIGHT.inc(endpoint=endpoint)
+    if endpoint not in UNTRACED_ENDPOINTS and request.method != 'OPTIONS':
+        g.trace_span = start_span(f'{request.method} {endpoint}', path=request.full_path.rstrip('?'))
+        g.llm_usage = start_usage()
+
+@app.after_request
+def record_response_status(response):
+    g.response_status = response.status_code
+    if 'trace_span' in g:
+        response.headers['X-Trace-Id'] = g.trace_span.trace_id
+    return response
+
+@app.teardown_request
+def observe_request(exc=None):
+    if 'request_started' not in g:
+        return
+    endpoint = metrics_endpoint()
+    status = g.get('response_status', 500)
+    HTTP_REQUESTS_IN_FLIGHT.dec(endpoint=endpoint)
+    HTTP_REQUEST_SECONDS.observe(
+        time.perf_counter() - g.request_started,
+        endpoint=endpoint, method=request.method, status=status
+    )
+    if 'llm_usage' in g:
+        usage = g.llm_usage
+        usage.finish()
+        if usage.calls:
+            HTTP_LLM_TOKENS.inc(usage.input_tokens, endpoint=endpoint, kind='input')
+            HTTP_LLM_TOKENS.inc(usage.output_tokens, endpoint=endpoint, kind='output')
+            HTTP_LLM_COST.inc(usage.cost_usd, endpoint=endpoint)
+            if 'trace_span' in g:
+                g.trace_span.set(llm_calls=usage.calls, llm_input_tokens=usage.input_tokens,
+                                 llm_output_tokens=usage.output_tokens)
+    if 'trace_span' in g:
+        g.trace_span.set(status=status)
+        g.trace_span.finish(exc)
+
+# Admission control. Trades may use every slot; prices and analysis are
+# capped below that, so some slots are always left for trading, and a free
+# slot goes to a waiting trade before a waiting price read or analysis.
+# Streams, metrics, debug and cancel endpoints aren't admission-controlled.
+ADMISSION_SLOTS = int(os.getenv("ADMISSION_SLOTS", "16"))
+admission = AdmissionController(ADMISSION_SLOTS, [
+    RequestClass('trade', priority=0, max_concurrent=ADMISSION_SLOTS, max_queue=64, queue_timeout=10),
+    RequestClass('prices', priority=1, max_concurrent=int(os.getenv("ADMISSION_PRICES_CONCURRENCY", "8")),
+                 max_queue=32, queue_timeout=2),
+    RequestClass('analysis', priority=2, max_concurrent=int(os.getenv("ADMISSION_ANALYSIS_CONCURRENCY", "4")),
+                 max_queue=int(os.getenv("ADMISSION_ANALYSIS_QUEUE", "8")), queue_timeout=15,
+                 degrade_depth=int(os.getenv("ADMISSION_DEGRADE_DEPTH", "2")))
+])
+ADMISSION_CLASSES = {
+    '/api/trade': 'trade',
+    '/api/trades': 'trade',
+    '/api/trade/<handle_id>': 'trade',
+    '/api/quote': 'trade',
+    '/api/prices': 'prices',
+    '/api/market': 'prices',
+    '/api/events': 'prices',
+    '/api/positions': 'prices',
+    '/api/portfolio/summary': 'prices',
+    '/api/analyze-tweet': 'analysis',
+}
+ADMISSION_WAIT_SECONDS = histogram('admission_wait_seconds', 'Time requests queued for an admission slot', ('request_class',),
+                                   buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 15))
+
+@app.before_request
+def admit_request():
+    request_class = ADMISSION_CLASSES.get(metrics_endpoint())
+    if request_class is None or request.method == 'OPTIONS':
+        return None
+    try:
+        g.admission = admission.admit(request_class)
+    except AdmissionRejected as e:
+        response = jsonify({'success': False, 'error': 'Server busy, retry shortly', 'retry_after': e.retry_after})
+        response.status_code = 429
+        response.headers['Retry-After'] = str(e.retry_after)
+        return response
+    ADMISSION_WAIT_SECONDS.observe(g.admission.waited, request_class=request_class)
+    if 'trace_span' in g:
+        g.trace_span.set(admission_wait_ms=round(g.admission.waited * 1000, 2), degraded=g.admission.degraded)
+    return None
+
+@app.teardown_request
+def release_admission(exc=None):
+    ticket = g.pop('admission', None)
+    if ticket is not None:
+        admission.release(ticket)
+
+CACHE_HITS = counter('cache_hits_total', 'Cache lookups answered from cache', ('cache',))
+CACHE_MISSES = counter('cache_misses_total', 'Cache lookups that went upstream', ('cache',))
+CACHE_HIT_RATIO = gauge('cache_hit_ratio', 'Share of lookups answered from cache since start', ('cache',))
+
+def hit_ratio(cache):
+    lookups = cache.hits + cache.misses
+    return cache.hits / lookups if lookups else 0.0
+
+for cache_name, cache in (('token_metadata', token_metadata), ('order_books', order_books), ('positions', positions_service)):
+    CACHE_HITS.set_function(lambda cache=cache: cache.hits, cache=cache_name)
+    CACHE_MISSES.set_function(lambda cache=cache: cache.misses, cache=cache_name)
+    CACHE_HIT_RATIO.set_function(lambda cache=cache: hit_ratio(cache), cache=cache_name)
+
+gauge('trade_queue_depth', 'Trades waiting for the submitter thread').set_function(trade_submitter.queue_depth)
+gauge('price_stream_tokens', 'Tokens with at least one live price subscriber').set_function(lambda: len(price_hub.active_tokens()))
+gauge('warmup_ready', '1 once required warmup steps are done').set_function(lambda: 1 if warmup.ready else 0)
+ADMISSION_QUEUE_DEPTH = gauge('admission_queue_depth', 'Requests waiting for an admission slot', ('request_class',))
+ADMISSION_ACTIVE = gauge('admission_active', 'Requests holding an admission slot', ('request_class',))
+ADMISSION_REJECTED = counter('admission_rejected_total', 'Requests turned away with 429', ('request_class',))
+ADMISSION_DEGRADED = counter('admission_degraded_total', 'Requests admitted to run degraded', ('request_class',))
+
+for class_name, request_class in admission.classes.items():
+    ADMISSION_QUEUE_DEPTH.set_function(lambda request_class=request_class: request_class.waiting, request_class=class_name)
+    ADMISSION_ACTIVE.set_function(lambda request_class=request_class: request_class.running, request_class=class_name)
+    ADMISSION_REJECTED.set_function(lambda request_class=request_class: request_class.rejected, request_class=class_name)
+    ADMISSION_DEGRADED.set_function(lambda request_class=request_class: request_class.degraded, request_class=class_name)
+
+gauge('analyses_in_flight', 'Tweet analyses running, cancellable by request id').set_function(analysis_runs.in_flight)
+
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Prometheus text exposition of timings, cache hit ratios and in-flight counts"""
+    return Response(REGISTRY.render(), content_type=CONTENT_TYPE)
+
+# Traces and profiling are admin-only: they're off unless ADMIN_TOKEN is set,
+# and callers send it as X-Admin-Token or a Bearer token
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+profiler = SamplingProfiler()
+allocation_profiles = deque(maxlen=20)
+
+def is_admin():
+    if not ADMIN_TOKEN:
+        return False
+    supplied = request.headers.get('X-Admin-Token') or request.headers.get('Authorization', '').replace('Bearer ', '', 1)
+    return hmac.compare_digest(supplied.encode(), ADMIN_TOKEN.encode())
+
+def admin_required_response():
+    return jsonify({'success': False, 'error': 'Admin token required'}), 403
+
+@app.route('/api/debug/traces', methods=['GET'])
+def get_traces():
+    """Recent request traces, newest first; ?slow=1, ?min_ms=, ?name= and ?limit= narrow them down"""
+    if not is_admin():
+        return admin_required_response()
+
+    min_ms = request.args.get('min_ms', type=float)
+    recorder = get_recorder()
+    traces = recorder.query(
+        slow_only=request.args.get('slow') in ('1', 'true'),
+        min_ms=min_ms,
+        name=request.args.get('name'),
+        limit=min(request.args.get('limit', 20, type=int), 200)
+    )
+    return jsonify({'success': True, 'count': len(traces), 'export_dropped': recorder.dropped, 'traces': traces})
+
+@app.route('/api/debug/profile', methods=['POST'])
+def run_profile():
+    """
+    Sample every thread for ?seconds= (default 10) at ?interval_ms= (default 5)
+
+    Returns collapsed stacks for flamegraph tools, or ?format=json with the
+    hottest functions too; ?allocations=1 adds a tracemalloc diff over the
+    same window.
+    """
+    if not is_admin():
+        return admin_required_response()
+
+    seconds = request.args.get('seconds', 10, type=float)
+    interval = request.args.get('interval_ms', 5, type=float) / 1000
+    if not math.isfinite(seconds) or not math.isfinite(interval):
+        return jsonify({'success': False, 'error': 'seconds and interval_ms must be finite numbers'}), 400
+    allocation = allocation_result = None
+    try:
+        if request.args.get('allocations') in ('1', 'true'):
+            allocation = AllocationProfile().start()
+        result = profiler.profile(seconds, interval)
+    except ProfilerBusy as e:
+        return jsonify({'success': False, 'error': str(e)}), 409
+    finally:
+        if allocation:
+            allocation_result = allocation.stop()
+
+    if request.args.get('format') == 'json':
+        return jsonify({
+            'success': True,
+            'seconds': result['seconds'],
+            'interval_ms': result['interval_ms'],
+            'samples': result['samples'],
+            'top_functions': top_functions(result['stacks']),
+            'collapsed': collapsed(result['stacks']),
+            'allocations': allocation_result
+        })
+    return Response(collapsed(result['stacks']), mimetype='text/plain', headers={
+        'Content-Disposition': f"attachment; filename=profile-{int(time.time())}.collapsed"
+    })
+
+@app.before_request
+def start_allocation_profile():
+    # Per-request tracemalloc snapshot, on request: X-Profile-Allocations: 1
+    if request.headers.get('X-Profile-Allocations') == '1' and is_admin():
+        try:
+            g.allocation_profile = AllocationProfile().start()
+        except ProfilerBusy:
+            logger.warning("⚠️ Allocation profile already running, not profiling %s", request.path)
+
+@app.teardown_request
+def finish_allocation_profile(exc=None):
+    if 'allocation_profile' in g:
+        allocation_profiles.append({
+            'trace_id': g.trace_span.trace_id if 'trace_span' in g else None,
+            'path': request.full_path.rstrip('?'),
+            'at': time.time(),
+            **g.allocation_profile.stop()
+        })
+
+@app.route('/api/debug/allocations', methods=['GET'])
+def get_allocation_profiles():
+    """Per-request allocation snapshots, newest first; ?trace_id= picks one"""
+    if not is_admin():
+        return admin_required_response()
+    trace_id = request.args.get('trace_id')
+    profiles = [profile for profile in reversed(allocation_profiles) if not trace_id or profile['trace_id'] == trace_id]
+    return jsonify({'success': True, 'profiles': profiles})
+
 if __name__ == '__main__':
     print("🚀 Starting Polymarket Trading Backend...")
     market_data = load_market_data()
@@ -1085,5 +1695,10 @@ if __name__ == '__main__':
     else:
         print("❌ Failed to load market data - check files exist!")
 
-    print(f"🌐 Backend running on http://127.0.0.1:5000")
-    app.run(debug=True, host='127.0.0.1', port=5000)
\ No newline at end of file
+    port = int(os.getenv("PORT", "5000"))
+    # With the debug reloader only the child process serves requests
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true' or os.getenv("FLASK_RELOAD", "1") == "0":
+        warmup.start()
+
+    print(f"🌐 Backend running on http://127.0.0.1:{port}")
+    app.run(debug=True, host='127.0.0.1', port=port, threaded=True, use_reloader=os.getenv("FLASK_RELOAD", "1") != "0")
\ No newline at end of file
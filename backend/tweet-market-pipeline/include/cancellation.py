@@ -0,0 +1,102 @@
+"""
+Cancellation of in-flight pipeline runs
+The backend registers each analysis under the client's request id; when
+the client gives up (closes the carousel, scrolls the tweet away) it
+cancels by that id, and the pipeline's asyncio task, along with every
+scoring task under it, is cancelled at its next await instead of spending
+more LLM calls on an answer nobody will read.
+"""
+import asyncio
+import contextvars
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Deque, Dict, Iterator, Optional, Set, Tuple
+
+from .logging_config import get_logger
+
+logger = get_logger(__name__)
+
+RECENTLY_CANCELLED = 500
+
+_current_scope: contextvars.ContextVar[Optional['CancelScope']] = contextvars.ContextVar('cancel_scope', default=None)
+
+
+class CancelScope:
+    """One cancellable run; tasks attached to it are cancelled together, from any thread"""
+
+    def __init__(self, request_id: str):
+        self.request_id = request_id
+        self.cancelled = False
+        self._tasks: Set[Tuple[asyncio.AbstractEventLoop, asyncio.Task]] = set()
+        self._lock = threading.Lock()
+
+    def attach(self) -> None:
+        """Make the running task cancellable through this scope"""
+        entry = (asyncio.get_running_loop(), asyncio.current_task())
+        with self._lock:
+            self._tasks.add(entry)
+            cancelled = self.cancelled
+        if cancelled:
+            entry[1].cancel()
+
+    def detach(self) -> None:
+        with self._lock:
+            self._tasks.discard((asyncio.get_running_loop(), asyncio.current_task()))
+
+    def cancel(self) -> None:
+        with self._lock:
+            self.cancelled = True
+            tasks = list(self._tasks)
+        for loop, task in tasks:
+            loop.call_soon_threadsafe(task.cancel)
+
+
+class CancelRegistry:
+    """
+    Runs in flight by request id
+
+    A cancel that arrives before its run registers (the client gave up
+    while the request was still queued) is remembered, and the run is
+    cancelled as soon as it starts.
+    """
+
+    def __init__(self):
+        self._scopes: Dict[str, CancelScope] = {}
+        self._cancelled: Deque[str] = deque(maxlen=RECENTLY_CANCELLED)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def register(self, request_id: str) -> Iterator[CancelScope]:
+        """``with registry.register(request_id) as scope:``; pipeline runs started inside are cancellable"""
+        scope = CancelScope(request_id)
+        with self._lock:
+            self._scopes[request_id] = scope
+            scope.cancelled = request_id in self._cancelled
+        token = _current_scope.set(scope)
+        try:
+            yield scope
+        finally:
+            _current_scope.reset(token)
+            with self._lock:
+                if self._scopes.get(request_id) is scope:
+                    del self._scopes[request_id]
+
+    def cancel(self, request_id: str) -> bool:
+        """True if a run was in flight and is now being cancelled"""
+        with self._lock:
+            scope = self._scopes.get(request_id)
+            if scope is None:
+                self._cancelled.append(request_id)
+                return False
+        logger.info("🛑 Cancelling analysis %s", request_id)
+        scope.cancel()
+        return True
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._scopes)
+
+
+def current_cancel_scope() -> Optional[CancelScope]:
+    return _current_scope.get()
@@ -4,7 +4,7 @@ Configuration module for the Tweet-Market Analysis Pipeline
 import os
 from typing import Optional
 from dotenv import load_dotenv
-from pydantic import BaseModel, field_validator
+from pydantic import BaseModel, field_validator, model_validator
 
 # Load environment variables
 load_dotenv()
@@ -12,9 +12,17 @@ load_dotenv()
 class PipelineConfig(BaseModel):
     """Pipeline configuration settings"""
     
+    # LLM provider: "cohere", or "local" for the offline heuristic stand-in
+    llm_provider: str = "cohere"
+    local_llm_latency_ms: float = 0.0
+    local_llm_jitter_ms: float = 0.0
+    
     # Cohere API settings
-    cohere_api_key: str
+    cohere_api_key: str = ""
     cohere_model: str = "command-r-plus"
+    cohere_rerank_model: str = "rerank-english-v3.0"
+    cohere_embed_model: str = "embed-english-v3.0"
+    cohere_base_url: str = "https://api.cohere.com"
     
     # Polymarket API settings
     polymarket_base_url: str = "https://gamma-api.polymarket.com"
@@ -33,13 +41,58 @@ class PipelineConfig(BaseModel):
     relevance_max_tokens: int = 200
     relevance_temperature: float = 0.2
     
-    @field_validator('cohere_api_key')
+    # Ranking prompt size: markets per call, input tokens per call, and
+    # characters of description kept in each market's summary
+    ranking_batch_size: int = 10
+    ranking_prompt_token_budget: int = 2000
+    market_summary_chars: int = 240
+    
+    # Resilience: hedge calls slower than the recent percentile, and fail
+    # fast (to the fallbacks) after consecutive failures
+    hedge_enabled: bool = True
+    hedge_percentile: float = 95.0
+    hedge_min_delay_ms: float = 250.0
+    hedge_min_samples: int = 20
+    circuit_failure_threshold: int = 5
+    circuit_reset_seconds: float = 30.0
+    
+    # Local pre-classifier: tweets scoring below the threshold skip the
+    # pipeline (and its LLM calls) as having no market angle
+    market_classifier_enabled: bool = True
+    market_classifier_threshold: float = 0.4
+    # Active events (by 24h volume) whose names seed the classifier's
+    # gazetteer at startup; 0 leaves it to learn from searches only
+    gazetteer_seed_events: int = 500
+    
+    # Sentiment scoring: "lexicon" scores locally (include/lexicon_sentiment.py)
+    # and saves an LLM call per tweet, "llm" asks the provider
+    sentiment_engine: str = "lexicon"
+    
+    # LLM spend estimates (USD per million tokens, command-r-plus list price)
+    llm_input_cost_per_million: float = 2.5
+    llm_output_cost_per_million: float = 10.0
+    
+    @field_validator('llm_provider')
     @classmethod
-    def validate_cohere_api_key(cls, v):
-        if not v or v == "your_cohere_api_key_here":
-            raise ValueError("COHERE_API_KEY must be set in environment or .env file")
+    def validate_llm_provider(cls, v):
+        if v not in ("cohere", "local"):
+            raise ValueError("LLM_PROVIDER must be 'cohere' or 'local'")
+        return v
+    
+    @field_validator('sentiment_engine')
+    @classmethod
+    def validate_sentiment_engine(cls, v):
+        if v not in ("lexicon", "llm"):
+            raise ValueError("SENTIMENT_ENGINE must be 'lexicon' or 'llm'")
         return v
     
+    @model_validator(mode='after')
+    def validate_cohere_api_key(self):
+        # The local provider never calls Cohere, so it runs without a key
+        if self.llm_provider == "cohere" and (not self.cohere_api_key or self.cohere_api_key == "your_cohere_api_key_here"):
+            raise ValueError("COHERE_API_KEY must be set in environment or .env file")
+        return self
+    
     @field_validator('top_markets_count')
     @classmethod
     def validate_top_markets_count(cls, v):
@@ -53,10 +106,29 @@ class PipelineConfig(BaseModel):
 
 # Global configuration instance
 config = PipelineConfig(
+    llm_provider=os.getenv("LLM_PROVIDER", "cohere").lower(),
+    local_llm_latency_ms=float(os.getenv("LOCAL_LLM_LATENCY_MS", "0")),
+    local_llm_jitter_ms=float(os.getenv("LOCAL_LLM_JITTER_MS", "0")),
     cohere_api_key=os.getenv("COHERE_API_KEY", ""),
+    cohere_base_url=os.getenv("COHERE_BASE_URL", "https://api.cohere.com"),
     polymarket_base_url=os.getenv("POLYMARKET_BASE_URL", "https://gamma-api.polymarket.com"),
     max_markets_to_fetch=int(os.getenv("MAX_MARKETS_TO_FETCH", "50")),
     top_markets_count=int(os.getenv("TOP_MARKETS_COUNT", "5")),
     request_timeout=int(os.getenv("REQUEST_TIMEOUT", "30")),
-    rate_limit_delay=float(os.getenv("RATE_LIMIT_DELAY", "0.1"))
+    rate_limit_delay=float(os.getenv("RATE_LIMIT_DELAY", "0.1")),
+    ranking_batch_size=int(os.getenv("RANKING_BATCH_SIZE", "10")),
+    ranking_prompt_token_budget=int(os.getenv("RANKING_PROMPT_TOKEN_BUDGET", "2000")),
+    market_summary_chars=int(os.getenv("MARKET_SUMMARY_CHARS", "240")),
+    hedge_enabled=os.getenv("HEDGE_ENABLED", "true").lower() in ("1", "true", "yes"),
+    hedge_percentile=float(os.getenv("HEDGE_PERCENTILE", "95")),
+    hedge_min_delay_ms=float(os.getenv("HEDGE_MIN_DELAY_MS", "250")),
+    hedge_min_samples=int(os.getenv("HEDGE_MIN_SAMPLES", "20")),
+    circuit_failure_threshold=int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5")),
+    circuit_reset_seconds=float(os.getenv("CIRCUIT_RESET_SECONDS", "30")),
+    market_classifier_enabled=os.getenv("MARKET_CLASSIFIER_ENABLED", "true").lower() in ("1", "true", "yes"),
+    market_classifier_threshold=float(os.getenv("MARKET_CLASSIFIER_THRESHOLD", "0.4")),
+    gazetteer_seed_events=int(os.getenv("GAZETTEER_SEED_EVENTS", "500")),
+    sentiment_engine=os.getenv("SENTIMENT_ENGINE", "lexicon").lower(),
+    llm_input_cost_per_million=float(os.getenv("LLM_INPUT_COST_PER_MILLION", "2.5")),
+    llm_output_cost_per_million=float(os.getenv("LLM_OUTPUT_COST_PER_MILLION", "10.0"))
 )
\ No newline at end of file
@@ -0,0 +1,26 @@
+"""
+Degraded analysis under load
+When the backend's analysis queue is deep, it runs new analyses degraded:
+no LLM calls, keyword search terms and lexical ranking, plus any relevance
+scores already cached for the tweet. Set per run through a contextvar, as
+cancel scopes are, so every stage sees it without threading a flag through.
+"""
+import contextvars
+from contextlib import contextmanager
+from typing import Iterator
+
+_degraded: contextvars.ContextVar[bool] = contextvars.ContextVar('analysis_degraded', default=False)
+
+
+@contextmanager
+def degraded_analysis(enabled: bool = True) -> Iterator[None]:
+    """``with degraded_analysis(flag):``; pipeline runs started inside skip the LLM when flag is set"""
+    token = _degraded.set(enabled)
+    try:
+        yield
+    finally:
+        _degraded.reset(token)
+
+
+def analysis_degraded() -> bool:
+    return _degraded.get()
@@ -5,14 +5,44 @@ Complete pipeline: Tweet → Sentiment Analysis → Polymarket Search → AI Ran
 """
 import asyncio
 import json
+import logging
 import os
 import sys
+import time
 from typing import Dict, Any, Optional
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from .sentiment_extractor import analyze_tweet_sentiment
 from .polymarket_client import PolymarketClient
 from .market_ranker import MarketRelevanceRanker, format_top_markets_json, format_original_api_with_metadata
+from .config import config
+from .logging_config import get_logger
+from .metrics import PIPELINE_STAGE_SECONDS, counter, gauge, timed
+from .fixtures import get_fixture_store
+from .cancellation import current_cancel_scope
+from .degradation import analysis_degraded
+from .market_classifier import classify_tweet
+from .token_usage import track_usage
+from .tracing import span
+
+logger = get_logger(__name__)
+
+PIPELINES_IN_FLIGHT = gauge('pipeline_in_flight', 'Tweets currently being processed by the pipeline')
+PIPELINES_CANCELLED = counter('pipeline_cancelled_total', 'Pipeline runs cancelled because the client gave up')
+PIPELINES_SKIPPED = counter('pipeline_skipped_total', 'Tweets the pre-classifier judged to have no market angle')
+
+
+def result_fingerprint(result: Dict[str, Any]) -> Dict[str, Any]:
+    """The parts of a pipeline result a replay run must reproduce exactly"""
+    if "error" in result:
+        return {"error": result["error"]}
+    analysis = result.get("tweet_analysis", {})
+    return {
+        "search_query": analysis.get("search_query"),
+        "key_topics": analysis.get("key_topics"),
+        "sentiment_score": analysis.get("sentiment_score"),
+        "ranking": [[item["market_id"], item["relevance_score"]] for item in result.get("relevance_metadata", [])]
+    }
 
 class EnhancedTweetMarketPipeline:
     """Complete AI-powered pipeline from tweet to ranked markets"""
@@ -20,6 +50,7 @@ class EnhancedTweetMarketPipeline:
     def __init__(self):
         self.polymarket_client = PolymarketClient()
         self.market_ranker = MarketRelevanceRanker()
+        self.fixtures = get_fixture_store()
     
     async def process_tweet_with_ranking(
         self, 
@@ -38,12 +69,74 @@ class EnhancedTweetMarketPipeline:
         Returns:
             Clean JSON with top N most relevant markets
         """
-        print(f"🚀 ENHANCED PIPELINE: {tweet_text}")
-        print("=" * 70)
-        
+        PIPELINES_IN_FLIGHT.inc()
+        started = time.perf_counter()
+        cancel_scope = current_cancel_scope()
+        try:
+            with span('pipeline.process_tweet', author=author, top_n=top_n) as pipeline_span, track_usage() as usage:
+                if cancel_scope:
+                    cancel_scope.attach()
+                try:
+                    result = await self._process_tweet_with_ranking(tweet_text, author, top_n)
+                except asyncio.CancelledError:
+                    if not (cancel_scope and cancel_scope.cancelled):
+                        raise
+                    # The client gave up; nothing downstream wants a result
+                    PIPELINES_CANCELLED.inc()
+                    logger.info("🛑 Pipeline cancelled after %.2fs", time.perf_counter() - started)
+                    pipeline_span.set(cancelled=True)
+                    return {"error": "Analysis cancelled", "cancelled": True}
+                finally:
+                    if cancel_scope:
+                        cancel_scope.detach()
+                pipeline_span.set(llm_calls=usage.calls, llm_tokens=usage.input_tokens + usage.output_tokens)
+        finally:
+            PIPELINES_IN_FLIGHT.dec()
+
+        logger.info("🪙 LLM usage: %d calls, %d input / %d output tokens (~$%.4f)",
+                    usage.calls, usage.input_tokens, usage.output_tokens, usage.cost_usd)
+        if "search_metadata" in result:
+            result["search_metadata"]["llm_usage"] = usage.to_dict()
+            if analysis_degraded():
+                result["search_metadata"]["degraded"] = True
+
+        if self.fixtures and self.fixtures.mode == 'record':
+            # Inputs and expected outcome, so a replay run can check itself
+            self.fixtures.record(
+                'pipeline', {'tweet_text': tweet_text, 'author': author, 'top_n': top_n},
+                result_fingerprint(result), time.perf_counter() - started
+            )
+        return result
+
+    async def _process_tweet_with_ranking(self, tweet_text: str, author: Optional[str], top_n: int) -> Dict[str, Any]:
+        logger.info("🚀 Pipeline start: %.80s", tweet_text)
+        started = time.perf_counter()
+        stage_timings: Dict[str, float] = {}
+
+        # Step 0: Memes, replies and personal posts stop here, before any LLM call
+        classification = None
+        if config.market_classifier_enabled:
+            with timed(PIPELINE_STAGE_SECONDS, stage='classify') as timer:
+                classification = classify_tweet(tweet_text)
+            stage_timings['classify'] = timer.elapsed
+            if not classification.relevant:
+                PIPELINES_SKIPPED.inc()
+                logger.info("⏭️ No market angle (score %.2f < %.2f), skipping analysis",
+                            classification.score, config.market_classifier_threshold)
+                skipped = format_original_api_with_metadata(
+                    tweet_text=tweet_text,
+                    sentiment_analysis={"search_query": "", "key_topics": [], "sentiment_score": None, "confidence": 0.0},
+                    top_markets=[]
+                )
+                skipped["search_metadata"]["skipped"] = True
+                skipped["search_metadata"]["market_classifier"] = classification.to_dict()
+                return skipped
+
         # Step 1: Sentiment Analysis with Cohere
-        print("📊 Step 1: Analyzing tweet sentiment...")
-        sentiment_result = await analyze_tweet_sentiment(tweet_text, author)
+        logger.debug("📊 Step 1: Analyzing tweet sentiment...")
+        with timed(PIPELINE_STAGE_SECONDS, stage='sentiment') as timer, span('pipeline.sentiment'):
+            sentiment_result = await analyze_tweet_sentiment(tweet_text, author)
+        stage_timings['sentiment'] = timer.elapsed
         
         sentiment_analysis = {
             "search_query": sentiment_result.search_query,
@@ -52,15 +145,15 @@ class EnhancedTweetMarketPipeline:
             "confidence": sentiment_result.confidence
         }
         
-        print(f"✅ Search Query: '{sentiment_analysis['search_query']}'")
-        print(f"🏷️  Key Topics: {sentiment_analysis['key_topics']}")
-        print()
+        logger.info("✅ Search query: '%s' | topics: %s", sentiment_analysis['search_query'], sentiment_analysis['key_topics'])
         
         # Step 2: Polymarket Search  
-        print("🔍 Step 2: Searching Polymarket for active, open markets accepting orders...")
-        market_results = await self.polymarket_client.search_active_markets(
-            sentiment_analysis["search_query"]
-        )
+        logger.debug("🔍 Step 2: Searching Polymarket for active, open markets accepting orders...")
+        with timed(PIPELINE_STAGE_SECONDS, stage='search') as timer, span('pipeline.search'):
+            market_results = await self.polymarket_client.search_active_markets(
+                sentiment_analysis["search_query"]
+            )
+        stage_timings['search'] = timer.elapsed
         
         if "error" in market_results:
             return {
@@ -70,37 +163,42 @@ class EnhancedTweetMarketPipeline:
             }
         
         markets_found = len(market_results) if isinstance(market_results, list) else 0
-        print(f"✅ Found {markets_found} active markets:")
+        logger.info("✅ Found %d active markets", markets_found)
         
-        # Display all found markets
-        if isinstance(market_results, list) and markets_found > 0:
-            print("📋 All markets found:")
+        # List all found markets when debugging
+        if logger.isEnabledFor(logging.DEBUG) and markets_found > 0:
             for i, market in enumerate(market_results, 1):
-                title = market.get("title", "No title")
-                ticker = market.get("ticker", "no-ticker")
-                print(f"   {i:2d}. {title} (ticker: {ticker})")
-        print()
+                logger.debug("   %2d. %s (ticker: %s)", i, market.get("title", "No title"), market.get("ticker", "no-ticker"))
         
         # Step 3: AI-Powered Market Ranking
-        print("🧠 Step 3: Ranking markets by relevance with AI...")
-        top_markets = await self.market_ranker.rank_markets(
-            tweet_text=tweet_text,
-            sentiment_analysis=sentiment_analysis,
-            market_results=market_results,
-            top_n=top_n
-        )
-        print()
+        logger.debug("🧠 Step 3: Ranking markets by relevance with AI...")
+        with timed(PIPELINE_STAGE_SECONDS, stage='ranking') as timer, span('pipeline.ranking'):
+            top_markets = await self.market_ranker.rank_markets(
+                tweet_text=tweet_text,
+                sentiment_analysis=sentiment_analysis,
+                market_results=market_results,
+                top_n=top_n
+            )
+        stage_timings['ranking'] = timer.elapsed
         
         # Step 4: Format Final Results (preserving original API format)
-        print("📋 Step 4: Formatting results (preserving original Polymarket API format)...")
-        final_result = format_original_api_with_metadata(
-            tweet_text=tweet_text,
-            sentiment_analysis=sentiment_analysis,
-            top_markets=top_markets
-        )
+        logger.debug("📋 Step 4: Formatting results (preserving original Polymarket API format)...")
+        with timed(PIPELINE_STAGE_SECONDS, stage='formatting') as timer, span('pipeline.formatting'):
+            final_result = format_original_api_with_metadata(
+                tweet_text=tweet_text,
+                sentiment_analysis=sentiment_analysis,
+                top_markets=top_markets
+            )
+        stage_timings['formatting'] = timer.elapsed
+
+        processing_time = time.perf_counter() - started
+        PIPELINE_STAGE_SECONDS.observe(processing_time, stage='total')
+        final_result["search_metadata"]["processing_time"] = round(processing_time, 4)
+        final_result["search_metadata"]["stage_timings"] = {stage: round(seconds, 4) for stage, seconds in stage_timings.items()}
+        if classification:
+            final_result["search_metadata"]["market_classifier"] = classification.to_dict()
         
-        print(f"✅ Pipeline complete! Returning top {len(top_markets)} most relevant markets")
-        print()
+        logger.info("✅ Pipeline complete in %.2fs, returning top %d markets", processing_time, len(top_markets))
         
         return final_result
 
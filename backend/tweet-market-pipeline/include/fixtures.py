@@ -0,0 +1,206 @@
+"""
+Record/replay fixtures for upstream calls
+Captures Cohere, Gamma and data-api request/response pairs during a real
+run and serves them back later, so the pipeline can be regression-tested
+for correctness and throughput without network access
+
+Configured from the environment:
+    FIXTURE_MODE    off (default) | record | replay
+    FIXTURE_PATH    fixture file; a .gz suffix compresses it
+    FIXTURE_TIMING  none (default) | original: replay with recorded latency
+"""
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional
+
+from .logging_config import get_logger
+
+logger = get_logger(__name__)
+
+MODES = ('off', 'record', 'replay')
+DEFAULT_FIXTURE_PATH = 'fixtures/upstream_calls.jsonl.gz'
+
+
+class FixtureMiss(LookupError):
+    """Replay found no recording for a request (the code or inputs drifted)"""
+
+
+def request_key(service: str, request: Dict[str, Any]) -> str:
+    canonical = json.dumps(request, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha1(f'{service}:{canonical}'.encode()).hexdigest()[:20]
+
+
+class FixtureStore:
+    """
+    Append-only JSONL of {service, key, request, response, elapsed_ms}
+
+    Identical requests recorded more than once are replayed in recorded
+    order (wrapping around), so a run that repeats a call sees the same
+    sequence of answers it did live.
+    """
+
+    def __init__(self, path: str, mode: str = 'replay', timing: str = 'none'):
+        if mode not in ('record', 'replay'):
+            raise ValueError(f"Fixture mode must be record or replay, got {mode!r}")
+        self.path = path
+        self.mode = mode
+        self.timing = timing
+        self._entries: Dict[str, List[Dict[str, Any]]] = {}
+        self._cursors: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        if mode == 'replay':
+            self._load()
+
+    def _open(self, mode: str):
+        if self.path.endswith('.gz'):
+            return gzip.open(self.path, mode + 't', encoding='utf-8')
+        return open(self.path, mode, encoding='utf-8')
+
+    def _load(self) -> None:
+        with self._open('r') as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._entries.setdefault(entry['key'], []).append(entry)
+        logger.info("📼 Loaded %d recorded calls from %s", sum(map(len, self._entries.values())), self.path)
+
+    def entries(self, service: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        for recorded in self._entries.values():
+            for entry in recorded:
+                if service is None or entry['service'] == service:
+                    yield entry
+
+    def record(self, service: str, request: Dict[str, Any], response: Any, elapsed: float) -> None:
+        entry = {
+            'service': service,
+            'key': request_key(service, request),
+            'request': request,
+            'response': response,
+            'elapsed_ms': round(elapsed * 1000, 1)
+        }
+        line = json.dumps(entry, separators=(',', ':'), default=str) + '\n'
+        with self._lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # Reopened per call: gzip members concatenate, so appends stay readable
+            with self._open('a') as f:
+                f.write(line)
+            self._entries.setdefault(entry['key'], []).append(entry)
+
+    def lookup(self, service: str, request: Dict[str, Any]) -> Dict[str, Any]:
+        key = request_key(service, request)
+        with self._lock:
+            recorded = self._entries.get(key)
+            if not recorded:
+                logger.warning("📼 No recording for %s request %s", service, key)
+                raise FixtureMiss(f"No recorded {service} call for request {key}")
+            cursor = self._cursors.get(key, 0)
+            self._cursors[key] = cursor + 1
+            return recorded[cursor % len(recorded)]
+
+    def _replay_delay(self, entry: Dict[str, Any]) -> float:
+        return entry['elapsed_ms'] / 1000 if self.timing == 'original' else 0.0
+
+    def call(self, service: str, request: Dict[str, Any], fn: Callable[[], Any]) -> Any:
+        """Run fn (record) or return its recorded response (replay)"""
+        if self.mode == 'replay':
+            entry = self.lookup(service, request)
+            delay = self._replay_delay(entry)
+            if delay:
+                time.sleep(delay)
+            return entry['response']
+
+        started = time.perf_counter()
+        response = fn()
+        self.record(service, request, response, time.perf_counter() - started)
+        return response
+
+    async def call_async(self, service: str, request: Dict[str, Any], fn: Callable[[], Awaitable[Any]]) -> Any:
+        """call() for coroutines; replay delays don't block the event loop"""
+        if self.mode == 'replay':
+            entry = self.lookup(service, request)
+            delay = self._replay_delay(entry)
+            if delay:
+                await asyncio.sleep(delay)
+            return entry['response']
+
+        started = time.perf_counter()
+        response = await fn()
+        self.record(service, request, response, time.perf_counter() - started)
+        return response
+
+
+_stores: Dict[str, FixtureStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_fixture_store() -> Optional[FixtureStore]:
+    """The store configured by FIXTURE_MODE/FIXTURE_PATH, or None when off"""
+    mode = os.getenv('FIXTURE_MODE', 'off').lower()
+    if mode == 'off':
+        return None
+    if mode not in MODES:
+        raise ValueError(f"FIXTURE_MODE must be one of {MODES}, got {mode!r}")
+    path = os.getenv('FIXTURE_PATH', DEFAULT_FIXTURE_PATH)
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = _stores[path] = FixtureStore(path, mode, os.getenv('FIXTURE_TIMING', 'none').lower())
+        return store
+
+
+def mount_fixtures(session: Any, store: FixtureStore, service: str) -> None:
+    """
+    Record or replay every call made through a requests.Session
+
+    Requests are keyed on method, path, query and If-None-Match (not the
+    host), so recordings from the live data-api replay against any base URL.
+    """
+    from requests.adapters import BaseAdapter
+    from requests.models import Response
+    from requests.structures import CaseInsensitiveDict
+    from urllib.parse import urlsplit, parse_qsl
+
+    class FixtureAdapter(BaseAdapter):
+        def __init__(self, wrapped):
+            super().__init__()
+            self.wrapped = wrapped
+
+        def send(self, request, **kwargs):
+            url = urlsplit(request.url)
+            key_request = {
+                'method': request.method,
+                'path': url.path,
+                'query': sorted(parse_qsl(url.query)),
+                'if_none_match': request.headers.get('If-None-Match')
+            }
+
+            def fetch():
+                live = self.wrapped.send(request, **kwargs)
+                return {
+                    'status': live.status_code,
+                    'headers': {name: live.headers[name] for name in ('ETag', 'Content-Type') if name in live.headers},
+                    'body': live.text
+                }
+
+            recorded = store.call(service, key_request, fetch)
+            response = Response()
+            response.status_code = recorded['status']
+            response.headers = CaseInsensitiveDict(recorded.get('headers', {}))
+            response._content = recorded['body'].encode('utf-8')
+            response.encoding = 'utf-8'
+            response.url = request.url
+            response.request = request
+            return response
+
+        def close(self):
+            self.wrapped.close()
+
+    for prefix in ('https://', 'http://'):
+        session.mount(prefix, FixtureAdapter(session.get_adapter(prefix + 'fixture')))
@@ -0,0 +1,165 @@
+"""
+Lexicon-based tweet sentiment
+Scores a tweet from -1.0 (bearish/negative) to 1.0 (bullish/positive)
+locally, in microseconds, in place of a model round trip: word and emoji
+valences tuned for market talk, with negation, intensifiers, "but" clauses,
+caps and exclamation emphasis, and direction words flipped after things
+that are bad when they rise ("inflation is coming down" is good news).
+The rules follow VADER (Hutto & Gilbert, 2014), cut down to what tweets
+about prediction markets need.
+"""
+import math
+import re
+from typing import Dict, List, Tuple
+
+# Word valences on VADER's -4..4 scale
+LEXICON: Dict[str, float] = {
+    # General
+    'good': 1.9, 'great': 3.1, 'best': 3.2, 'amazing': 2.8, 'awesome': 3.1, 'love': 3.2, 'excellent': 2.7,
+    'incredible': 2.4, 'insane': 1.2, 'huge': 1.3, 'nice': 1.8, 'happy': 2.7, 'strong': 2.3, 'easy': 1.9,
+    'easily': 1.4, 'finally': 0.8, 'win': 2.8, 'wins': 2.7, 'winning': 2.4, 'won': 2.7, 'victory': 2.8,
+    'success': 2.7, 'successful': 2.8, 'champion': 2.2, 'championship': 1.5, 'opportunity': 1.8,
+    'hope': 1.9, 'hopeful': 1.8, 'confident': 2.2, 'optimistic': 2.3, 'bad': -2.5, 'worst': -3.1,
+    'terrible': -2.1, 'awful': -2.0, 'horrible': -2.5, 'hate': -2.7, 'weak': -1.9, 'fail': -2.5,
+    'fails': -2.2, 'failed': -2.3, 'failure': -2.3, 'lose': -1.7, 'loses': -1.7, 'losing': -1.6, 'lost': -1.3,
+    'loss': -1.3, 'losses': -1.7, 'disaster': -3.1, 'brutal': -2.6, 'fear': -2.2, 'scared': -2.2,
+    'worried': -1.2, 'worry': -1.9, 'panic': -2.3, 'scam': -2.7, 'fraud': -2.8, 'corrupt': -3.0, 'lie': -1.6,
+    'lies': -1.8, 'delusional': -1.8, 'fantasy': -0.8, 'doubt': -1.5, 'unavoidable': -0.8,
+    'excuses': -0.8, 'bloodbath': -3.0, 'chaos': -2.6, 'dead': -3.3, 'insolvent': -2.8, 'friend': 2.2,
+    'smart': 1.7, 'genius': 1.9, 'idiot': -2.3, 'stupid': -2.4, 'clown': -1.7,
+    # Market talk
+    'bullish': 2.8, 'bull': 1.5, 'moon': 2.5, 'mooning': 2.8, 'pump': 1.6, 'pumping': 1.8, 'rally': 2.2,
+    'rallies': 2.2, 'surge': 2.1, 'surges': 2.1, 'soar': 2.4, 'soars': 2.4, 'breakout': 2.0, 'ath': 2.4,
+    'gains': 2.0, 'gain': 1.8, 'profit': 1.9, 'profits': 1.9, 'beat': 1.5, 'beats': 1.5, 'crush': 1.6,
+    'approve': 1.8, 'approved': 1.9, 'approval': 1.5, 'inflows': 1.4, 'record': 0.8, 'guaranteed': 1.8,
+    'definitely': 1.3, 'locked': 1.0, 'sweeping': 1.4, 'dominate': 1.8, 'incoming': 0.8,
+    'bearish': -2.8, 'bear': -1.5, 'dump': -2.0, 'dumping': -2.2, 'crash': -2.8, 'crashes': -2.8,
+    'crashing': -3.0, 'plunge': -2.6, 'plunges': -2.6, 'tank': -1.8, 'tanking': -2.4, 'rekt': -2.6,
+    'collapse': -2.8, 'recession': -2.0, 'depeg': -2.5, 'outflows': -1.4, 'selloff': -2.2, 'miss': -1.3,
+    'misses': -1.5, 'reject': -2.0, 'rejected': -2.2, 'shutdown': -1.6, 'war': -2.9, 'invasion': -2.6,
+    'indicted': -2.0, 'ban': -1.4, 'outbreak': -2.0, 'hurricane': -1.5,
+}
+PHRASES: Dict[str, float] = {
+    'to the moon': 3.0, 'all time high': 2.6, 'new high': 2.0, 'new low': -2.2, 'rate cut': 1.2,
+    'cut rates': 1.2, 'rate hike': -1.0, 'hike rates': -1.0, 'under control': 1.5, 'no brainer': 2.0,
+    'not financial advice': 0.0, 'mark my words': 0.8, 'no way': -1.5,
+}
+# Rising is good, falling is bad, unless the subject is something bad
+DIRECTION: Dict[str, float] = {
+    'up': 1.2, 'rise': 1.4, 'rises': 1.4, 'rising': 1.4, 'higher': 1.3, 'increase': 1.2, 'grow': 1.4,
+    'growth': 1.6, 'climb': 1.4, 'climbing': 1.4, 'jump': 1.3, 'jumped': 1.3, 'skyrocket': 2.2,
+    'down': -1.2, 'fall': -1.4, 'falls': -1.4, 'falling': -1.6, 'lower': -1.2, 'drop': -1.5, 'drops': -1.5,
+    'decline': -1.5, 'declining': -1.5, 'shrink': -1.3, 'slump': -2.0, 'sink': -1.5, 'cooling': -0.8,
+}
+BAD_WHEN_RISING = frozenset(('inflation', 'unemployment', 'recession', 'layoffs', 'deficit', 'debt', 'crime',
+                             'cases', 'deaths', 'yields', 'fear', 'volatility'))
+EMOJI: Dict[str, float] = {
+    '🚀': 2.5, '📈': 2.2, '🔥': 1.6, '💰': 1.6, '💎': 1.5, '🙌': 1.8, '🎉': 2.3, '✅': 1.2, '🏆': 2.2,
+    '💪': 1.8, '🐂': 1.5, '❤️': 2.4, '❤': 2.4, '🙏': 1.2, '😍': 2.6, '🥳': 2.4, '👏': 1.6, '🤑': 1.8,
+    '😀': 2.0, '😃': 2.0, '😁': 2.0, '😊': 2.0, '👍': 1.6, '🟢': 1.2, '🌕': 1.8,
+    '📉': -2.2, '💀': -1.5, '😱': -2.2, '🤡': -1.6, '😩': -1.8, '😡': -2.6, '🩸': -2.0, '🐻': -1.5,
+    '😭': -1.2, '😢': -2.0, '👎': -1.6, '🔴': -1.2, '⚠️': -1.0, '⚠': -1.0, '💩': -1.8, '🤮': -2.2,
+}
+NEGATIONS = frozenset(("not", "no", "never", "nobody", "nothing", "neither", "nor", "without", "hardly",
+                       "cannot", "cant", "can't", "dont", "don't", "doesn't", "doesnt", "isn't", "isnt",
+                       "won't", "wont", "wasn't", "aren't", "didn't", "shouldn't", "wouldn't", "ain't"))
+INTENSIFIERS: Dict[str, float] = {
+    'very': 0.3, 'really': 0.3, 'so': 0.25, 'super': 0.3, 'extremely': 0.4, 'incredibly': 0.4,
+    'totally': 0.3, 'absolutely': 0.4, 'completely': 0.3, 'insanely': 0.4, 'massively': 0.4, 'fast': 0.2,
+    'hugely': 0.4, 'way': 0.2, 'most': 0.3, 'slightly': -0.3, 'somewhat': -0.3, 'kinda': -0.3,
+    'barely': -0.4, 'maybe': -0.3, 'probably': -0.15, 'little': -0.3,
+}
+NEGATION_SCALE = -0.74
+NEGATION_WINDOW = 3
+CAPS_BOOST = 0.73
+BUT_BEFORE, BUT_AFTER = 0.5, 1.5
+EXCLAMATION_BOOST = 0.29
+NORMALIZATION_ALPHA = 15
+
+TOKEN = re.compile(r"[a-z][a-z0-9']*|[A-Z][A-Za-z0-9']*|\$[A-Za-z]+|[^\w\s]", re.UNICODE)
+CLAUSE_BREAK = frozenset('.?!;')
+
+
+def _tokens(text: str) -> List[Tuple[str, bool]]:
+    """(lowercased token, was all caps) pairs; emoji and punctuation come through as their own tokens"""
+    shouting = not text.isupper()  # Caps only count as emphasis in otherwise mixed-case text
+    tokens = []
+    for match in TOKEN.finditer(text.replace('‍', '')):
+        raw = match.group(0)
+        tokens.append((raw.lower(), shouting and len(raw) > 1 and raw.isupper() and raw.isalpha()))
+    return tokens
+
+
+# Phrases by first word, so a lookup only checks phrases the tweet could contain
+PHRASE_INDEX: Dict[str, List[Tuple[List[str], float]]] = {}
+for _phrase, _valence in PHRASES.items():
+    PHRASE_INDEX.setdefault(_phrase.split()[0], []).append((_phrase.split(), _valence))
+
+
+def _phrase_valences(words: List[str]) -> Dict[int, Tuple[float, int]]:
+    """Start index -> (valence, length) for every lexicon phrase in the token list"""
+    found = {}
+    for start, word in enumerate(words):
+        for parts, valence in PHRASE_INDEX.get(word, ()):
+            if words[start:start + len(parts)] == parts:
+                found[start] = (valence, len(parts))
+    return found
+
+
+def score_sentiment(text: str) -> float:
+    """Sentiment of the tweet in [-1.0, 1.0], rounded to two places"""
+    tokens = _tokens(text or '')
+    words = [token for token, _ in tokens]
+    phrases = _phrase_valences(words)
+    but_index = next((index for index, word in enumerate(words) if word == 'but'), None)
+
+    valences: List[float] = []
+    skip_until = -1
+    bad_subject = False
+    for index, (word, caps) in enumerate(tokens):
+        if word in CLAUSE_BREAK:
+            bad_subject = False
+        if word in BAD_WHEN_RISING:
+            bad_subject = True
+        if index <= skip_until:
+            continue
+
+        if index in phrases:
+            valence, length = phrases[index]
+            skip_until = index + length - 1
+        elif word in EMOJI:
+            valence = EMOJI[word]
+            if word == '📉' and bad_subject:
+                valence = -valence  # "Inflation coming down 📉"
+        elif word in DIRECTION:
+            valence = -DIRECTION[word] if bad_subject else DIRECTION[word]
+        elif word in LEXICON:
+            valence = LEXICON[word]
+        else:
+            continue
+        if valence == 0:
+            continue
+
+        if caps:
+            valence += CAPS_BOOST if valence > 0 else -CAPS_BOOST
+        # Up to three words back: intensifiers scale, negations flip and dampen
+        for distance in range(1, NEGATION_WINDOW + 1):
+            previous = index - distance
+            if previous < 0 or words[previous] in CLAUSE_BREAK:
+                break
+            if words[previous] in INTENSIFIERS:
+                boost = INTENSIFIERS[words[previous]] * (1 - 0.05 * (distance - 1))
+                valence += boost if valence > 0 else -boost
+            if words[previous] in NEGATIONS:
+                valence *= NEGATION_SCALE
+                break
+        if but_index is not None:
+            valence *= BUT_BEFORE if index < but_index else BUT_AFTER
+        valences.append(valence)
+
+    total = sum(valences)
+    if total:
+        emphasis = min(text.count('!'), 4) * EXCLAMATION_BOOST
+        total += emphasis if total > 0 else -emphasis
+    score = total / math.sqrt(total * total + NORMALIZATION_ALPHA)
+    return round(max(-1.0, min(1.0, score)), 2)
@@ -0,0 +1,223 @@
+"""
+LLM providers for the sentiment extractor and market ranker
+CohereProvider talks to the Cohere API; LocalProvider is a deterministic
+stand-in driven by keyword heuristics, with configurable latency, so the
+whole pipeline can run offline and reproducibly (CI, benchmarks, perf
+work). Selected by LLM_PROVIDER (config.llm_provider).
+"""
+import contextvars
+import hashlib
+import math
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from .config import config
+from .lexicon_sentiment import score_sentiment
+from .logging_config import get_logger
+from .prompt_builder import estimate_tokens
+from .token_usage import usage_from_response
+
+logger = get_logger(__name__)
+
+BATCH_CHAT_WORKERS = 8
+
+
+@dataclass
+class ChatResult:
+    text: str
+    input_tokens: int = 0
+    output_tokens: int = 0
+
+
+class LLMProvider:
+    """Chat, batch chat, rerank and embed; what the pipeline needs from a model"""
+
+    name = 'llm'
+    model = ''
+
+    def chat(self, message: str, **kwargs) -> ChatResult:
+        raise NotImplementedError
+
+    def batch_chat(self, requests: List[Dict[str, Any]]) -> List[ChatResult]:
+        """chat() for each request (message plus options), concurrently, results in order"""
+        if len(requests) <= 1:
+            return [self.chat(**request) for request in requests]
+        with ThreadPoolExecutor(max_workers=min(BATCH_CHAT_WORKERS, len(requests))) as pool:
+            # Each call keeps the caller's trace and usage scope
+            futures = [pool.submit(contextvars.copy_context().run, self.chat, **request) for request in requests]
+            return [future.result() for future in futures]
+
+    def rerank(self, query: str, documents: List[str], top_n: Optional[int] = None) -> List[Tuple[int, float]]:
+        """(document index, relevance score) pairs, best first"""
+        raise NotImplementedError
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        raise NotImplementedError
+
+
+class CohereProvider(LLMProvider):
+    name = 'cohere'
+
+    def __init__(self, api_key: Optional[str] = None):
+        import cohere
+        # Bounded, so a hung call fails (and counts against the circuit) instead of hanging
+        self.client = cohere.Client(api_key or config.cohere_api_key, base_url=config.cohere_base_url,
+                                    timeout=config.request_timeout)
+        self.model = config.cohere_model
+
+    def chat(self, message: str, **kwargs) -> ChatResult:
+        response = self.client.chat(model=self.model, message=message, **kwargs)
+        input_tokens, output_tokens = usage_from_response(response)
+        return ChatResult(response.text, input_tokens, output_tokens)
+
+    def rerank(self, query: str, documents: List[str], top_n: Optional[int] = None) -> List[Tuple[int, float]]:
+        response = self.client.rerank(model=config.cohere_rerank_model, query=query, documents=documents, top_n=top_n)
+        return [(result.index, result.relevance_score) for result in response.results]
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        response = self.client.embed(texts=texts, model=config.cohere_embed_model, input_type='search_document')
+        return [list(vector) for vector in response.embeddings]
+
+
+STOPWORDS = frozenset("""
+a about above after again all also am an and any are as at be because been before being below between both
+but by can could did do does doing down during each few for from further get gets going gonna got had has
+have having he her here hers him his how i if in into is it its just like me more most my no nor not now of
+off on once only or other our out over own really same she should so some such than that the their them then
+there these they this those through to too under until up very was we were what when where which while who
+whom why will with would you your yours yes yeah lol omg rt via amp new today tomorrow next time think
+""".split())
+EMBED_DIMENSIONS = 256
+
+
+def _keywords(text: str) -> List[str]:
+    """Distinct candidate keywords, most market-like first (names, tags, tickers, years)"""
+    scored: Dict[str, Tuple[float, int, str]] = {}
+    for position, match in enumerate(re.finditer(r"[#$@]?[A-Za-z][A-Za-z0-9'\-]*|\b(?:19|20)\d{2}\b", text)):
+        raw = match.group(0)
+        word = raw.lstrip('#$@').strip("'-")
+        lower = word.lower()
+        if len(word) < 2 or lower in STOPWORDS:
+            continue
+        score = 1.0
+        if raw[0] in '#$':
+            score += 2
+        if word[0].isupper() or word.isdigit():
+            score += 1.5
+        if word.isupper() and len(word) > 1:
+            score += 0.5
+        if len(word) > 6:
+            score += 0.5
+        current = scored.get(lower)
+        if current is None or score > current[0]:
+            scored[lower] = (score, current[1] if current else position, word)
+    ranked = sorted(scored.values(), key=lambda entry: (-entry[0], entry[1]))
+    return [word for _, _, word in ranked]
+
+
+def _terms(text: str) -> set:
+    return {word.lower().rstrip('s') for word in re.findall(r'[A-Za-z0-9]{2,}', text) if word.lower() not in STOPWORDS}
+
+
+def _quoted(label: str, prompt: str) -> str:
+    match = re.search(rf'{label}: "(.*?)"(?:\n| \|)', prompt, re.DOTALL)
+    return match.group(1) if match else ''
+
+
+class LocalProvider(LLMProvider):
+    """
+    Deterministic heuristic stand-in for the model
+
+    Answers the pipeline's prompt shapes (search query, topics, sentiment,
+    batched relevance) from keywords, term overlap and the lexicon
+    sentiment scorer. Same prompt, same
+    answer, same latency: latency_ms plus up to jitter_ms derived from a
+    hash of the prompt.
+    """
+
+    name = 'local'
+    model = 'local-heuristic'
+
+    def __init__(self, latency_ms: Optional[float] = None, jitter_ms: Optional[float] = None):
+        self.latency_ms = config.local_llm_latency_ms if latency_ms is None else latency_ms
+        self.jitter_ms = config.local_llm_jitter_ms if jitter_ms is None else jitter_ms
+
+    def _delay(self, prompt: str) -> None:
+        jitter = int(hashlib.sha1(prompt.encode()).hexdigest()[:8], 16) / 0xffffffff * self.jitter_ms
+        delay = (self.latency_ms + jitter) / 1000
+        if delay > 0:
+            time.sleep(delay)
+
+    def chat(self, message: str, **kwargs) -> ChatResult:
+        self._delay(message)
+        if 'RESPOND WITH ONE BLOCK PER MARKET' in message:
+            text = self._rank(message)
+        elif message.rstrip().endswith('Search query:'):
+            text = ' '.join(_keywords(_quoted('Tweet', message))[:3])
+        elif message.rstrip().endswith('Topics:'):
+            text = ', '.join(_keywords(_quoted('Tweet', message))[:5])
+        elif 'single number between -1.0 and 1.0' in message:
+            text = f'{score_sentiment(_quoted("Tweet", message)):.1f}'
+        else:
+            text = ' '.join(_keywords(message)[:5])
+        return ChatResult(text, estimate_tokens(message), estimate_tokens(text))
+
+    @staticmethod
+    def _rank(prompt: str) -> str:
+        topics = re.search(r'Key topics: (.*?) \|', prompt)
+        query_terms = _terms(_quoted('Search query', prompt)) | _terms(topics.group(1) if topics else '')
+        tweet_terms = _terms(_quoted('TWEET', prompt))
+        markets_section = prompt.split('MARKETS:', 1)[-1].split('RESPOND WITH', 1)[0]
+        parts = re.split(r'^\[(\d+)\]$', markets_section, flags=re.MULTILINE)
+
+        blocks = []
+        for number, summary in zip(parts[1::2], parts[2::2]):
+            market_terms = _terms(summary)
+            query_hits = query_terms & market_terms
+            tweet_hits = tweet_terms & market_terms
+            score = (0.6 * len(query_hits) / len(query_terms) if query_terms else 0.0) + \
+                    (0.4 * len(tweet_hits) / len(tweet_terms) if tweet_terms else 0.0)
+            matches = sorted(query_hits) + sorted(tweet_hits - query_hits)
+            blocks.append(f"[{number}]\nSCORE: {min(1.0, score):.2f}\n"
+                          f"EXPLANATION: Shares {len(query_hits | tweet_hits)} terms with the tweet.\n"
+                          f"KEY_MATCHES: {', '.join(matches[:3])}")
+        return '\n\n'.join(blocks)
+
+    def rerank(self, query: str, documents: List[str], top_n: Optional[int] = None) -> List[Tuple[int, float]]:
+        self._delay(query)
+        query_vector, *document_vectors = self.embed([query] + documents)
+        scores = [(index, round(sum(a * b for a, b in zip(query_vector, vector)), 4))
+                  for index, vector in enumerate(document_vectors)]
+        scores.sort(key=lambda pair: -pair[1])
+        return scores[:top_n] if top_n else scores
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        """Hashed bag of terms, L2-normalized"""
+        vectors = []
+        for text in texts:
+            vector = [0.0] * EMBED_DIMENSIONS
+            for term in _terms(text):
+                vector[int(hashlib.md5(term.encode()).hexdigest()[:8], 16) % EMBED_DIMENSIONS] += 1.0
+            norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+            vectors.append([value / norm for value in vector])
+        return vectors
+
+
+_providers: Dict[Tuple[str, Optional[str]], LLMProvider] = {}
+_providers_lock = threading.Lock()
+
+
+def get_provider(api_key: Optional[str] = None) -> LLMProvider:
+    """The provider configured by LLM_PROVIDER, shared per API key so clients are reused"""
+    name = config.llm_provider
+    with _providers_lock:
+        provider = _providers.get((name, api_key))
+        if provider is None:
+            provider = CohereProvider(api_key) if name == 'cohere' else LocalProvider()
+            _providers[(name, api_key)] = provider
+            logger.info("🤖 LLM provider: %s (%s)", provider.name, provider.model)
+        return provider
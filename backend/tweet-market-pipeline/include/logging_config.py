@@ -0,0 +1,73 @@
+"""
+Logging configuration for the pipeline and trading backend
+Leveled, queued logging so request threads never block on stdout, with
+sampled payload dumps for debugging
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import sys
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Optional
+
+LOG_FORMAT = "%(asctime)s %(levelname)-7s %(name)s: %(message)s"
+
+# Fraction of payload dumps written when DEBUG is on (they can be kilobytes each)
+PAYLOAD_SAMPLE_RATE = float(os.getenv("LOG_PAYLOAD_SAMPLE_RATE", "1.0"))
+PAYLOAD_MAX_CHARS = int(os.getenv("LOG_PAYLOAD_MAX_CHARS", "2000"))
+
+_listener: Optional[QueueListener] = None
+
+
+def setup_logging(level: Optional[str] = None) -> None:
+    """
+    Route all logging through a queue drained by one background thread
+
+    Level comes from LOG_LEVEL (default INFO). Safe to call more than once;
+    only the first call installs handlers.
+    """
+    global _listener
+    root = logging.getLogger()
+    if getattr(root, '_market_notes_configured', False):
+        return
+
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    log_queue: 'queue.Queue[logging.LogRecord]' = queue.Queue(-1)
+    _listener = QueueListener(log_queue, handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+    root.addHandler(QueueHandler(log_queue))
+    root.setLevel((level or os.getenv("LOG_LEVEL", "INFO")).upper())
+    root._market_notes_configured = True
+
+    # Chatty third-party loggers stay at WARNING unless asked for
+    for name in ('urllib3', 'httpx', 'httpcore', 'werkzeug', 'websocket'):
+        logging.getLogger(name).setLevel(os.getenv("THIRD_PARTY_LOG_LEVEL", "WARNING").upper())
+
+
+def get_logger(name: str) -> logging.Logger:
+    setup_logging()
+    return logging.getLogger(name)
+
+
+def log_payload(logger: logging.Logger, label: str, payload: Any, level: int = logging.DEBUG) -> None:
+    """
+    Dump a (possibly large) payload as JSON, only when it will be written
+
+    Nothing is serialized unless the logger is enabled for level and the
+    dump is picked by LOG_PAYLOAD_SAMPLE_RATE, so production cost is one
+    level check.
+    """
+    if not logger.isEnabledFor(level):
+        return
+    if PAYLOAD_SAMPLE_RATE < 1.0 and random.random() >= PAYLOAD_SAMPLE_RATE:
+        return
+    text = json.dumps(payload, indent=2, default=str)
+    if len(text) > PAYLOAD_MAX_CHARS:
+        text = text[:PAYLOAD_MAX_CHARS] + f"... ({len(text)} chars)"
+    logger.log(level, "%s:\n%s", label, text)
@@ -0,0 +1,244 @@
+"""
+Market-relevance pre-classifier
+Scores, in microseconds and without any model call, whether a tweet has a
+prediction-market angle: forecast language, numbers and dates, tickers,
+named entities and topic vocabulary, plus hits against a gazetteer of names
+and tags from the market catalog. Tweets scoring below the threshold skip
+the pipeline, so memes, replies and personal posts cost no LLM calls.
+"""
+import math
+import re
+import threading
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from .config import config
+from .llm_provider import STOPWORDS
+
+GAZETTEER_SIZE = 20000
+
+# Vocabulary of the topics markets exist for; the gazetteer adds the catalog's own names
+TOPIC_TERMS = frozenset("""
+election elections elect vote votes voting ballot poll polls polling primary primaries midterm midterms senate
+congress house governor president presidential presidency candidate nominee nomination impeach impeachment
+cabinet pardon indicted indictment convicted verdict trial court supreme ruling tariff tariffs sanctions
+shutdown veto bill legislation referendum parliament minister coalition resign resigns regime
+war ceasefire invasion invade invades nato nuclear missile treaty summit coup
+fed fomc rate rates cut cuts hike hikes inflation cpi recession gdp unemployment jobs payrolls yield yields
+treasury bond bonds stocks stock market nasdaq dow earnings revenue guidance ipo valuation cap
+bitcoin btc ethereum eth solana sol dogecoin doge xrp crypto token etf etfs halving stablecoin usdt tether
+depeg sec approval ath dip rally bullish bearish inflows outflows institutions
+championship champions final finals playoffs playoff title mvp spread cover seed draft trade signing
+nba nfl mlb nhl f1 ufc fifa superbowl oscars oscar grammys grammy emmys box office album
+launch launches release releases announce announces announcement orbit ceo vp ban banned
+oil gold silver barrel commodities movie grossing tournament season mvp
+hurricane storm earthquake wildfire temperature record outbreak pandemic measles cases
+""".split())
+TOPIC_PHRASES = (
+    'interest rate', 'rate cut', 'rate hike', 'basis points', 'all time high', 'market cap', 'super bowl',
+    'world cup', 'world series', 'stanley cup', 'champions league', 'white house', 'prime minister',
+    'supreme court', 'supreme leader', 'box office', 'album of the year', 'best picture', 'golden boot',
+    'government shutdown', 'debt ceiling', 'yield curve', 'on record', 's&p 500', 'home runs', 'step down',
+    'snap election', 'crypto winter', 'bull run', 'bull market', 'bear market', 'buy the dip',
+)
+
+FORECAST_PATTERNS = [re.compile(pattern, re.IGNORECASE) for pattern in (
+    r"\bwill\b(?! you\b)", r"\bwon'?t\b", r"\bgoing to\b", r"\bgonna\b", r"\bincoming\b", r"\bcalling it\b",
+    r"\bmark my words\b", r"\blocked in\b", r"\bguaranteed\b", r"\bdefinitely\b", r"\bno way\b(?!,? see)",
+    r"\bodds\b", r"\bchances?\b", r"\bpredict(ion|s)?\b", r"\bbet(ting)?\b", r"\blikely\b", r"\bunlikely\b",
+    r"\bnever\b.*\b(agree|happen|win|pass|survive)\b", r"\bflips?\b", r"\bclinch(es)?\b", r"\brepeat\b",
+    r"\bbefore (the )?(end|election|summer|spring|fall|winter|christmas|december|january|\d)",
+    r"\bby (the )?(end|summer|spring|fall|winter|christmas|q[1-4]|\d|january|february|march|april|may|june|"
+    r"july|august|september|october|november|december)", r"\bthis (year|season|cycle|quarter)\b",
+    r"\bnext (week|month|year|meeting|flight|quarter|season)\b", r"\bin 20\d\d\b", r"\bmy money is on\b",
+    r"\?$",
+    # Headline-style calls: "Kamala wins Pennsylvania", "Macron resigns", "S&P ends above 6000"
+    r"\b(wins|loses|beats|passes|hits|breaks|reaches|ends|resigns|crashes|pumps|dumps|spreads|flips|sweeps?)\b",
+    r"\b(above|below|over|under|past|to|at) \$?\d",
+)]
+QUANTITY = re.compile(r'[$€£]\s?\d|\d+(\.\d+)?\s?(%|k\b|m\b|bn\b|bps\b|x\b)|\b\d{2,}(,\d{3})+\b|\b(19|20)\d{2}\b')
+CASHTAG = re.compile(r'(?<![\w$])\$[A-Za-z]{2,6}\b')
+HASHTAG = re.compile(r'(?<!\w)#(\w+)')
+MENTION_REPLY = re.compile(r'^\s*(@\w+\s*)+')
+WORD = re.compile(r"[A-Za-z][A-Za-z0-9'\-]*")
+PUNCTUATION = re.compile(r"[^a-z0-9&' ]+")
+
+# First-person chatter and filler that marks personal posts and replies
+PERSONAL_TERMS = frozenset("""
+i i'm im me my mine myself lol lmao lmfao omg haha hahaha bro ngl tbh gm gn wish luck congrats thanks thank
+mom dad grandma uncle kids kid toddler cat dog kitten puppy plants coffee dinner lunch breakfast pizza pasta
+recipe gym run laundry apartment landlord vacation bed birthday friends grateful meme pov
+""".split())
+
+TITLE_NOISE = STOPWORDS | frozenset("""
+who what which how many much price hit end beat points matchup week largest highest first best out gone
+jail charges member successful reach reaches leave one two three more less than over under yes game games
+in-game trading before after by january february march april may june july august september october november
+december monday tuesday wednesday thursday friday saturday sunday
+""".split())
+
+# Hand-tuned on the tuning split of testing/classifier_labels.jsonl; testing/eval_classifier.py
+# reports the held-out split too
+BIAS = -2.4
+WEIGHTS = {
+    'topic': 1.2,
+    'gazetteer': 1.5,
+    'forecast': 1.0,
+    'quantity': 0.9,
+    'cashtag': 1.5,
+    'entity': 0.5,
+    'personal': -0.9,
+    'reply': -1.5,
+    'short': -1.5,
+}
+FEATURE_CAPS = {'topic': 3, 'gazetteer': 3, 'forecast': 3, 'quantity': 2, 'entity': 3, 'personal': 3}
+
+
+@dataclass
+class Classification:
+    score: float
+    relevant: bool
+    features: Dict[str, float] = field(default_factory=dict)
+    matches: List[str] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'score': round(self.score, 4), 'relevant': self.relevant, 'features': self.features,
+                'matches': self.matches}
+
+
+def _tokens(text: str) -> List[str]:
+    return [word.lower().strip("'-") for word in WORD.findall(text)]
+
+
+class Gazetteer:
+    """
+    Names and tags from markets the pipeline has seen (single words and
+    multi-word names), seeded from the catalog at startup and learned as
+    search results come in; least recently seen names first out past size
+    """
+
+    def __init__(self, size: int = GAZETTEER_SIZE):
+        self.size = size
+        self._names: 'OrderedDict[Tuple[str, ...], None]' = OrderedDict()
+        # Words of the names held, counted so evicting a name only drops words no other name uses
+        self._terms: Counter = Counter()
+        # Multi-word names by first word, so a lookup only checks names the tweet could contain
+        self._phrases: Dict[str, Set[Tuple[str, ...]]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    @staticmethod
+    def _names_in(text: str) -> Iterable[Tuple[str, ...]]:
+        """Runs of capitalized words ("Elon Musk", "Fed", "SpaceX Starship"), minus question filler"""
+        run: List[str] = []
+        for word in WORD.findall(text) + ['.']:
+            lower = word.lower()
+            if word[0].isupper() and lower not in TITLE_NOISE and len(word) > 2:
+                run.append(lower)
+                continue
+            if run:
+                yield tuple(run)
+            run = []
+
+    def add_markets(self, markets: Iterable[Dict[str, Any]]) -> int:
+        """Learn names from market titles, questions and tags; returns how many were new"""
+        names: Dict[Tuple[str, ...], None] = {}
+        for market in markets:
+            if not isinstance(market, dict):
+                continue
+            texts = [market.get('title') or '']
+            texts += [(question or {}).get('question') or '' for question in (market.get('markets') or [])[:5]
+                      if isinstance(question, dict)]
+            for tag in market.get('tags') or []:
+                label = (tag or {}).get('label', '') if isinstance(tag, dict) else ''
+                if label and label.lower() not in ('all', 'featured', 'recurring'):
+                    texts.append(label.title() if label.islower() else label)
+            for text in texts:
+                names.update(dict.fromkeys(self._names_in(text)))
+
+        added = 0
+        with self._lock:
+            for name in names:
+                if name in self._names:
+                    self._names.move_to_end(name)
+                    continue
+                self._names[name] = None
+                self._terms.update(name)
+                if len(name) > 1:
+                    self._phrases.setdefault(name[0], set()).add(name)
+                added += 1
+            while len(self._names) > self.size:
+                self._forget(self._names.popitem(last=False)[0])
+        return added
+
+    def _forget(self, name: Tuple[str, ...]) -> None:
+        self._terms.subtract(name)
+        for word in name:
+            if self._terms[word] <= 0:
+                del self._terms[word]
+        if len(name) > 1:
+            phrases = self._phrases.get(name[0])
+            if phrases is not None:
+                phrases.discard(name)
+                if not phrases:
+                    del self._phrases[name[0]]
+
+    def hits(self, tokens: List[str]) -> List[str]:
+        found = []
+        with self._lock:
+            for index, token in enumerate(tokens):
+                if token in self._terms and token not in found:
+                    found.append(token)
+                for phrase in self._phrases.get(token, ()):
+                    if tuple(tokens[index:index + len(phrase)]) == phrase:
+                        found.append(' '.join(phrase))
+        return found
+
+
+gazetteer = Gazetteer()
+
+
+def extract_features(text: str, catalog: Optional[Gazetteer] = None) -> Tuple[Dict[str, float], List[str]]:
+    """Raw feature counts (before caps and weights) and the topic/catalog words that matched"""
+    catalog = gazetteer if catalog is None else catalog
+    tokens = _tokens(text)
+    content = [token for token in tokens if token not in STOPWORDS and token not in PERSONAL_TERMS]
+    lowered = f" {' '.join(PUNCTUATION.sub(' ', text.lower()).split())} "
+
+    topic = [token for token in dict.fromkeys(tokens) if token in TOPIC_TERMS]
+    topic += [phrase for phrase in TOPIC_PHRASES if f' {phrase} ' in lowered]
+    topic += [tag.lower() for tag in HASHTAG.findall(text) if tag.lower() in TOPIC_TERMS and tag.lower() not in topic]
+    catalog_hits = [hit for hit in catalog.hits(tokens) if hit not in topic]
+
+    # Capitalized words past the start of a sentence, a cheap named-entity signal
+    entities = set()
+    for sentence in re.split(r'(?<=[.!?])\s+', MENTION_REPLY.sub('', text)):
+        for word in WORD.findall(sentence)[1:]:
+            if word[0].isupper() and word.lower() not in STOPWORDS and word.lower() not in PERSONAL_TERMS:
+                entities.add(word.lower())
+
+    features = {
+        'topic': len(topic),
+        'gazetteer': len(catalog_hits),
+        'forecast': sum(1 for pattern in FORECAST_PATTERNS if pattern.search(text.strip())),
+        'quantity': len(QUANTITY.findall(text)),
+        'cashtag': 1 if CASHTAG.search(text) else 0,
+        'entity': len(entities),
+        'personal': sum(1 for token in tokens if token in PERSONAL_TERMS),
+        'reply': 1 if MENTION_REPLY.match(text) and len(content) < 8 else 0,
+        # "Bitcoin to 100k" is short but all signal; only penalize short tweets with no market vocabulary
+        'short': 1 if len(content) < 3 and not (topic or catalog_hits or CASHTAG.search(text)) else 0,
+    }
+    return features, topic + catalog_hits
+
+
+def classify_tweet(text: str, threshold: Optional[float] = None, catalog: Optional[Gazetteer] = None) -> Classification:
+    """Probability-like score that the tweet has a market angle, and whether it clears the threshold"""
+    threshold = config.market_classifier_threshold if threshold is None else threshold
+    features, matches = extract_features(text, catalog)
+    logit = BIAS + sum(WEIGHTS[name] * min(value, FEATURE_CAPS.get(name, value)) for name, value in features.items())
+    score = 1 / (1 + math.exp(-logit))
+    return Classification(score, score >= threshold, {name: value for name, value in features.items() if value}, matches)
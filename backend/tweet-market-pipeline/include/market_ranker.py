@@ -4,11 +4,29 @@ Market Relevance Ranker
 Uses Cohere AI to rank Polymarket results against tweet sentiment analysis
 """
 import asyncio
+import hashlib
 import json
-from typing import List, Dict, Any, Optional
-from dataclasses import dataclass
-import cohere
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple
+from dataclasses import dataclass, replace
 from .config import config
+from .logging_config import get_logger
+from .metrics import counter, outbound
+from .fixtures import get_fixture_store
+from .prompt_builder import RankingPrompt, build_ranking_prompts, split_ranking_response
+from .llm_provider import LLMProvider, get_provider
+from .degradation import analysis_degraded
+from .resilience import get_resilience
+from .token_usage import record_usage
+from .tracing import span
+
+logger = get_logger(__name__)
+
+RELEVANCE_CACHE_SIZE = 5000
+RELEVANCE_CACHE_TTL = 600.0
+RELEVANCE_CACHE_LOOKUPS = counter('relevance_cache_lookups_total', 'Relevance score cache lookups', ('result',))
 
 @dataclass
 class MarketRelevanceScore:
@@ -20,13 +38,71 @@ class MarketRelevanceScore:
     key_matches: List[str]
     market_data: Dict[str, Any]
 
+class RelevanceCache:
+    """
+    Model relevance scores by tweet and market (keyword fallbacks aren't kept)
+
+    Lets a re-opened tweet, or one whose first analysis was cancelled
+    part-way, reuse the batches that already came back.
+    """
+
+    def __init__(self, size: int = RELEVANCE_CACHE_SIZE, ttl: float = RELEVANCE_CACHE_TTL):
+        self.size = size
+        self.ttl = ttl
+        self._scores: 'OrderedDict[Tuple[str, str, str], Tuple[float, MarketRelevanceScore]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(tweet_text: str, market: Dict[str, Any]) -> Tuple[str, str, str]:
+        tweet_key = hashlib.sha1(' '.join(tweet_text.lower().split()).encode()).hexdigest()[:16]
+        return tweet_key, str(market.get("id", "")), str(market.get("updatedAt", ""))
+
+    def get(self, tweet_text: str, market: Dict[str, Any]) -> Optional[MarketRelevanceScore]:
+        key = self._key(tweet_text, market)
+        with self._lock:
+            entry = self._scores.get(key)
+            if entry is None or time.monotonic() - entry[0] > self.ttl:
+                RELEVANCE_CACHE_LOOKUPS.inc(result='miss')
+                return None
+            self._scores.move_to_end(key)
+        RELEVANCE_CACHE_LOOKUPS.inc(result='hit')
+        # Today's market data (prices move), yesterday's relevance judgement
+        return replace(entry[1], market_data=market)
+
+    def put(self, tweet_text: str, score: MarketRelevanceScore) -> None:
+        key = self._key(tweet_text, score.market_data)
+        with self._lock:
+            self._scores[key] = (time.monotonic(), score)
+            self._scores.move_to_end(key)
+            while len(self._scores) > self.size:
+                self._scores.popitem(last=False)
+
+
+relevance_cache = RelevanceCache()
+
 class MarketRelevanceRanker:
     """Ranks markets by relevance to tweet sentiment using Cohere AI"""
     
-    def __init__(self, api_key: Optional[str] = None):
-        self.api_key = api_key or config.cohere_api_key
-        self.client = cohere.Client(self.api_key)
-        self.model = config.cohere_model
+    def __init__(self, api_key: Optional[str] = None, provider: Optional[LLMProvider] = None):
+        self.provider = provider or get_provider(api_key)
+        self.model = self.provider.model
+        self.fixtures = get_fixture_store()
+        self.resilience = get_resilience(self.provider.name)
+
+    def _chat(self, operation: str, **kwargs) -> str:
+        """One LLM chat call; returns the response text (recorded/replayed when fixtures are on)"""
+        request = {'model': self.model, **kwargs}
+
+        def call():
+            with outbound(self.provider.name, operation):
+                result = self.resilience.call(operation, lambda: self.provider.chat(**kwargs))
+            return {'text': result.text, 'input_tokens': result.input_tokens, 'output_tokens': result.output_tokens}
+
+        reply = self.fixtures.call(self.provider.name, request, call) if self.fixtures else call()
+        if isinstance(reply, str):
+            return reply  # Recorded before token accounting
+        record_usage('ranking', operation, reply['input_tokens'], reply['output_tokens'])
+        return reply['text']
     
     async def rank_markets(
         self, 
@@ -50,30 +126,37 @@ class MarketRelevanceRanker:
         if not market_results:
             return []
         
-        print(f"🧠 Ranking {len(market_results)} markets for relevance...")
+        logger.debug("🧠 Ranking %d markets for relevance...", len(market_results))
         
         # Extract key info for ranking
         search_query = sentiment_analysis.get("search_query", "")
         key_topics = sentiment_analysis.get("key_topics", [])
         sentiment_score = sentiment_analysis.get("sentiment_score", 0.0)
         
-        # Rank each market
+        # Scores from an earlier (possibly cancelled) analysis of the same tweet
         scored_markets = []
-        
+        unscored = []
         for market in market_results:
-            try:
-                score = await self._score_market_relevance(
-                    tweet_text=tweet_text,
-                    search_query=search_query,
-                    key_topics=key_topics,
-                    sentiment_score=sentiment_score,
-                    market=market
-                )
-                scored_markets.append(score)
-                
-            except Exception as e:
-                print(f"⚠️  Error scoring market {market.get('id', 'unknown')}: {e}")
-                continue
+            cached = relevance_cache.get(tweet_text, market)
+            if cached:
+                scored_markets.append(cached)
+            else:
+                unscored.append(market)
+        if scored_markets:
+            logger.debug("🧠 %d markets already scored for this tweet", len(scored_markets))
+        
+        # Rank the rest in as few budgeted prompts as possible, all at once
+        prompts = build_ranking_prompts(tweet_text, search_query, key_topics, sentiment_score, unscored)
+        logger.debug("🧠 %d markets packed into %d ranking prompts", len(unscored), len(prompts))
+        
+        async def score_batch(ranking_prompt: RankingPrompt) -> List[MarketRelevanceScore]:
+            with span('ranker.score_batch', markets=len(ranking_prompt.markets),
+                      estimated_tokens=ranking_prompt.estimated_tokens):
+                return await self._score_market_batch(ranking_prompt, tweet_text, search_query, key_topics)
+        
+        # Cancelling the pipeline cancels every batch still waiting; calls already sent cache their scores when they return
+        for scores in await asyncio.gather(*(score_batch(ranking_prompt) for ranking_prompt in prompts)):
+            scored_markets.extend(scores)
         
         # Sort by relevance score (highest first)
         scored_markets.sort(key=lambda x: x.relevance_score, reverse=True)
@@ -81,98 +164,74 @@ class MarketRelevanceRanker:
         # Return top N
         top_markets = scored_markets[:top_n]
         
-        print(f"✅ Ranked markets - Top {len(top_markets)} most relevant:")
+        logger.info("✅ Ranked markets - Top %d most relevant", len(top_markets))
         for i, market in enumerate(top_markets, 1):
-            print(f"   {i}. {market.market_title} (Score: {market.relevance_score:.2f})")
+            logger.debug("   %d. %s (Score: %.2f)", i, market.market_title, market.relevance_score)
         
         return top_markets
     
-    async def _score_market_relevance(
+    async def _score_market_batch(
         self,
+        ranking_prompt: RankingPrompt,
         tweet_text: str,
         search_query: str,
-        key_topics: List[str],
-        sentiment_score: float,
-        market: Dict[str, Any]
-    ) -> MarketRelevanceScore:
-        """Score a single market for relevance"""
+        key_topics: List[str]
+    ) -> List[MarketRelevanceScore]:
+        """Score every market in one prompt; markets the reply skips get fallback scores"""
+        markets = ranking_prompt.markets
         
-        # Extract market info
-        market_id = market.get("id", "")
-        market_title = market.get("title", "")
-        market_description = market.get("description", "")[:500]  # Limit description length
-        market_tags = [tag.get("label", "") for tag in market.get("tags", [])]
-        
-        # Get first market question if available
-        markets_data = market.get("markets", [])
-        first_market_question = ""
-        if markets_data:
-            first_market_question = markets_data[0].get("question", "")
-        
-        # Create prompt for Cohere
-        prompt = f"""
-Analyze how relevant this prediction market is to the original tweet and sentiment analysis.
-
-ORIGINAL TWEET: "{tweet_text}"
-
-SENTIMENT ANALYSIS:
-- Search Query: "{search_query}"  
-- Key Topics: {key_topics}
-- Sentiment Score: {sentiment_score} (where 1.0 = very positive, -1.0 = very negative)
-
-PREDICTION MARKET:
-- Title: "{market_title}"
-- Question: "{first_market_question}"
-- Description: "{market_description}"
-- Tags: {market_tags}
-
-TASK: Rate the relevance of this market to the original tweet on a scale of 0.0 to 1.0:
-- 1.0 = Perfect match (market directly relates to tweet's prediction/topic)
-- 0.8-0.9 = High relevance (market relates to main theme)
-- 0.6-0.7 = Moderate relevance (market relates to some aspects)
-- 0.4-0.5 = Low relevance (market somewhat relates)
-- 0.0-0.3 = No relevance (market unrelated to tweet)
-
-Consider:
-1. Does the market topic match the tweet's subject matter?
-2. Do the key topics from sentiment analysis align with market tags/content?
-3. Would someone interested in the tweet's topic find this market useful?
-4. Is the market's timeframe relevant to the tweet's context?
-
-RESPOND WITH EXACTLY THIS FORMAT:
-SCORE: [0.0-1.0]
-EXPLANATION: [1-2 sentence explanation of why this score was given]
-KEY_MATCHES: [comma-separated list of 2-3 matching elements between tweet and market]
-"""
-
+        if not self.resilience.available():
+            logger.info("🔌 %s circuit open, keyword-scoring %d markets", self.provider.name, len(markets))
+            return [self._fallback_score_market(tweet_text, search_query, key_topics, market) for market in markets]
+        if analysis_degraded():
+            logger.info("🐢 Analysis degraded, keyword-scoring %d markets", len(markets))
+            return [self._fallback_score_market(tweet_text, search_query, key_topics, market) for market in markets]
+        
+        model_scores: Dict[int, MarketRelevanceScore] = {}
         try:
-            response = self.client.chat(
-                message=prompt,
-                model=self.model,
-                max_tokens=config.relevance_max_tokens,
-                temperature=config.relevance_temperature
-            )
-            
-            response_text = response.text.strip()
-            
-            # Parse the response
-            score, explanation, key_matches = self._parse_relevance_response(response_text)
-            
-            return MarketRelevanceScore(
-                market_id=market_id,
-                market_title=market_title,
+            model_scores = await asyncio.to_thread(self._model_scores, ranking_prompt, tweet_text)
+        except Exception as e:
+            logger.warning("⚠️  Error getting relevance scores: %s", e)
+        
+        if len(model_scores) < len(markets):
+            logger.warning("⚠️  Ranking reply covered %d of %d markets, using fallback for the rest", len(model_scores), len(markets))
+        
+        # Fallback scoring based on simple keyword matching for markets the reply skipped
+        return [
+            model_scores[index] if index in model_scores
+            else self._fallback_score_market(tweet_text, search_query, key_topics, market)
+            for index, market in enumerate(markets)
+        ]
+    
+    def _model_scores(self, ranking_prompt: RankingPrompt, tweet_text: str) -> Dict[int, MarketRelevanceScore]:
+        """
+        Model scores for one prompt's markets, by index, cached as they're parsed
+
+        Runs on a worker thread, and caches there: cancelling the analysis
+        can't stop a call already under way, so its scores are kept for the
+        next analysis of the tweet instead of being dropped with the task.
+        """
+        markets = ranking_prompt.markets
+        response_text = self._chat(
+            'relevance',
+            message=ranking_prompt.prompt,
+            max_tokens=config.relevance_max_tokens * len(markets),
+            temperature=config.relevance_temperature
+        ).strip()
+        scores: Dict[int, MarketRelevanceScore] = {}
+        for index, block in split_ranking_response(response_text, len(markets)).items():
+            score, explanation, key_matches = self._parse_relevance_response(block)
+            market = markets[index]
+            scores[index] = MarketRelevanceScore(
+                market_id=market.get("id", ""),
+                market_title=market.get("title", ""),
                 relevance_score=score,
                 relevance_explanation=explanation,
                 key_matches=key_matches,
                 market_data=market
             )
-            
-        except Exception as e:
-            print(f"⚠️  Error getting relevance score: {e}")
-            # Fallback scoring based on simple keyword matching
-            return self._fallback_score_market(
-                tweet_text, search_query, key_topics, market
-            )
+            relevance_cache.put(tweet_text, scores[index])
+        return scores
     
     def _parse_relevance_response(self, response_text: str) -> tuple[float, str, List[str]]:
         """Parse Cohere's relevance scoring response"""
@@ -0,0 +1,305 @@
+"""
+Process-local metrics for the pipeline and trading backend
+Counters, gauges and latency histograms rendered in the Prometheus text
+exposition format at /api/metrics
+"""
+import asyncio
+import bisect
+import functools
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .tracing import child_span, record_span
+
+# Seconds; spans a cache hit (ms) up to a slow multi-call Cohere ranking
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str]) -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class _Metric:
+    kind = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> List[Tuple[str, LabelValues, float]]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        for suffix, values, value in self.samples():
+            names = self.labelnames + (('le',) if suffix == '_bucket' else ())
+            lines.append(f'{self.name}{suffix}{_format_labels(names, values)} {_format_value(value)}')
+        return lines
+
+
+class _ValueMetric(_Metric):
+    """One number per label set, either stored or read from a callback at scrape time"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._functions: Dict[LabelValues, Callable[[], float]] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def set_function(self, fn: Callable[[], float], **labels) -> None:
+        """Read the value from fn at scrape time (e.g. a cache's own hit count)"""
+        key = self._key(labels)
+        with self._lock:
+            self._functions[key] = fn
+
+    def get(self, **labels) -> float:
+        key = self._key(labels)
+        if key in self._functions:
+            return self._functions[key]()
+        return self._values.get(key, 0)
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+            functions = dict(self._functions)
+        samples = [('', key, value) for key, value in values.items()]
+        for key, fn in functions.items():
+            try:
+                samples.append(('', key, float(fn())))
+            except Exception:
+                continue  # A broken callback must not take the whole scrape down
+        return samples
+
+
+class Counter(_ValueMetric):
+    kind = 'counter'
+
+
+class Gauge(_ValueMetric):
+    kind = 'gauge'
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: Iterable[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts..., +Inf count], sum
+        self._counts: Dict[LabelValues, List[int]] = {}
+        self._sums: Dict[LabelValues, float] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.get(key)
+            if counts is None:
+                counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+                self._sums[key] = 0.0
+            counts[index] += 1
+            self._sums[key] += value
+
+    def time(self, **labels) -> 'timed':
+        return timed(self, **labels)
+
+    def count(self, **labels) -> int:
+        return sum(self._counts.get(self._key(labels), ()))
+
+    def samples(self):
+        samples = []
+        with self._lock:
+            for key, counts in self._counts.items():
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float('inf'),), counts):
+                    cumulative += count
+                    samples.append(('_bucket', key + (_format_value(bound),), cumulative))
+                samples.append(('_sum', key, self._sums[key]))
+                samples.append(('_count', key, cumulative))
+        return samples
+
+
+class timed:
+    """
+    Observe wall time into a histogram
+
+    Works as a context manager (``with timed(h, stage='search') as t``; the
+    duration is then on ``t.elapsed``) or as a decorator on plain and async
+    functions. Time is observed whether or not the body raises.
+    """
+
+    def __init__(self, histogram: Histogram, **labels):
+        self.histogram = histogram
+        self.labels = labels
+        self.elapsed: Optional[float] = None
+        self._started = 0.0
+
+    def __enter__(self) -> 'timed':
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.elapsed = time.perf_counter() - self._started
+        self.histogram.observe(self.elapsed, **self.labels)
+
+    def __call__(self, fn: Callable) -> Callable:
+        histogram, labels = self.histogram, self.labels
+
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with timed(histogram, **labels):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with timed(histogram, **labels):
+                return fn(*args, **kwargs)
+        return wrapper
+
+
+class Registry:
+    """Named metrics, created once and shared by every module that asks"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, documentation: str, labelnames: Iterable[str], **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, labelnames, **kwargs)
+            elif not isinstance(metric, cls) or metric.labelnames != tuple(labelnames):
+                raise ValueError(f"Metric {name} already registered with a different type or labels")
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                  buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+counter = REGISTRY.counter
+gauge = REGISTRY.gauge
+histogram = REGISTRY.histogram
+
+# Shared across modules so one scrape shows every upstream side by side
+PIPELINE_STAGE_SECONDS = histogram(
+    'pipeline_stage_seconds', 'Time spent in each tweet pipeline stage', ('stage',))
+OUTBOUND_REQUEST_SECONDS = histogram(
+    'outbound_request_seconds', 'Latency of calls to upstream APIs', ('service', 'operation'))
+OUTBOUND_REQUEST_ERRORS = counter(
+    'outbound_request_errors_total', 'Upstream API calls that raised or returned an error', ('service', 'operation'))
+
+
+class outbound:
+    """
+    Time one upstream call and count it as an error if the body raises
+
+    ``with outbound('cohere', 'relevance'):`` around the network call only,
+    so parsing and fallbacks are not billed to the upstream.
+    """
+
+    def __init__(self, service: str, operation: str):
+        self.service = service
+        self.operation = operation
+        self._timer = timed(OUTBOUND_REQUEST_SECONDS, service=service, operation=operation)
+        self._span = None
+
+    def __enter__(self) -> 'outbound':
+        # Traced as a child of the current request, if there is one
+        self._span = child_span(f'{self.service}.{self.operation}')
+        if self._span:
+            self._span.__enter__()
+        self._timer.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self._timer.__exit__(exc_type, exc, tb)
+        if exc_type is not None:
+            self.error()
+        if self._span:
+            self._span.__exit__(exc_type, exc, tb)
+
+    def error(self) -> None:
+        OUTBOUND_REQUEST_ERRORS.inc(service=self.service, operation=self.operation)
+        if self._span:
+            self._span.set(error=True)
+
+    @property
+    def elapsed(self) -> Optional[float]:
+        return self._timer.elapsed
+
+
+def observe_session(session: Any, service: str) -> None:
+    """
+    Time every call made through a requests.Session
+
+    Uses a response hook, so latency is time to response headers
+    (``response.elapsed``) and the operation label is the last URL path
+    segment. Calls that never get a response (timeouts, refused
+    connections) are not seen here.
+    """
+    def hook(response, *args, **kwargs):
+        operation = response.request.path_url.split('?', 1)[0].rstrip('/').rsplit('/', 1)[-1] or '/'
+        OUTBOUND_REQUEST_SECONDS.observe(response.elapsed.total_seconds(), service=service, operation=operation)
+        if response.status_code >= 400:
+            OUTBOUND_REQUEST_ERRORS.inc(service=service, operation=operation)
+        record_span(f'{service}.{operation}', response.elapsed.total_seconds() * 1000, status=response.status_code)
+        return response
+
+    session.hooks.setdefault('response', []).append(hook)
@@ -9,6 +9,14 @@ import json
 from typing import List, Dict, Any, Optional
 from urllib.parse import urlencode
 from .config import config
+from .logging_config import get_logger
+from .metrics import outbound
+from .fixtures import get_fixture_store
+from .market_classifier import gazetteer
+from .prompt_builder import summarize_markets
+from .resilience import get_resilience
+
+logger = get_logger(__name__)
 
 class PolymarketClient:
     """Client for interacting with Polymarket's public API"""
@@ -16,6 +24,33 @@ class PolymarketClient:
     def __init__(self, base_url: Optional[str] = None):
         self.base_url = base_url or config.polymarket_base_url
         self.timeout = aiohttp.ClientTimeout(total=config.request_timeout)
+        self.fixtures = get_fixture_store()
+        self.resilience = get_resilience('gamma')
+    
+    async def _get(self, path: str, params: Dict[str, str], operation: str) -> Dict[str, Any]:
+        """
+        GET a Gamma endpoint; returns {'status', 'body'} with the JSON body on
+        200 and the error text otherwise (recorded/replayed when fixtures are on)
+        """
+        url = f"{self.base_url}{path}"
+        logger.debug("🔍 Gamma %s: %s?%s", operation, url, urlencode(params))
+
+        async def fetch():
+            async with aiohttp.ClientSession(timeout=self.timeout) as session:
+                with outbound('gamma', operation) as call:
+                    async with session.get(url, params=params) as response:
+                        if response.status == 200:
+                            return {'status': 200, 'body': await response.json()}
+                        call.error()
+                        return {'status': response.status, 'body': await response.text()}
+
+        async def resilient_fetch():
+            # 5xx counts against the circuit; 4xx is our request, not Gamma's health
+            return await self.resilience.call_async(operation, fetch, is_failure=lambda result: result['status'] >= 500)
+
+        if self.fixtures:
+            return await self.fixtures.call_async('gamma', {'path': path, 'params': params}, resilient_fetch)
+        return await resilient_fetch()
     
     async def search_active_markets(self, search_query: str) -> Dict[str, Any]:
         """
@@ -36,52 +71,69 @@ class PolymarketClient:
             'events_status': 'active'   # Only events with active status
         }
         
-        search_url = f"{self.base_url}/public-search"
-        
         try:
-            async with aiohttp.ClientSession(timeout=self.timeout) as session:
-                # Add query parameters
-                full_url = f"{search_url}?{urlencode(params)}"
-                
-                print(f"🔍 Searching Polymarket: {full_url}")
-                
-                async with session.get(full_url) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        # public-search returns {"events": [...]} structure
-                        if isinstance(data, dict) and 'events' in data:
-                            events = data['events']
-                            print(f"✅ Found {len(events)} markets")
-                            return events
-                        elif isinstance(data, list):
-                            print(f"✅ Found {len(data)} markets")
-                            return data
-                        else:
-                            print(f"✅ Found unknown number of markets")
-                            return data
-                    else:
-                        print(f"❌ API Error: Status {response.status}")
-                        error_text = await response.text()
-                        return {
-                            "error": f"API returned status {response.status}",
-                            "details": error_text,
-                            "search_query": search_query
-                        }
+            result = await self._get('/public-search', params, 'public_search')
+            if result['status'] == 200:
+                data = result['body']
+                # public-search returns {"events": [...]} structure
+                if isinstance(data, dict) and 'events' in data:
+                    events = data['events']
+                    logger.debug("✅ Found %d markets", len(events))
+                    summarize_markets(events)
+                    gazetteer.add_markets(events)
+                    return events
+                elif isinstance(data, list):
+                    logger.debug("✅ Found %d markets", len(data))
+                    summarize_markets(data)
+                    gazetteer.add_markets(data)
+                    return data
+                else:
+                    logger.debug("✅ Found unknown number of markets")
+                    return data
+            else:
+                logger.error("❌ API Error: Status %s", result['status'])
+                return {
+                    "error": f"API returned status {result['status']}",
+                    "details": result['body'],
+                    "search_query": search_query
+                }
                         
         except Exception as e:
-            print(f"❌ Network Error: {e}")
+            logger.error("❌ Network Error: %s", e)
             return {
                 "error": f"Network error: {str(e)}",
                 "search_query": search_query
             }
     
+    async def seed_gazetteer(self, limit: Optional[int] = None) -> int:
+        """
+        Teach the pre-classifier's gazetteer the names in the most traded
+        active events, so it isn't cold until the first searches come in;
+        returns how many names were new
+        """
+        limit = config.gazetteer_seed_events if limit is None else limit
+        if limit <= 0:
+            return 0
+        params = {
+            'active': 'true',
+            'closed': 'false',
+            'order': 'volume24hr',
+            'ascending': 'false',
+            'limit': str(limit)
+        }
+        result = await self._get('/events', params, 'catalog')
+        if result['status'] != 200 or not isinstance(result['body'], list):
+            raise RuntimeError(f"Gamma events returned status {result['status']}")
+        added = gazetteer.add_markets(result['body'])
+        logger.info("📚 Gazetteer seeded from %d events (%d new names)", len(result['body']), added)
+        return added
+    
     async def search_markets_by_text(self, search_text: str) -> Dict[str, Any]:
         """
         Alternative search method using text search endpoint if available
         """
         try:
             # Try the public-search endpoint
-            search_url = f"{self.base_url}/public-search"
             params = {
                 'q': search_text,
                 'active': 'true',
@@ -90,20 +142,14 @@ class PolymarketClient:
                 'events_status': 'active'
             }
             
-            async with aiohttp.ClientSession(timeout=self.timeout) as session:
-                full_url = f"{search_url}?{urlencode(params)}"
-                print(f"🔍 Text search: {full_url}")
-                
-                async with session.get(full_url) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        return data
-                    else:
-                        # Fallback to events search
-                        return await self.search_active_markets(search_text)
+            result = await self._get('/public-search', params, 'public_search_text')
+            if result['status'] == 200:
+                return result['body']
+            # Fallback to events search
+            return await self.search_active_markets(search_text)
                         
         except Exception as e:
-            print(f"⚠️  Text search failed, falling back to events search: {e}")
+            logger.warning("⚠️  Text search failed, falling back to events search: %s", e)
             return await self.search_active_markets(search_text)
 
 
@@ -122,6 +168,11 @@ def search_polymarket_sync(search_query: str) -> Dict[str, Any]:
     return asyncio.run(client.search_active_markets(search_query))
 
 
+def seed_gazetteer_sync(limit: Optional[int] = None) -> int:
+    """Synchronous wrapper for PolymarketClient.seed_gazetteer (startup warmup)"""
+    return asyncio.run(PolymarketClient().seed_gazetteer(limit))
+
+
 # Test function
 async def test_polymarket_search():
     """Test the Polymarket search functionality"""
@@ -0,0 +1,218 @@
+"""
+Token-budgeted prompts for market relevance ranking
+Each market gets a compact summary (boilerplate resolution text stripped,
+repeated sentences dropped), computed once when search results come in.
+Candidates are then packed into as few ranking prompts as the per-call
+token budget allows, all sharing one copy of the instructions and tweet.
+"""
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from .config import config
+
+# Close enough for English prose with the Cohere tokenizer, and free
+CHARS_PER_TOKEN = 4
+MAX_TWEET_CHARS = 600
+SUMMARY_CACHE_SIZE = 5000
+
+# Sentences that say how a market resolves rather than what it's about
+BOILERPLATE_PATTERNS = [re.compile(pattern, re.IGNORECASE) for pattern in (
+    r'^otherwise\b',
+    r'resolution source',
+    r'will resolve (to )?["“]?(no|50-50)\b',
+    r'\bresolve[sd]? 50-50\b',
+    r'\bmarket will resolve\b',
+    r'\b(postponed|cancell?ed|delayed)\b.*\bresolve',
+    r'\bany ambiguity\b',
+    r'\bfor the purposes? of this market\b',
+    r'\bconsensus of credible reporting\b',
+    r'\bpolymarket\b',
+    r'\bUMA\b',
+)]
+RESOLVES_YES = re.compile(r'^this market will resolve to ["“]?yes["”]? if\s+', re.IGNORECASE)
+SENTENCE_SPLIT = re.compile(r'(?<=[.!?])\s+|\n+')
+IGNORED_TAGS = {'all', 'featured', 'recurring'}
+# Start of a market's block in a ranking reply: "[1]" as asked, and the
+# variants models drift into ("**[1]**", "[1] SCORE: 0.8", "1.", "### 2)").
+# "1." must be followed by whitespace so a bare "0.8" score isn't a header.
+RESPONSE_HEADER = re.compile(
+    r'^[ \t]*(?:#{1,6}[ \t]*)?(?:\*\*)?(?:market[ \t]*)?(?:\[(\d+)\]|(\d+)[.)](?=\s|\*|$))(?:\*\*)?[ \t]*:?[ \t]*',
+    re.IGNORECASE | re.MULTILINE
+)
+
+PREAMBLE = """Rate how relevant each prediction market below is to the tweet, from 0.0 to 1.0:
+1.0 = market is about the tweet's prediction or topic; 0.8-0.9 = main theme; 0.6-0.7 = some aspects;
+0.4-0.5 = loosely related; 0.0-0.3 = unrelated. Consider subject matter, the key topics, whether someone
+interested in the tweet would find the market useful, and whether its timeframe fits."""
+
+RESPONSE_FORMAT = """RESPOND WITH ONE BLOCK PER MARKET, IN THE ORDER GIVEN, EXACTLY IN THIS FORMAT:
+[market number]
+SCORE: [0.0-1.0]
+EXPLANATION: [one sentence]
+KEY_MATCHES: [2-3 comma-separated elements the tweet and market share]"""
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def compact_description(description: str, max_chars: int) -> str:
+    """Drop resolution boilerplate and repeated sentences, then cut at a sentence boundary"""
+    kept: List[str] = []
+    seen = set()
+    for sentence in SENTENCE_SPLIT.split(description or ''):
+        # "This market will resolve to Yes if X" is about X, usually restated later
+        condition = RESOLVES_YES.sub('', sentence.strip())
+        normalized = re.sub(r'\W+', ' ', condition.lower()).strip()
+        if not normalized or normalized in seen:
+            continue
+        if any(pattern.search(condition) for pattern in BOILERPLATE_PATTERNS):
+            continue
+        seen.add(normalized)
+        kept.append(f'Yes if {condition}' if condition != sentence.strip() else condition)
+
+    compact = ''
+    for sentence in kept:
+        candidate = f'{compact} {sentence}'.strip()
+        if len(candidate) > max_chars:
+            if not compact:
+                compact = sentence[:max_chars].rsplit(' ', 1)[0] + '…'
+            break
+        compact = candidate
+    return compact
+
+
+class SummaryCache:
+    """Compact market summaries, keyed on id and last update so edits are picked up"""
+
+    def __init__(self, size: int = SUMMARY_CACHE_SIZE):
+        self.size = size
+        self._summaries: 'OrderedDict[Tuple[str, str], str]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, market: Dict[str, Any]) -> str:
+        key = (str(market.get('id', '')), str(market.get('updatedAt', '')))
+        with self._lock:
+            summary = self._summaries.get(key)
+            if summary is not None:
+                self._summaries.move_to_end(key)
+                return summary
+        summary = build_summary(market)
+        with self._lock:
+            self._summaries[key] = summary
+            while len(self._summaries) > self.size:
+                self._summaries.popitem(last=False)
+        return summary
+
+
+def build_summary(market: Dict[str, Any]) -> str:
+    title = market.get('title', '')
+    lines = [f'Title: {title}']
+    questions = market.get('markets') or []
+    question = questions[0].get('question', '') if questions else ''
+    if question and question.strip().lower() != title.strip().lower():
+        lines.append(f'Question: {question}')
+    about = compact_description(market.get('description', ''), config.market_summary_chars)
+    if about:
+        lines.append(f'About: {about}')
+    tags = []
+    for tag in market.get('tags', []):
+        label = tag.get('label', '')
+        if label and label.lower() not in IGNORED_TAGS and label not in tags:
+            tags.append(label)
+    if tags:
+        lines.append(f'Tags: {", ".join(tags[:6])}')
+    return '\n'.join(lines)
+
+
+_summaries = SummaryCache()
+
+
+def market_summary(market: Dict[str, Any]) -> str:
+    return _summaries.get(market)
+
+
+def summarize_markets(markets: List[Dict[str, Any]]) -> None:
+    """Precompute summaries at ingest, so ranking only has to look them up"""
+    for market in markets:
+        if isinstance(market, dict):
+            _summaries.get(market)
+
+
+@dataclass
+class RankingPrompt:
+    prompt: str
+    markets: List[Dict[str, Any]]
+    estimated_tokens: int
+
+
+def _context_block(tweet_text: str, search_query: str, key_topics: List[str], sentiment_score: Optional[float]) -> str:
+    tweet = tweet_text if len(tweet_text) <= MAX_TWEET_CHARS else tweet_text[:MAX_TWEET_CHARS] + '…'
+    return (f'TWEET: "{tweet}"\n'
+            f'Search query: "{search_query}" | Key topics: {", ".join(key_topics)} | '
+            f'Sentiment: {sentiment_score} (-1.0 negative to 1.0 positive)')
+
+
+def build_ranking_prompts(
+    tweet_text: str,
+    search_query: str,
+    key_topics: List[str],
+    sentiment_score: Optional[float],
+    markets: List[Dict[str, Any]],
+    token_budget: Optional[int] = None,
+    batch_size: Optional[int] = None
+) -> List[RankingPrompt]:
+    """
+    Pack markets into prompts of at most token_budget input tokens and batch_size candidates
+
+    A market whose summary won't fit even on its own is cut down to its title.
+    """
+    token_budget = token_budget or config.ranking_prompt_token_budget
+    batch_size = batch_size or config.ranking_batch_size
+    header = f'{PREAMBLE}\n\n{_context_block(tweet_text, search_query, key_topics, sentiment_score)}\n\nMARKETS:\n'
+    footer = f'\n{RESPONSE_FORMAT}\n'
+    fixed_tokens = estimate_tokens(header) + estimate_tokens(footer)
+
+    prompts: List[RankingPrompt] = []
+    blocks: List[str] = []
+    batch: List[Dict[str, Any]] = []
+    used = fixed_tokens
+
+    def flush():
+        nonlocal blocks, batch, used
+        if batch:
+            prompts.append(RankingPrompt(header + '\n'.join(blocks) + footer, batch, used))
+        blocks, batch, used = [], [], fixed_tokens
+
+    for market in markets:
+        summary = market_summary(market)
+        if fixed_tokens + estimate_tokens(summary) + 2 > token_budget:
+            summary = f"Title: {market.get('title', '')}"
+        cost = estimate_tokens(summary) + 2
+        if batch and (len(batch) >= batch_size or used + cost > token_budget):
+            flush()
+        batch.append(market)
+        blocks.append(f'[{len(batch)}]\n{summary}\n')
+        used += cost
+    flush()
+    return prompts
+
+
+def split_ranking_response(response_text: str, count: int) -> Dict[int, str]:
+    """
+    Map candidate index (0-based) to its block of the response; missing ones are left out
+
+    Anything after the number on a header line ("[1] SCORE: 0.8") belongs
+    to that market's block.
+    """
+    headers = list(RESPONSE_HEADER.finditer(response_text))
+    blocks: Dict[int, str] = {}
+    for position, header in enumerate(headers):
+        end = headers[position + 1].start() if position + 1 < len(headers) else len(response_text)
+        index = int(header.group(1) or header.group(2)) - 1
+        if 0 <= index < count and index not in blocks:
+            blocks[index] = response_text[header.end():end].strip()
+    return blocks
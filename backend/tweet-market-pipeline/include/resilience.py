@@ -0,0 +1,286 @@
+"""
+Hedged requests and circuit breakers for upstream calls
+A call still running past the recent p95 for its operation gets one
+duplicate, if a hedge worker is free; whichever answers first wins and the other is cancelled (or, for
+a thread already blocked in a sync client, abandoned). After repeated
+failures a service's circuit opens and calls fail fast with CircuitOpen,
+so callers go straight to their fallbacks instead of waiting out timeouts.
+"""
+import asyncio
+import contextvars
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple
+
+from .config import config
+from .logging_config import get_logger
+from .metrics import counter, gauge
+
+logger = get_logger(__name__)
+
+LATENCY_WINDOW = 200
+HEDGE_WORKERS = 16
+
+HEDGED_REQUESTS = counter('hedged_requests_total', 'Upstream calls that got a hedged duplicate', ('service', 'operation'))
+HEDGE_WINS = counter('hedge_wins_total', 'Hedged duplicates that answered first', ('service', 'operation'))
+CIRCUIT_REJECTIONS = counter('circuit_rejections_total', 'Calls failed fast by an open circuit', ('service',))
+CIRCUIT_STATE = gauge('circuit_state', 'Circuit breaker state: 0 closed, 1 half-open, 2 open', ('service',))
+
+_hedge_pool = ThreadPoolExecutor(max_workers=HEDGE_WORKERS, thread_name_prefix='hedge')
+# Free hedge workers; attempts only go to the pool when one is free, so they never queue
+_hedge_slots = threading.BoundedSemaphore(HEDGE_WORKERS)
+
+
+class CircuitOpen(RuntimeError):
+    """The service's circuit is open; use the fallback"""
+
+
+class CircuitBreaker:
+    """
+    Closed → open after failure_threshold consecutive failures; open →
+    half-open after reset_seconds, letting one trial call through; the
+    trial's outcome closes or reopens it
+    """
+
+    CLOSED, HALF_OPEN, OPEN = 'closed', 'half_open', 'open'
+
+    def __init__(self, service: str, failure_threshold: int, reset_seconds: float):
+        self.service = service
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+        CIRCUIT_STATE.set_function(
+            lambda: {self.CLOSED: 0, self.HALF_OPEN: 1, self.OPEN: 2}[self.state], service=service)
+
+    def available(self) -> bool:
+        """Whether a call would be let through right now (without claiming the half-open trial)"""
+        with self._lock:
+            if self.state == self.OPEN:
+                return time.monotonic() - self.opened_at >= self.reset_seconds
+            return not (self.state == self.HALF_OPEN and self._trial_in_flight)
+
+    def before_call(self) -> None:
+        with self._lock:
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_seconds:
+                self.state = self.HALF_OPEN
+                logger.info("🔌 %s circuit half-open, sending a trial call", self.service)
+            if self.state == self.OPEN or (self.state == self.HALF_OPEN and self._trial_in_flight):
+                CIRCUIT_REJECTIONS.inc(service=self.service)
+                raise CircuitOpen(f"{self.service} circuit open")
+            if self.state == self.HALF_OPEN:
+                self._trial_in_flight = True
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.state != self.CLOSED:
+                logger.info("✅ %s circuit closed", self.service)
+            self.state = self.CLOSED
+            self.failures = 0
+            self._trial_in_flight = False
+
+    def release_trial(self) -> None:
+        """The call was cancelled: it says nothing about the service, but frees the half-open trial"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning("🔌 %s circuit open after %d failures, failing fast for %.0fs",
+                                   self.service, self.failures, self.reset_seconds)
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+
+class LatencyTracker:
+    """Recent successful call latencies for one operation"""
+
+    def __init__(self, size: int = LATENCY_WINDOW):
+        self._samples: Deque[float] = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, q: float) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples)
+        if len(samples) < config.hedge_min_samples:
+            return None
+        return samples[min(len(samples) - 1, int(q / 100 * len(samples)))]
+
+
+class Resilience:
+    """Circuit breaker for one service, plus per-operation latency tracking for hedging"""
+
+    def __init__(self, service: str):
+        self.service = service
+        self.breaker = CircuitBreaker(service, config.circuit_failure_threshold, config.circuit_reset_seconds)
+        self._trackers: Dict[str, LatencyTracker] = {}
+        self._lock = threading.Lock()
+
+    def available(self) -> bool:
+        return self.breaker.available()
+
+    def _tracker(self, operation: str) -> LatencyTracker:
+        with self._lock:
+            return self._trackers.setdefault(operation, LatencyTracker())
+
+    def hedge_delay(self, operation: str) -> Optional[float]:
+        """Seconds to wait before hedging, or None to not hedge (disabled, or too few samples yet)"""
+        if not config.hedge_enabled:
+            return None
+        percentile = self._tracker(operation).percentile(config.hedge_percentile)
+        if percentile is None:
+            return None
+        return max(percentile, config.hedge_min_delay_ms / 1000)
+
+    def _timed(self, operation: str, fn: Callable[[], Any]) -> Any:
+        started = time.perf_counter()
+        result = fn()
+        self._tracker(operation).observe(time.perf_counter() - started)
+        return result
+
+    def call(self, operation: str, fn: Callable[[], Any]) -> Any:
+        """Run a blocking call with the breaker and, once there's latency history, one hedge"""
+        self.breaker.before_call()
+        try:
+            result = self._hedged(operation, fn)
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        except BaseException:
+            self.breaker.release_trial()
+            raise
+        self.breaker.record_success()
+        return result
+
+    def _submit(self, operation: str, fn: Callable[[], Any]) -> Optional[Tuple[Future, threading.Event]]:
+        """Start an attempt on a free hedge worker: (future, set once it's running), or None if all are busy"""
+        if not _hedge_slots.acquire(blocking=False):
+            return None
+        started = threading.Event()
+
+        def attempt():
+            started.set()
+            try:
+                return self._timed(operation, fn)
+            finally:
+                _hedge_slots.release()
+
+        # Each attempt keeps the caller's trace and usage scope
+        return _hedge_pool.submit(contextvars.copy_context().run, attempt), started
+
+    def _hedged(self, operation: str, fn: Callable[[], Any]) -> Any:
+        """
+        The first attempt runs on a hedge worker so the caller can give up on
+        it; with every worker busy, the call runs on the caller's thread and
+        isn't hedged. The pool never queues or caps calls, and a saturated
+        process doesn't add duplicates to its own load.
+        """
+        delay = self.hedge_delay(operation)
+        submitted = self._submit(operation, fn) if delay is not None else None
+        if submitted is None:
+            return self._timed(operation, fn)
+
+        first, started = submitted
+        started.wait()  # The hedge delay counts from when the call starts, not from any wait for a worker
+        done, _ = wait([first], timeout=delay)
+        if done:
+            return first.result()
+
+        hedge = self._submit(operation, fn)
+        if hedge is None:
+            return first.result()
+        second = hedge[0]
+        HEDGED_REQUESTS.inc(service=self.service, operation=operation)
+        logger.debug("⏱️ %s.%s slower than %.0fms, hedging", self.service, operation, delay * 1000)
+        pending = {first, second}
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is not None:
+                    error = future.exception()
+                    continue
+                for loser in pending:
+                    loser.cancel()  # Already running: its answer is just dropped
+                if future is second:
+                    HEDGE_WINS.inc(service=self.service, operation=operation)
+                return future.result()
+        raise error
+
+    async def call_async(self, operation: str, fn: Callable[[], Awaitable[Any]],
+                         is_failure: Callable[[Any], bool] = lambda result: False) -> Any:
+        """call() for coroutines; the losing attempt is actually cancelled"""
+        self.breaker.before_call()
+        try:
+            result = await self._hedged_async(operation, fn)
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        except BaseException:
+            self.breaker.release_trial()
+            raise
+        if is_failure(result):
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        return result
+
+    async def _timed_async(self, operation: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        started = time.perf_counter()
+        result = await fn()
+        self._tracker(operation).observe(time.perf_counter() - started)
+        return result
+
+    async def _hedged_async(self, operation: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        delay = self.hedge_delay(operation)
+        first = asyncio.ensure_future(self._timed_async(operation, fn))
+        if delay is None:
+            return await first
+        done, _ = await asyncio.wait({first}, timeout=delay)
+        if done:
+            return first.result()
+
+        HEDGED_REQUESTS.inc(service=self.service, operation=operation)
+        second = asyncio.ensure_future(self._timed_async(operation, fn))
+        pending = {first, second}
+        error: Optional[BaseException] = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        error = task.exception()
+                        continue
+                    if task is second:
+                        HEDGE_WINS.inc(service=self.service, operation=operation)
+                    return task.result()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+
+_resilience: Dict[str, Resilience] = {}
+_resilience_lock = threading.Lock()
+
+
+def get_resilience(service: str) -> Resilience:
+    """Shared per service, so every client of an upstream trips the same breaker"""
+    with _resilience_lock:
+        resilience = _resilience.get(service)
+        if resilience is None:
+            resilience = _resilience[service] = Resilience(service)
+        return resilience
@@ -5,10 +5,19 @@ Analyzes tweet text to extract key themes and generate search queries for Polyma
 import re
 import asyncio
 from typing import List, Optional, Dict, Any
-import cohere
 
 from .models import TweetInput, SentimentAnalysis
 from .config import config
+from .logging_config import get_logger
+from .metrics import outbound
+from .fixtures import get_fixture_store
+from .llm_provider import LLMProvider, get_provider
+from .degradation import analysis_degraded
+from .lexicon_sentiment import score_sentiment
+from .resilience import get_resilience
+from .token_usage import record_usage
+
+logger = get_logger(__name__)
 
 
 class SentimentExtractor:
@@ -16,12 +25,28 @@ class SentimentExtractor:
     Extracts sentiment, key themes, and generates search queries from tweet text using Cohere
     """
     
-    def __init__(self, api_key: Optional[str] = None):
-        """Initialize the sentiment extractor with Cohere client"""
-        self.api_key = api_key or config.cohere_api_key
-        self.client = cohere.Client(self.api_key)
-        self.model = config.cohere_model
+    def __init__(self, api_key: Optional[str] = None, provider: Optional[LLMProvider] = None):
+        """Initialize the sentiment extractor with the configured LLM provider"""
+        self.provider = provider or get_provider(api_key)
+        self.model = self.provider.model
+        self.fixtures = get_fixture_store()
+        self.resilience = get_resilience(self.provider.name)
         
+    def _chat(self, operation: str, **kwargs) -> str:
+        """One LLM chat call; returns the response text (recorded/replayed when fixtures are on)"""
+        request = {'model': self.model, **kwargs}
+
+        def call():
+            with outbound(self.provider.name, operation):
+                result = self.resilience.call(operation, lambda: self.provider.chat(**kwargs))
+            return {'text': result.text, 'input_tokens': result.input_tokens, 'output_tokens': result.output_tokens}
+
+        reply = self.fixtures.call(self.provider.name, request, call) if self.fixtures else call()
+        if isinstance(reply, str):
+            return reply  # Recorded before token accounting
+        record_usage('sentiment', operation, reply['input_tokens'], reply['output_tokens'])
+        return reply['text']
+
     async def extract_sentiment(self, tweet: TweetInput) -> SentimentAnalysis:
         """
         Extract sentiment and generate search query from tweet text
@@ -32,6 +57,12 @@ class SentimentExtractor:
         Returns:
             SentimentAnalysis object with search query and extracted themes
         """
+        if not self.resilience.available():
+            # Provider is down: skip the calls that would each fail fast anyway
+            return self._fallback_analysis(tweet.text, f"{self.provider.name} circuit open")
+        if analysis_degraded():
+            return self._fallback_analysis(tweet.text, "backend under load, analysis degraded")
+        
         try:
             # Clean and preprocess tweet text
             cleaned_text = self._preprocess_tweet_text(tweet.text)
@@ -83,15 +114,14 @@ Examples:
 Search query:"""
 
         try:
-            response = self.client.chat(
+            search_query = (await asyncio.to_thread(
+                self._chat,
+                'search_query',
                 message=prompt,
-                model=self.model,
                 max_tokens=config.sentiment_max_tokens,
                 temperature=config.sentiment_temperature,
                 connectors=[]
-            )
-            
-            search_query = response.text.strip()
+            )).strip()
             
             # Clean up the response to ensure it's just the query
             search_query = self._clean_search_query(search_query)
@@ -99,7 +129,7 @@ Search query:"""
             return search_query or self._extract_fallback_keywords(text)
             
         except Exception as e:
-            print(f"Error generating search query with Cohere: {e}")
+            logger.warning("Error generating search query with Cohere: %s", e)
             return self._extract_fallback_keywords(text)
     
     async def _extract_key_topics(self, text: str) -> List[str]:
@@ -126,15 +156,14 @@ Example: "Bitcoin, Federal Reserve, inflation, 2024 election"
 Topics:"""
 
         try:
-            response = self.client.chat(
+            topics_text = (await asyncio.to_thread(
+                self._chat,
+                'key_topics',
                 message=prompt,
-                model=self.model,
                 max_tokens=config.sentiment_max_tokens,
                 temperature=config.sentiment_temperature,
                 connectors=[]
-            )
-            
-            topics_text = response.text.strip()
+            )).strip()
             
             # Parse comma-separated topics
             topics = [topic.strip() for topic in topics_text.split(',')]
@@ -143,7 +172,7 @@ Topics:"""
             return topics[:5]  # Limit to 5 topics max
             
         except Exception as e:
-            print(f"Error extracting topics with Cohere: {e}")
+            logger.warning("Error extracting topics with Cohere: %s", e)
             return self._extract_fallback_topics(text)
     
     async def _calculate_sentiment_score(self, text: str) -> Optional[float]:
@@ -151,6 +180,9 @@ Topics:"""
         Calculate sentiment score (positive/negative) for the tweet
         Optional feature - could be used for market direction bias
         """
+        if config.sentiment_engine == "lexicon":
+            return score_sentiment(text)
+        
         prompt = f"""
 Analyze the sentiment of this tweet on a scale from -1.0 (very negative) to 1.0 (very positive), with 0.0 being neutral.
 
@@ -165,15 +197,14 @@ Consider:
 Return only a single number between -1.0 and 1.0:"""
 
         try:
-            response = self.client.chat(
+            sentiment_text = (await asyncio.to_thread(
+                self._chat,
+                'sentiment',
                 message=prompt,
-                model=self.model,
                 max_tokens=10,
                 temperature=0.1,
                 connectors=[]
-            )
-            
-            sentiment_text = response.text.strip()
+            )).strip()
             
             # Extract numeric value
             import re
@@ -185,7 +216,7 @@ Return only a single number between -1.0 and 1.0:"""
             return None
             
         except Exception as e:
-            print(f"Error calculating sentiment with Cohere: {e}")
+            logger.warning("Error calculating sentiment with Cohere: %s", e)
             return None
     
     def _preprocess_tweet_text(self, text: str) -> str:
@@ -273,12 +304,12 @@ Return only a single number between -1.0 and 1.0:"""
         """
         Fallback analysis when Cohere API fails
         """
-        print(f"Using fallback analysis due to error: {error}")
+        logger.warning("Using fallback analysis due to error: %s", error)
         
         return SentimentAnalysis(
             search_query=self._extract_fallback_keywords(text),
             key_topics=self._extract_fallback_topics(text),
-            sentiment_score=None,
+            sentiment_score=score_sentiment(text),  # Local, so still available when the LLM is not
             confidence=0.3  # Lower confidence for fallback
         )
 
@@ -0,0 +1,117 @@
+"""
+LLM token and cost accounting
+Every Cohere chat call reports the tokens it was billed for. Totals go to
+/api/metrics by stage and operation, and to whichever usage scopes are
+open: one per pipeline run (attached to search_metadata) and one per
+backend request (counted by endpoint). Scopes nest through a contextvar,
+the same way tracing spans do.
+"""
+import contextvars
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from .metrics import counter, histogram
+
+LLM_CALLS = counter('llm_calls_total', 'LLM chat calls', ('stage', 'operation'))
+LLM_TOKENS = counter('llm_tokens_total', 'LLM tokens billed', ('stage', 'operation', 'kind'))
+LLM_COST = counter('llm_cost_usd_total', 'Estimated LLM spend in USD', ('stage', 'operation'))
+LLM_INPUT_TOKENS_PER_CALL = histogram(
+    'llm_input_tokens_per_call', 'Prompt size of each LLM call in tokens', ('stage', 'operation'),
+    buckets=(64, 128, 256, 512, 1024, 2048, 4096, 8192))
+
+_current_usage: contextvars.ContextVar[Optional['TokenUsage']] = contextvars.ContextVar('current_usage', default=None)
+
+
+def estimate_cost(input_tokens: float, output_tokens: float) -> float:
+    # Imported here: the backend imports this module even when the pipeline
+    # (and the COHERE_API_KEY its config requires) isn't available
+    from .config import config
+    return (input_tokens * config.llm_input_cost_per_million
+            + output_tokens * config.llm_output_cost_per_million) / 1_000_000
+
+
+def usage_from_response(response: Any) -> Tuple[int, int]:
+    """(input_tokens, output_tokens) billed for a Cohere chat response; zeros if it doesn't say"""
+    meta = getattr(response, 'meta', None)
+    units = getattr(meta, 'billed_units', None) or getattr(meta, 'tokens', None)
+    return int(getattr(units, 'input_tokens', None) or 0), int(getattr(units, 'output_tokens', None) or 0)
+
+
+class TokenUsage:
+    """
+    Token totals for one scope (a pipeline run, a request), split by stage and operation
+
+    ``with track_usage():`` makes it current; calls recorded inside it, in
+    asyncio tasks it starts too, also count towards every enclosing scope.
+    """
+
+    def __init__(self, parent: Optional['TokenUsage'] = None):
+        self.parent = parent
+        self.calls = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.by_operation: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+        self._token: Optional[contextvars.Token] = None
+
+    @property
+    def cost_usd(self) -> float:
+        return estimate_cost(self.input_tokens, self.output_tokens)
+
+    def add(self, stage: str, operation: str, input_tokens: int, output_tokens: int) -> None:
+        with self._lock:
+            self.calls += 1
+            self.input_tokens += input_tokens
+            self.output_tokens += output_tokens
+            row = self.by_operation.setdefault(f'{stage}.{operation}', {'calls': 0, 'input_tokens': 0, 'output_tokens': 0})
+            row['calls'] += 1
+            row['input_tokens'] += input_tokens
+            row['output_tokens'] += output_tokens
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'calls': self.calls,
+                'input_tokens': self.input_tokens,
+                'output_tokens': self.output_tokens,
+                'cost_usd': round(self.cost_usd, 6),
+                'by_operation': {name: dict(row) for name, row in self.by_operation.items()}
+            }
+
+    def finish(self) -> None:
+        if self._token is not None:
+            try:
+                _current_usage.reset(self._token)
+            except ValueError:
+                _current_usage.set(self.parent)
+            self._token = None
+
+    def __enter__(self) -> 'TokenUsage':
+        self._token = _current_usage.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.finish()
+
+
+def track_usage() -> TokenUsage:
+    """A new scope under the current one (not yet current; use it as a context manager)"""
+    return TokenUsage(_current_usage.get())
+
+
+def start_usage() -> TokenUsage:
+    """Open a scope and make it current without a with-block; end it with usage.finish()"""
+    return track_usage().__enter__()
+
+
+def record_usage(stage: str, operation: str, input_tokens: int, output_tokens: int) -> None:
+    LLM_CALLS.inc(stage=stage, operation=operation)
+    LLM_TOKENS.inc(input_tokens, stage=stage, operation=operation, kind='input')
+    LLM_TOKENS.inc(output_tokens, stage=stage, operation=operation, kind='output')
+    LLM_COST.inc(estimate_cost(input_tokens, output_tokens), stage=stage, operation=operation)
+    LLM_INPUT_TOKENS_PER_CALL.observe(input_tokens, stage=stage, operation=operation)
+
+    usage = _current_usage.get()
+    while usage is not None:
+        usage.add(stage, operation, input_tokens, output_tokens)
+        usage = usage.parent
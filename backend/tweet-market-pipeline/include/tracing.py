@@ -0,0 +1,221 @@
+"""
+Request-scoped tracing for slow-request forensics
+Spans nest through a contextvar, so they follow a request across the Flask
+handler, asyncio tasks in the pipeline and every outbound call. Finished
+traces go to an in-memory ring buffer (served at /api/debug/traces) and,
+when TRACE_EXPORT_PATH is set, are queued for a background thread that
+appends them to a JSONL file, like the queued logging in logging_config.
+"""
+import atexit
+import contextvars
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+TRACE_BUFFER_SIZE = int(os.getenv("TRACE_BUFFER_SIZE", "200"))
+TRACE_SLOW_MS = float(os.getenv("TRACE_SLOW_MS", "2000"))
+TRACE_EXPORT_PATH = os.getenv("TRACE_EXPORT_PATH")
+# Traces waiting for the exporter; past this they are dropped, not waited on
+TRACE_EXPORT_QUEUE_SIZE = int(os.getenv("TRACE_EXPORT_QUEUE_SIZE", "1000"))
+
+_current_span: contextvars.ContextVar[Optional['Span']] = contextvars.ContextVar('current_span', default=None)
+
+
+class Span:
+    def __init__(self, name: str, parent: Optional['Span'] = None, **attributes):
+        self.name = name
+        self.parent = parent
+        self.trace: 'Trace' = parent.trace if parent else Trace(self)
+        self.span_id = uuid.uuid4().hex[:16]
+        self.attributes: Dict[str, Any] = attributes
+        self.error: Optional[str] = None
+        self.start = time.time()
+        self._started = time.perf_counter()
+        self.duration_ms: Optional[float] = None
+        self._token: Optional[contextvars.Token] = None
+        self.trace.add(self)
+
+    @property
+    def trace_id(self) -> str:
+        return self.trace.trace_id
+
+    def set(self, **attributes) -> None:
+        self.attributes.update(attributes)
+
+    def finish(self, error: Optional[BaseException] = None) -> None:
+        if self.duration_ms is not None:
+            return
+        self.duration_ms = (time.perf_counter() - self._started) * 1000
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"
+        if self._token is not None:
+            try:
+                _current_span.reset(self._token)
+            except ValueError:
+                # Finished from another context (e.g. a streamed response): just unset
+                _current_span.set(self.parent)
+        if self.parent is None:
+            self.trace.finish()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'span_id': self.span_id,
+            'parent_id': self.parent.span_id if self.parent else None,
+            'name': self.name,
+            'offset_ms': round((self.start - self.trace.root.start) * 1000, 1),
+            'duration_ms': round(self.duration_ms, 1) if self.duration_ms is not None else None,
+            'attributes': self.attributes,
+            'error': self.error
+        }
+
+    def __enter__(self) -> 'Span':
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.finish(exc)
+
+
+class Trace:
+    def __init__(self, root: Span):
+        self.trace_id = uuid.uuid4().hex
+        self.root = root
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    def add(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+    def finish(self) -> None:
+        _recorder.record(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            spans = sorted(self.spans, key=lambda span: span.start)
+        return {
+            'trace_id': self.trace_id,
+            'name': self.root.name,
+            'start': self.root.start,
+            'duration_ms': round(self.root.duration_ms or 0.0, 1),
+            'slow': (self.root.duration_ms or 0.0) >= TRACE_SLOW_MS,
+            'error': self.root.error,
+            'spans': [span.to_dict() for span in spans]
+        }
+
+
+class TraceRecorder:
+    """
+    Ring buffer of finished traces, plus the optional JSONL exporter
+
+    Exported traces go through a bounded queue drained by one daemon
+    thread, so request threads never wait on the disk; when the queue is
+    full the trace is counted in `dropped` and left out of the file.
+    """
+
+    def __init__(self, size: int = TRACE_BUFFER_SIZE, export_path: Optional[str] = TRACE_EXPORT_PATH,
+                 export_queue_size: int = TRACE_EXPORT_QUEUE_SIZE):
+        self.traces: Deque[Dict[str, Any]] = deque(maxlen=size)
+        self.export_path = export_path
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._export_queue: 'queue.Queue[Optional[Dict[str, Any]]]' = queue.Queue(maxsize=export_queue_size)
+        self._exporter: Optional[threading.Thread] = None
+        if export_path:
+            self._exporter = threading.Thread(target=self._export_loop, name='trace-exporter', daemon=True)
+            self._exporter.start()
+            atexit.register(self.close)
+
+    def record(self, trace: Trace) -> None:
+        data = trace.to_dict()
+        with self._lock:
+            self.traces.append(data)
+        if self._exporter is not None:
+            try:
+                self._export_queue.put_nowait(data)
+            except queue.Full:
+                with self._lock:
+                    self.dropped += 1
+
+    def _export_loop(self) -> None:
+        with open(self.export_path, 'a', encoding='utf-8') as f:
+            while True:
+                data = self._export_queue.get()
+                if data is None:
+                    return
+                f.write(json.dumps(data, default=str) + '\n')
+                if self._export_queue.empty():
+                    f.flush()
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Write out queued traces and stop the exporter"""
+        if self._exporter is None or not self._exporter.is_alive():
+            return
+        self._export_queue.put(None)
+        self._exporter.join(timeout)
+
+    def query(self, slow_only: bool = False, min_ms: Optional[float] = None, name: Optional[str] = None,
+              limit: int = 50) -> List[Dict[str, Any]]:
+        """Newest first"""
+        with self._lock:
+            traces = list(self.traces)
+        results = []
+        for trace in reversed(traces):
+            if slow_only and not trace['slow']:
+                continue
+            if min_ms is not None and trace['duration_ms'] < min_ms:
+                continue
+            if name and name not in trace['name']:
+                continue
+            results.append(trace)
+            if len(results) >= limit:
+                break
+        return results
+
+
+_recorder = TraceRecorder()
+
+
+def get_recorder() -> TraceRecorder:
+    return _recorder
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def span(name: str, **attributes) -> Span:
+    """
+    Open a span under the current one (or start a new trace)
+
+    ``with span('pipeline.search', query=q):`` times the block; spans opened
+    inside it, including in asyncio tasks it creates, become its children.
+    """
+    return Span(name, _current_span.get(), **attributes)
+
+
+def child_span(name: str, **attributes) -> Optional[Span]:
+    """Like span(), but None outside a trace, so background work doesn't start traces of its own"""
+    parent = _current_span.get()
+    return Span(name, parent, **attributes) if parent is not None else None
+
+
+def record_span(name: str, duration_ms: float, **attributes) -> None:
+    """Add an already-finished child span (ending now), for calls only seen after the fact"""
+    parent = _current_span.get()
+    if parent is None:
+        return
+    finished = Span(name, parent, **attributes)
+    finished.start -= duration_ms / 1000
+    finished.duration_ms = duration_ms
+
+
+def start_span(name: str, **attributes) -> Span:
+    """Open a span and make it current without a with-block; end it with span.finish()"""
+    new_span = span(name, **attributes)
+    return new_span.__enter__()
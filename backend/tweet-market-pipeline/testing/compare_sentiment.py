@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Compare the local lexicon sentiment scorer with LLM sentiment scores
+
+Collects every (tweet, LLM sentiment_score) pair from saved pipeline
+results, scores the same tweets with the lexicon and prints each pair, the
+mean absolute error, direction agreement (positive / neutral / negative),
+correlation and the cost per tweet. With --live the configured LLM provider
+scores the tweets in --tweets as well, so the comparison can grow past the
+saved files:
+    python testing/compare_sentiment.py [--results 'testing/*.json'] [--live]
+        [--tweets testing/classifier_labels.jsonl]
+"""
+import argparse
+import asyncio
+import glob
+import json
+import math
+import os
+import sys
+import time
+
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+
+PIPELINE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(PIPELINE_DIR)
+
+from include.lexicon_sentiment import score_sentiment
+
+# Scores within this distance of zero count as neutral
+NEUTRAL_BAND = 0.15
+
+
+def saved_pairs(patterns):
+    """(tweet text, LLM score) from saved results, one per distinct tweet (the latest file wins)"""
+    pairs = {}
+
+    def walk(node, tweet=None):
+        if isinstance(node, dict):
+            original = node.get('original_tweet')
+            if isinstance(original, dict):
+                tweet = original.get('text', tweet)
+            elif isinstance(node.get('tweet'), str):
+                tweet = node['tweet']
+            analysis = node.get('sentiment_analysis')
+            if tweet and isinstance(analysis, dict) and isinstance(analysis.get('sentiment_score'), (int, float)):
+                pairs[tweet.strip()] = float(analysis['sentiment_score'])
+            for value in node.values():
+                walk(value, tweet)
+        elif isinstance(node, list):
+            for value in node:
+                walk(value, tweet)
+
+    paths = sorted({path for pattern in patterns for path in glob.glob(pattern)}, key=lambda path: (os.path.getmtime(path), path))
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            walk(json.load(f))
+    return pairs
+
+
+def live_pairs(path):
+    """Score the market-relevant tweets in a labels file with the configured LLM provider"""
+    os.environ['SENTIMENT_ENGINE'] = 'llm'
+    from include.config import config
+    from include.sentiment_extractor import SentimentExtractor
+
+    config.sentiment_engine = 'llm'
+    extractor = SentimentExtractor()
+    with open(path, encoding='utf-8') as f:
+        tweets = [json.loads(line) for line in f if line.strip()]
+    texts = [row['text'] for row in tweets if row.get('label', 1)]
+
+    async def score_all():
+        scores = await asyncio.gather(*(extractor._calculate_sentiment_score(text) for text in texts))
+        return {text: score for text, score in zip(texts, scores) if score is not None}
+
+    return asyncio.run(score_all())
+
+
+def direction(score):
+    return 0 if abs(score) < NEUTRAL_BAND else (1 if score > 0 else -1)
+
+
+def correlation(xs, ys):
+    if len(xs) < 2:
+        return float('nan')
+    mean_x, mean_y = sum(xs) / len(xs), sum(ys) / len(ys)
+    covariance = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys))
+    spread = math.sqrt(sum((x - mean_x) ** 2 for x in xs) * sum((y - mean_y) ** 2 for y in ys))
+    return covariance / spread if spread else float('nan')
+
+
+def report(name, pairs):
+    if not pairs:
+        print(f"\n⚠️ {name}: no scored tweets found")
+        return
+    rows = [(text, llm, score_sentiment(text)) for text, llm in pairs.items()]
+    print(f"\n📊 {name}: {len(rows)} tweets")
+    print("     llm  lexicon  tweet")
+    for text, llm, lexicon in rows:
+        marker = '✅' if direction(llm) == direction(lexicon) else '❌'
+        print(f"   {marker} {llm:+.2f}  {lexicon:+.2f}   {text[:70]}")
+
+    llm_scores = [llm for _, llm, _ in rows]
+    lexicon_scores = [lexicon for _, _, lexicon in rows]
+    mae = sum(abs(llm - lexicon) for _, llm, lexicon in rows) / len(rows)
+    agreement = sum(direction(llm) == direction(lexicon) for _, llm, lexicon in rows) / len(rows)
+    print(f"   mean absolute error {mae:.2f} | direction agreement {agreement:.0%} | "
+          f"correlation {correlation(llm_scores, lexicon_scores):.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare lexicon and LLM sentiment scores')
+    parser.add_argument('--results', nargs='+', default=[os.path.join(PIPELINE_DIR, 'testing', '*.json'),
+                                                         os.path.join(PIPELINE_DIR, 'tweet_analysis_*.json')],
+                        help='globs of saved pipeline results holding LLM sentiment scores')
+    parser.add_argument('--live', action='store_true', help='also score --tweets with the configured LLM provider')
+    parser.add_argument('--tweets', default=os.path.join(PIPELINE_DIR, 'testing', 'classifier_labels.jsonl'))
+    args = parser.parse_args()
+
+    print("🔍 Lexicon vs LLM sentiment")
+    print("=" * 60)
+    saved = saved_pairs(args.results)
+    report('Saved pipeline results', saved)
+    if args.live:
+        report('Live LLM scores', live_pairs(args.tweets))
+
+    texts = list(saved) or ['Bitcoin to the moon 🚀']
+    rounds = 200
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for text in texts:
+            score_sentiment(text)
+    per_tweet_us = (time.perf_counter() - started) / (rounds * len(texts)) * 1e6
+    print(f"\n⏱️ {per_tweet_us:.0f}µs per tweet with the lexicon")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Evaluate the market-relevance pre-classifier against labeled tweets
+
+Scores every tweet in classifier_labels.jsonl ({"text", "label"}: 1 = has a
+market angle, 0 = meme / reply / personal post), with the gazetteer cold
+and then seeded from the markets in saved pipeline results (the catalog the
+pipeline would have seen). The labels are split by a hash of the text into
+a tuning set, which the classifier's weights are hand-tuned against, and a
+held-out set (--holdout, default 25%) that is only ever measured. Prints
+precision, recall and skip rate at the configured threshold, a threshold
+sweep and the misclassified tweets for the tuning set, the same numbers for
+the held-out set, and the cost per tweet:
+    python testing/eval_classifier.py [--labels testing/classifier_labels.jsonl]
+        [--threshold 0.5] [--catalog 'testing/*.json'] [--holdout 0.25]
+"""
+import argparse
+import glob
+import hashlib
+import json
+import os
+import sys
+import time
+
+os.environ.setdefault('LLM_PROVIDER', 'local')
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+
+PIPELINE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(PIPELINE_DIR)
+
+from include.config import config
+from include.market_classifier import Gazetteer, classify_tweet
+
+
+def load_labels(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def split_labels(labels, holdout):
+    """(tuning, held out): stable across runs and row order, so held-out tweets stay held out"""
+    tuning, held_out = [], []
+    for row in labels:
+        bucket = int(hashlib.sha1(row['text'].encode()).hexdigest()[:8], 16) / 0xffffffff
+        (held_out if bucket < holdout else tuning).append(row)
+    return tuning, held_out
+
+
+def catalog_markets(pattern):
+    """Event objects (anything with a title and tags) found in saved result files"""
+    markets = []
+
+    def walk(node):
+        if isinstance(node, dict):
+            if 'title' in node and 'tags' in node:
+                markets.append(node)
+            for value in node.values():
+                walk(value)
+        elif isinstance(node, list):
+            for value in node:
+                walk(value)
+
+    for path in glob.glob(pattern):
+        with open(path, encoding='utf-8') as f:
+            walk(json.load(f))
+    return markets
+
+
+def evaluate(labels, threshold, catalog):
+    counts = {'tp': 0, 'fp': 0, 'tn': 0, 'fn': 0}
+    errors = []
+    for row in labels:
+        result = classify_tweet(row['text'], threshold, catalog)
+        predicted = int(result.relevant)
+        key = ('t' if predicted == row['label'] else 'f') + ('p' if predicted else 'n')
+        counts[key] += 1
+        if predicted != row['label']:
+            errors.append((row, result))
+    precision = counts['tp'] / (counts['tp'] + counts['fp']) if counts['tp'] + counts['fp'] else 0.0
+    recall = counts['tp'] / (counts['tp'] + counts['fn']) if counts['tp'] + counts['fn'] else 0.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    skipped = (counts['tn'] + counts['fn']) / len(labels)
+    return {'precision': precision, 'recall': recall, 'f1': f1, 'skip_rate': skipped, **counts}, errors
+
+
+def report(name, labels, threshold, catalog):
+    metrics, errors = evaluate(labels, threshold, catalog)
+    print(f"\n📊 {name} (threshold {threshold:.2f}, gazetteer {len(catalog)} names)")
+    print(f"   precision {metrics['precision']:.2f} | recall {metrics['recall']:.2f} | F1 {metrics['f1']:.2f} | "
+          f"skips {metrics['skip_rate']:.0%} of tweets")
+    print(f"   {metrics['tp']} TP, {metrics['fp']} FP, {metrics['tn']} TN, {metrics['fn']} FN")
+    for row, result in errors:
+        kind = 'missed' if row['label'] else 'let through'
+        print(f"   ❌ {kind} ({result.score:.2f}): {row['text'][:70]}  {result.features}")
+
+    print("   threshold  precision  recall  skip rate")
+    for step in range(1, 10):
+        swept, _ = evaluate(labels, step / 10, catalog)
+        print(f"   {step / 10:9.1f}  {swept['precision']:9.2f}  {swept['recall']:6.2f}  {swept['skip_rate']:9.0%}")
+    return metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Evaluate the market-relevance pre-classifier')
+    parser.add_argument('--labels', default=os.path.join(PIPELINE_DIR, 'testing', 'classifier_labels.jsonl'))
+    parser.add_argument('--threshold', type=float, default=config.market_classifier_threshold)
+    parser.add_argument('--catalog', default=os.path.join(PIPELINE_DIR, 'testing', '*.json'),
+                        help='glob of saved pipeline results to seed the gazetteer from')
+    parser.add_argument('--holdout', type=float, default=0.25, help='share of labels held out from tuning')
+    args = parser.parse_args()
+
+    labels = load_labels(args.labels)
+    tuning, held_out = split_labels(labels, args.holdout)
+    positives = sum(row['label'] for row in labels)
+    print(f"🔍 {len(labels)} labeled tweets ({positives} market-relevant, {len(labels) - positives} not), "
+          f"{len(tuning)} for tuning, {len(held_out)} held out")
+    print("=" * 60)
+
+    seeded = Gazetteer()
+    seeded.add_markets(catalog_markets(args.catalog))
+    report('Tuning set, cold gazetteer', tuning, args.threshold, Gazetteer())
+    report('Tuning set, gazetteer seeded from saved results', tuning, args.threshold, seeded)
+    if held_out:
+        report('Held-out set, cold gazetteer', held_out, args.threshold, Gazetteer())
+        metrics = report('Held-out set, gazetteer seeded from saved results', held_out, args.threshold, seeded)
+    else:
+        metrics = evaluate(tuning, args.threshold, seeded)[0]
+
+    rounds = 20
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for row in labels:
+            classify_tweet(row['text'], args.threshold, seeded)
+    per_tweet_us = (time.perf_counter() - started) / (rounds * len(labels)) * 1e6
+    print(f"\n⏱️ {per_tweet_us:.0f}µs per tweet")
+    print("=" * 60)
+    return metrics
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Replay recorded upstream calls through the whole pipeline, offline
+
+Record once against the live APIs (any entry point works):
+    FIXTURE_MODE=record FIXTURE_PATH=fixtures/run.jsonl.gz python tweet_analyzer.py --demo
+
+Then replay every recorded tweet, check each result matches what the live
+run produced, and measure throughput with no network:
+    python testing/replay_fixtures.py fixtures/run.jsonl.gz [concurrency] [--original-timing]
+"""
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+if len(sys.argv) < 2:
+    raise SystemExit(__doc__)
+
+# Must be set before the pipeline (and its config) is imported
+os.environ['FIXTURE_MODE'] = 'replay'
+os.environ['FIXTURE_PATH'] = sys.argv[1]
+os.environ['FIXTURE_TIMING'] = 'original' if '--original-timing' in sys.argv else 'none'
+os.environ.setdefault('COHERE_API_KEY', 'replay-only')
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from include.enhanced_pipeline import process_tweet_with_ranking_sync, result_fingerprint
+from include.fixtures import get_fixture_store
+
+
+def main():
+    positional = [arg for arg in sys.argv[2:] if not arg.startswith('--')]
+    concurrency = int(positional[0]) if positional else 4
+
+    runs = list(get_fixture_store().entries('pipeline'))
+    if not runs:
+        raise SystemExit("❌ No recorded pipeline runs in this fixture file")
+
+    print(f"📼 Replaying {len(runs)} recorded tweets ({os.environ['FIXTURE_TIMING']} timing)")
+    print("=" * 60)
+
+    # Correctness: one at a time, so replayed calls line up with the recording
+    mismatches = 0
+    for run in runs:
+        request = run['request']
+        result = process_tweet_with_ranking_sync(request['tweet_text'], request['author'], request['top_n'])
+        if result_fingerprint(result) == run['response']:
+            print(f"✅ {request['tweet_text'][:60]}")
+        else:
+            mismatches += 1
+            print(f"❌ {request['tweet_text'][:60]}")
+            print(f"   expected: {run['response']}")
+            print(f"   got:      {result_fingerprint(result)}")
+
+    # Throughput: the same tweets at fixed concurrency
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(
+            lambda run: process_tweet_with_ranking_sync(run['request']['tweet_text'], run['request']['author'], run['request']['top_n']),
+            runs
+        ))
+    elapsed = time.perf_counter() - started
+
+    print("=" * 60)
+    print(f"📊 {len(runs) - mismatches}/{len(runs)} results match the recording")
+    print(f"⏱️  {len(runs)} tweets in {elapsed:.2f}s at concurrency {concurrency} ({len(runs) / elapsed:.1f} tweets/s)")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
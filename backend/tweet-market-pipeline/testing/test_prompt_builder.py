@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Ranking prompt packing and reply parsing checks
+
+Packs made-up markets into ranking prompts under tight token budgets and
+splits ranking replies in the formats models actually send back, so no
+API access is needed:
+    python testing/test_prompt_builder.py
+"""
+import os
+import sys
+
+os.environ.setdefault('LLM_PROVIDER', 'local')
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from include.prompt_builder import (
+    build_ranking_prompts, build_summary, compact_description, estimate_tokens, split_ranking_response
+)
+
+TWEET = "Bitcoin to 100k before the halving, calling it now"
+DESCRIPTION = (
+    'This market will resolve to "Yes" if Bitcoin trades above $100,000 on Binance before December 31. '
+    'Otherwise, this market will resolve to "No". '
+    'The resolution source for this market is Binance BTC/USDT. '
+    'Bitcoin trades above $100,000 on Binance before December 31.'
+)
+
+
+def market(index, description=DESCRIPTION):
+    return {
+        'id': f'm{index}',
+        'updatedAt': '2026-10-01',
+        'title': f'Bitcoin above ${index * 10}k?',
+        'description': description,
+        'tags': [{'label': 'Crypto'}, {'label': 'All'}, {'label': 'Bitcoin'}]
+    }
+
+
+def check(label, condition):
+    print(f"{'✅' if condition else '❌'} {label}")
+    return condition
+
+
+def test_summaries():
+    compact = compact_description(DESCRIPTION, 240)
+    summary = build_summary(market(1))
+    return [
+        check("Resolution boilerplate dropped", 'Otherwise' not in compact and 'resolution source' not in compact.lower()),
+        check("Restated condition kept once", compact.count('$100,000') == 1 and compact.startswith('Yes if Bitcoin')),
+        check("Long descriptions cut at the character limit", len(compact_description('word ' * 200, 50)) <= 51),
+        check("Summary carries title and tags, generic tags dropped",
+              summary.startswith('Title: Bitcoin above $10k?') and summary.endswith('Tags: Crypto, Bitcoin'))
+    ]
+
+
+def prompts_for(markets, token_budget, batch_size):
+    return build_ranking_prompts(TWEET, 'bitcoin 100k', ['Bitcoin', 'price'], 0.7, markets, token_budget, batch_size)
+
+
+def test_packing():
+    markets = [market(index) for index in range(1, 8)]
+    by_count = prompts_for(markets, 10000, 3)
+    tight = prompts_for(markets, 420, 10)
+    oversized = prompts_for([market(1)], 220, 10)
+
+    return [
+        check("Batches hold at most batch_size markets", [len(p.markets) for p in by_count] == [3, 3, 1]),
+        check("Every market packed once, in order",
+              [m['id'] for p in tight for m in p.markets] == [m['id'] for m in markets]),
+        check("Token budget respected", all(p.estimated_tokens <= 420 for p in tight) and len(tight) > 1),
+        check("Estimate matches the prompt text",
+              all(abs(estimate_tokens(p.prompt) - p.estimated_tokens) <= 2 * len(p.markets) + 2 for p in tight)),
+        check("Numbering restarts in each prompt", all('[1]\n' in p.prompt and '[0]' not in p.prompt for p in by_count)),
+        check("Tweet and instructions sent once per prompt", all(p.prompt.count(TWEET) == 1 for p in by_count)),
+        check("Market too big for the budget cut to its title",
+              len(oversized) == 1 and 'About:' not in oversized[0].prompt and 'Title: Bitcoin above $10k?' in oversized[0].prompt)
+    ]
+
+
+def test_replies():
+    block = "SCORE: 0.8\nEXPLANATION: Same price target.\nKEY_MATCHES: Bitcoin, 100k"
+    formats = {
+        'Bare [n] headers': "[1]\n{0}\n\n[2]\nSCORE: 0.2",
+        'Bold headers': "**[1]**\n{0}\n\n**[2]**\nSCORE: 0.2",
+        'Score on the header line': "[1] {0}\n[2] SCORE: 0.2",
+        'Numbered list': "1.\n{0}\n\n2.\nSCORE: 0.2",
+        'Markdown headings': "### 1)\n{0}\n### 2)\nSCORE: 0.2",
+        'Preamble before the first block': "Here are the scores:\n\n[1]\n{0}\n[2]\nSCORE: 0.2",
+    }
+    results = []
+    for label, template in formats.items():
+        blocks = split_ranking_response(template.format(block), 2)
+        results.append(check(f"{label} split", blocks.get(0) == block and blocks.get(1) == 'SCORE: 0.2'))
+
+    results += [
+        check("Bare score on its own line isn't a header",
+              split_ranking_response("[1]\nSCORE:\n0.8\n[2]\nSCORE: 0.1", 2)[0] == "SCORE:\n0.8"),
+        check("Out-of-range and repeated numbers ignored",
+              split_ranking_response("[1]\nSCORE: 0.5\n[1]\nSCORE: 0.9\n[7]\nSCORE: 1.0", 2) == {0: 'SCORE: 0.5'}),
+        check("Missing blocks left out", set(split_ranking_response("[2]\nSCORE: 0.4", 3)) == {1}),
+        check("Reply without headers yields nothing", split_ranking_response("SCORE: 0.9", 1) == {})
+    ]
+    return results
+
+
+def main():
+    print("🔍 Testing ranking prompts and reply parsing")
+    print("=" * 60)
+
+    results = []
+    for test in (test_summaries, test_packing, test_replies):
+        results += test()
+
+    print("=" * 60)
+    print(f"📊 {sum(results)}/{len(results)} checks passed")
+    return all(results)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
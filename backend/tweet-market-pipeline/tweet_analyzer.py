@@ -10,8 +10,58 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'include'))
 
 from include.enhanced_pipeline import process_tweet_with_ranking_sync
+from include.logging_config import get_logger
 
-def analyze_tweet(tweet_text: str, author: str = None, top_n: int = 5, save_to_file: bool = True, preserve_api_format: bool = True) -> dict:
+logger = get_logger(__name__)
+
+def print_summary(result: dict) -> None:
+    """Print ranked markets from a pipeline result"""
+    # Handle both old and new formats
+    if "top_relevant_markets" in result:  # Old format
+        markets = result["top_relevant_markets"]
+        search_query = result["sentiment_analysis"]["search_query"]
+        sentiment_score = result["sentiment_analysis"]["sentiment_score"]
+        
+        print(f"✅ Generated search query: '{search_query}'")
+        print(f"📊 Sentiment score: {sentiment_score}")
+        print(f"🎯 Top {len(markets)} most relevant markets (after AI ranking):")
+        print()
+        
+        for market in markets:
+            rank = market["rank"]
+            title = market["title"]
+            score = market["relevance_score"]
+            explanation = market["relevance_explanation"]
+            
+            print(f"#{rank}. {title}")
+            print(f"    Score: {score:.2f}/1.0")
+            print(f"    Why: {explanation}")
+            print()
+    elif "events" in result and "relevance_metadata" in result:  # New format
+        events = result["events"]
+        metadata = result["relevance_metadata"]
+        tweet_analysis = result["tweet_analysis"]
+        search_query = tweet_analysis["search_query"]
+        sentiment_score = tweet_analysis["sentiment_score"]
+        
+        print(f"✅ Generated search query: '{search_query}'")
+        print(f"📊 Sentiment score: {sentiment_score}")
+        print(f"🎯 Top {len(events)} most relevant markets (after AI ranking):")
+        print()
+        
+        for i, event in enumerate(events):
+            meta = metadata[i]
+            rank = meta["rank"]
+            title = event["title"]
+            score = meta["relevance_score"]
+            explanation = meta["relevance_explanation"]
+            
+            print(f"#{rank}. {title}")
+            print(f"    Score: {score:.2f}/1.0")
+            print(f"    Why: {explanation}")
+            print()
+
+def analyze_tweet(tweet_text: str, author: str = None, top_n: int = 5, save_to_file: bool = True, preserve_api_format: bool = True, verbose: bool = True) -> dict:
     """
     Analyze any tweet and get top relevant markets
     
@@ -21,6 +71,7 @@ def analyze_tweet(tweet_text: str, author: str = None, top_n: int = 5, save_to_f
         top_n: Number of top markets to return (default: 5)
         save_to_file: Whether to save results to a JSON file (default: True)
         preserve_api_format: If True, returns original Polymarket API format (default: True)
+        verbose: Print a human-readable summary to stdout (default: True)
     
     Returns:
         Dict containing complete analysis results
@@ -28,57 +79,18 @@ def analyze_tweet(tweet_text: str, author: str = None, top_n: int = 5, save_to_f
     if not author:
         author = "Unknown"
     
-    print(f"🔍 Analyzing tweet: {tweet_text}")
-    print("=" * 60)
+    if verbose:
+        print(f"🔍 Analyzing tweet: {tweet_text}")
+        print("=" * 60)
+    else:
+        logger.debug("🔍 Analyzing tweet: %s", tweet_text)
     
     try:
         # Process the tweet through the complete pipeline
         result = process_tweet_with_ranking_sync(tweet_text, author, top_n)
         
-        # Display summary - handle both old and new formats
-        if "top_relevant_markets" in result:  # Old format
-            markets = result["top_relevant_markets"]
-            search_query = result["sentiment_analysis"]["search_query"]
-            sentiment_score = result["sentiment_analysis"]["sentiment_score"]
-            
-            print(f"✅ Generated search query: '{search_query}'")
-            print(f"📊 Sentiment score: {sentiment_score}")
-            print(f"🎯 Top {len(markets)} most relevant markets (after AI ranking):")
-            print()
-            
-            for market in markets:
-                rank = market["rank"]
-                title = market["title"]
-                score = market["relevance_score"]
-                explanation = market["relevance_explanation"]
-                
-                print(f"#{rank}. {title}")
-                print(f"    Score: {score:.2f}/1.0")
-                print(f"    Why: {explanation}")
-                print()
-        elif "events" in result and "relevance_metadata" in result:  # New format
-            events = result["events"]
-            metadata = result["relevance_metadata"]
-            tweet_analysis = result["tweet_analysis"]
-            search_query = tweet_analysis["search_query"]
-            sentiment_score = tweet_analysis["sentiment_score"]
-            
-            print(f"✅ Generated search query: '{search_query}'")
-            print(f"📊 Sentiment score: {sentiment_score}")
-            print(f"🎯 Top {len(events)} most relevant markets (after AI ranking):")
-            print()
-            
-            for i, event in enumerate(events):
-                meta = metadata[i]
-                rank = meta["rank"]
-                title = event["title"]
-                score = meta["relevance_score"]
-                explanation = meta["relevance_explanation"]
-                
-                print(f"#{rank}. {title}")
-                print(f"    Score: {score:.2f}/1.0")
-                print(f"    Why: {explanation}")
-                print()
+        if verbose:
+            print_summary(result)
         
         # Save to file if requested
         if save_to_file:
@@ -90,7 +102,7 @@ def analyze_tweet(tweet_text: str, author: str = None, top_n: int = 5, save_to_f
         return result
         
     except Exception as e:
-        print(f"❌ Error analyzing tweet: {e}")
+        logger.error("❌ Error analyzing tweet: %s", e)
         return {"error": str(e)}
 
 def quick_demo():
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Background Warmup
+Runs slow startup work (heavy imports, CLOB credential derivation,
+connection pools, caches) after the server has bound, and reports progress
+"""
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class WarmupStep:
+    def __init__(self, name: str, fn: Callable[[], Any], required: bool):
+        self.name = name
+        self.fn = fn
+        self.required = required
+        self.status = 'pending'
+        self.duration_ms: Optional[float] = None
+        self.error: Optional[str] = None
+        self.attempts = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'status': self.status,
+            'required': self.required,
+            'duration_ms': self.duration_ms,
+            'error': self.error,
+            'attempts': self.attempts
+        }
+
+
+class Warmup:
+    """
+    Ordered warmup steps run once on a daemon thread
+
+    The server is ready once every required step has succeeded. Optional
+    steps (cache priming) may fail without holding readiness back; the
+    caches they would have filled are populated on first use instead.
+    Required steps that fail (CLOB briefly unreachable at boot) are retried
+    with exponential backoff, from retry_delay up to max_retry_delay
+    seconds, until they succeed.
+    """
+
+    def __init__(self, retry_delay: float = 1.0, max_retry_delay: float = 60.0):
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.steps: List[WarmupStep] = []
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def add_step(self, name: str, fn: Callable[[], Any], required: bool = True) -> None:
+        self.steps.append(WarmupStep(name, fn, required))
+
+    def start(self) -> None:
+        """Start warming up; later calls are no-ops"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self.started_at = time.time()
+            self._thread = threading.Thread(target=self._run, name='warmup', daemon=True)
+            self._thread.start()
+
+    @property
+    def ready(self) -> bool:
+        return all(step.status == 'done' for step in self.steps if step.required)
+
+    def status(self) -> Dict[str, Any]:
+        done = sum(1 for step in self.steps if step.status == 'done' or (step.status == 'failed' and not step.required))
+        return {
+            'ready': self.ready,
+            'started': self.started_at is not None,
+            'finished': self.finished_at is not None,
+            'progress': done / len(self.steps) if self.steps else 1.0,
+            'elapsed_ms': ((self.finished_at or time.time()) - self.started_at) * 1000 if self.started_at else None,
+            'steps': {step.name: step.to_dict() for step in self.steps}
+        }
+
+    def _run_step(self, step: WarmupStep) -> bool:
+        step.status = 'running'
+        step.attempts += 1
+        started = time.perf_counter()
+        try:
+            step.fn()
+            step.status = 'done'
+            step.error = None
+        except Exception as e:
+            step.status = 'failed'
+            step.error = str(e)
+            logger.warning("⚠️ [WARMUP] %s failed (attempt %d): %s", step.name, step.attempts, e)
+        step.duration_ms = (time.perf_counter() - started) * 1000
+        if step.status == 'done':
+            logger.info("🔥 [WARMUP] %s ready in %.0fms", step.name, step.duration_ms)
+        return step.status == 'done'
+
+    def _run(self) -> None:
+        for step in self.steps:
+            self._run_step(step)
+
+        delay = self.retry_delay
+        while True:
+            pending = [step for step in self.steps if step.required and step.status != 'done']
+            if not pending:
+                break
+            logger.info("🔁 [WARMUP] Retrying %s in %.0fs", ', '.join(step.name for step in pending), delay)
+            time.sleep(delay)
+            for step in pending:
+                self._run_step(step)
+            delay = min(delay * 2, self.max_retry_delay)
+
+        self.finished_at = time.time()
+        logger.info("✅ [WARMUP] Finished in %.0fms (ready: %s)", (self.finished_at - self.started_at) * 1000, self.ready)
@@ -43,6 +43,16 @@ chrome.runtime.onMessage.addListener((request, sender, sendResponse) => {
     return true;
   }
 
+  if (request.action === 'fetchQuote') {
+    fetchQuoteBackground(request.token_id, request.amount)
+      .then(data => sendResponse({ success: true, data }))
+      .catch(error => {
+        console.error('❌ [BACKGROUND] Quote error:', error);
+        sendResponse({ success: false, error: error.message });
+      });
+    return true;
+  }
+
   if (request.action === 'fetchPositions') {
     fetchPositionsBackground()
       .then(data => {
@@ -56,6 +66,16 @@ chrome.runtime.onMessage.addListener((request, sender, sendResponse) => {
     return true;
   }
 
+  if (request.action === 'fetchPortfolioSummary') {
+    fetchPortfolioSummaryBackground()
+      .then(data => sendResponse({ success: true, data }))
+      .catch(error => {
+        console.error('❌ [BACKGROUND] Portfolio summary error:', error);
+        sendResponse({ success: false, error: error.message });
+      });
+    return true;
+  }
+
   if (request.action === 'fetchClosedPositions') {
     fetchClosedPositionsBackground()
       .then(data => {
@@ -69,8 +89,13 @@ chrome.runtime.onMessage.addListener((request, sender, sendResponse) => {
     return true;
   }
 
+  if (request.action === 'cancelAnalysis') {
+    cancelAnalysisBackground(request.request_id);
+    return false;
+  }
+
   if (request.action === 'analyzeTweet') {
-    analyzeTweetBackground(request.tweet_text, request.author)
+    analyzeTweetBackground(request.tweet_text, request.author, request.request_id)
       .then(data => {
         console.log('✅ [BACKGROUND] Tweet analysis complete:', data);
         sendResponse({ success: true, data });
@@ -83,6 +108,74 @@ chrome.runtime.onMessage.addListener((request, sender, sendResponse) => {
   }
 });
 
+// Live streams: content script opens a 'priceStream' port with the token ids it shows,
+// or a 'positionsStream' port for live P&L on the profile tab
+chrome.runtime.onConnect.addListener((port) => {
+  if (port.name !== 'priceStream' && port.name !== 'positionsStream') return;
+
+  const controller = new AbortController();
+  port.onDisconnect.addListener(() => controller.abort());
+
+  port.onMessage.addListener((message) => {
+    let path = null;
+    if (message.action === 'subscribePrices' && message.token_ids && message.token_ids.length) {
+      path = `/api/prices/stream?token_ids=${encodeURIComponent(message.token_ids.join(','))}`;
+    } else if (message.action === 'subscribePositions') {
+      path = '/api/positions/stream';
+    }
+    if (!path) return;
+
+    streamEventsBackground(path, port, controller.signal)
+      .catch(error => {
+        if (error.name !== 'AbortError') {
+          console.error(`❌ [BACKGROUND] ${port.name} error:`, error);
+          port.postMessage({ type: 'error', error: error.message });
+        }
+      });
+  });
+});
+
+async function streamEventsBackground(path, port, signal) {
+  const urls = [`http://127.0.0.1:5000${path}`, `http://localhost:5000${path}`];
+
+  for (const url of urls) {
+    let response;
+    try {
+      response = await fetch(url, { signal, headers: { 'Accept': 'text/event-stream' } });
+    } catch (error) {
+      if (error.name === 'AbortError') throw error;
+      console.error(`❌ [BACKGROUND] Stream failed ${url}:`, error.message);
+      continue;
+    }
+    if (!response.ok || !response.body) continue;
+
+    console.log(`📡 [BACKGROUND] Streaming from ${url}`);
+    const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+    let buffer = '';
+
+    while (true) {
+      const { value, done } = await reader.read();
+      if (done) return;
+      buffer += value;
+
+      // SSE frames are separated by a blank line
+      let boundary;
+      while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+        const frame = buffer.slice(0, boundary);
+        buffer = buffer.slice(boundary + 2);
+        const lines = frame.split('\n');
+        const eventLine = lines.find(line => line.startsWith('event: '));
+        const data = lines.filter(line => line.startsWith('data: ')).map(line => line.slice(6)).join('\n');
+        if (data) {
+          port.postMessage({ type: eventLine ? eventLine.slice(7) : 'message', ...JSON.parse(data) });
+        }
+      }
+    }
+  }
+
+  throw new Error('All stream URLs failed');
+}
+
 async function fetchMarketDataBackground(marketType = 'single') {
   // Choose endpoint based on market type
   let endpoint = '/api/market';
@@ -163,11 +256,13 @@ async function fetchPricesBackground() {
 }
 
 async function executeTradeBackground(side, amount, marketId = null, yesTokenId = null, noTokenId = null) {
-  const urls = ['http://127.0.0.1:5000/api/trade', 'http://localhost:5000/api/trade'];
+  const bases = ['http://127.0.0.1:5000', 'http://localhost:5000'];
+  // One key for every attempt: if the first post was slow but went through, the retry dedupes server-side
+  const idempotencyKey = crypto.randomUUID();
 
-  for (const url of urls) {
+  for (const base of bases) {
     try {
-      const payload = { side, amount };
+      const payload = { side, amount, idempotency_key: idempotencyKey };
       if (marketId) {
         payload.market_id = marketId;
       }
@@ -180,101 +275,142 @@ async function executeTradeBackground(side, amount, marketId = null, yesTokenId
       
       console.log(`🔍 [BACKGROUND] Trade payload:`, payload);
 
-      const response = await fetch(url, {
+      const response = await fetch(`${base}/api/trade`, {
         method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
+        headers: { 'Content-Type': 'application/json', 'Idempotency-Key': idempotencyKey },
         body: JSON.stringify(payload)
       });
 
       if (response.ok) {
+        const handle = await waitForTrade(base, await response.json());
+        return handle.results && handle.results.length ? handle.results[0] : { success: false, error: handle.error || 'Trade failed' };
+      }
+      if (response.status === 400) {
         return await response.json();
       }
     } catch (error) {
-      console.error(`❌ [BACKGROUND] Trade failed ${url}:`, error);
+      console.error(`❌ [BACKGROUND] Trade failed ${base}:`, error);
     }
   }
 
   throw new Error('Failed to execute trade');
 }
 
-async function fetchPositionsBackground() {
-  const urls = ['http://127.0.0.1:5000/api/positions', 'http://localhost:5000/api/positions'];
+// Poll an order handle until the backend worker has posted (or rejected) it
+async function waitForTrade(base, handle, timeoutMs = 30000) {
+  const deadline = Date.now() + timeoutMs;
+  while (!handle.done && Date.now() < deadline) {
+    await new Promise(resolve => setTimeout(resolve, 250));
+    const response = await fetch(`${base}/api/trade/${handle.order_handle}`);
+    if (response.ok) {
+      handle = await response.json();
+    }
+  }
+  if (!handle.done) {
+    throw new Error(`Trade still ${handle.status} after ${timeoutMs / 1000}s`);
+  }
+  return handle;
+}
+
+async function fetchQuoteBackground(tokenId, amount) {
+  const query = `?token_id=${encodeURIComponent(tokenId)}&amount=${encodeURIComponent(amount)}`;
+  const urls = [`http://127.0.0.1:5000/api/quote${query}`, `http://localhost:5000/api/quote${query}`];
 
   for (const url of urls) {
     try {
-      console.log(`🔍 [BACKGROUND] Fetching positions from ${url}`);
-      const response = await fetch(url, {
-        method: 'GET',
-        headers: {
-          'Content-Type': 'application/json',
+      const response = await fetch(url);
+      if (response.ok) {
+        const data = await response.json();
+        if (data.success) {
+          return data.quote;
         }
-      });
+      }
+    } catch (error) {
+      console.error(`❌ [BACKGROUND] Quote fetch failed ${url}:`, error);
+    }
+  }
 
-      console.log(`🔍 [BACKGROUND] Positions response status: ${response.status}`);
+  throw new Error('Failed to fetch quote');
+}
+
+// Last positions payload per endpoint, revalidated with its ETag
+const positionsCache = {};
+
+async function fetchCachedPositions(path, label) {
+  const urls = [`http://127.0.0.1:5000${path}`, `http://localhost:5000${path}`];
+  const cached = positionsCache[path];
+
+  for (const url of urls) {
+    try {
+      console.log(`🔍 [BACKGROUND] Fetching ${label} from ${url}`);
+      const headers = { 'Content-Type': 'application/json' };
+      if (cached) {
+        headers['If-None-Match'] = cached.etag;
+      }
+      const response = await fetch(url, { method: 'GET', headers, cache: 'no-store' });
+
+      console.log(`🔍 [BACKGROUND] ${label} response status: ${response.status}`);
+
+      if (response.status === 304 && cached) {
+        console.log(`✅ [BACKGROUND] ${label} unchanged, reusing ${cached.positions.length} cached`);
+        return cached.positions;
+      }
 
       if (!response.ok) {
         throw new Error(`HTTP ${response.status}: ${response.statusText}`);
       }
 
       const data = await response.json();
-      console.log(`🔍 [BACKGROUND] Got positions data:`, data);
 
       if (data.success && data.positions) {
-        console.log(`✅ [BACKGROUND] Success! Returning ${data.positions.length} positions`);
+        const etag = response.headers.get('ETag');
+        if (etag) {
+          positionsCache[path] = { etag, positions: data.positions };
+        }
+        console.log(`✅ [BACKGROUND] Success! Returning ${data.positions.length} ${label}`);
         return data.positions;
       } else {
-        console.log(`❌ [BACKGROUND] Positions data format wrong:`, data);
+        console.log(`❌ [BACKGROUND] ${label} data format wrong:`, data);
       }
     } catch (error) {
       console.error(`❌ [BACKGROUND] Failed ${url}:`, error.message);
-      console.error(`❌ [BACKGROUND] Full error:`, error);
     }
   }
 
-  console.error('❌ [BACKGROUND] All positions URLs failed');
+  console.error(`❌ [BACKGROUND] All ${label} URLs failed`);
   throw new Error('All backend URLs failed');
 }
 
-async function fetchClosedPositionsBackground() {
-  const urls = ['http://127.0.0.1:5000/api/closed-positions', 'http://localhost:5000/api/closed-positions'];
+async function fetchPositionsBackground() {
+  return fetchCachedPositions('/api/positions', 'positions');
+}
+
+async function fetchPortfolioSummaryBackground() {
+  const urls = ['http://127.0.0.1:5000/api/portfolio/summary', 'http://localhost:5000/api/portfolio/summary'];
 
   for (const url of urls) {
     try {
-      console.log(`🔍 [BACKGROUND] Fetching closed positions from ${url}`);
-      const response = await fetch(url, {
-        method: 'GET',
-        headers: {
-          'Content-Type': 'application/json',
-        }
-      });
-
-      console.log(`🔍 [BACKGROUND] Closed positions response status: ${response.status}`);
-
-      if (!response.ok) {
-        throw new Error(`HTTP ${response.status}: ${response.statusText}`);
-      }
-
+      const response = await fetch(url);
       const data = await response.json();
-      console.log(`🔍 [BACKGROUND] Got closed positions data:`, data);
-
-      if (data.success && data.positions) {
-        console.log(`✅ [BACKGROUND] Success! Returning ${data.positions.length} closed positions`);
-        return data.positions;
-      } else {
-        console.log(`❌ [BACKGROUND] Closed positions data format wrong:`, data);
+      if (response.ok && data.success) {
+        return data.summary;
       }
     } catch (error) {
       console.error(`❌ [BACKGROUND] Failed ${url}:`, error.message);
-      console.error(`❌ [BACKGROUND] Full error:`, error);
     }
   }
 
-  console.error('❌ [BACKGROUND] All closed positions URLs failed');
-  throw new Error('All backend URLs failed');
+  throw new Error('Failed to fetch portfolio summary');
 }
 
-async function analyzeTweetBackground(tweet_text, author = 'TwitterUser') {
+async function fetchClosedPositionsBackground() {
+  // Most recent page only; older history is available through next_cursor
+  return fetchCachedPositions('/api/closed-positions?limit=100', 'closed positions');
+}
+
+async function analyzeTweetBackground(tweet_text, author = 'TwitterUser', request_id = undefined) {
   const urls = ['http://127.0.0.1:5000/api/analyze-tweet', 'http://localhost:5000/api/analyze-tweet'];
+  let busyError = null;
 
   for (const url of urls) {
     try {
@@ -289,12 +425,24 @@ async function analyzeTweetBackground(tweet_text, author = 'TwitterUser') {
         body: JSON.stringify({
           tweet_text: tweet_text,
           author: author,
-          top_n: 5
+          top_n: 5,
+          request_id: request_id
         })
       });
 
       console.log(`🔍 [BACKGROUND] Tweet analysis response status: ${response.status}`);
 
+      if (response.status === 499) {
+        return { cancelled: true };
+      }
+
+      if (response.status === 429) {
+        // Backend is shedding analysis load; the other URL is the same server
+        const retryAfter = Number(response.headers.get('Retry-After')) || 5;
+        busyError = new Error(`Backend busy, try again in ${retryAfter}s`);
+        break;
+      }
+
       if (!response.ok) {
         throw new Error(`HTTP ${response.status}: ${response.statusText}`);
       }
@@ -315,6 +463,30 @@ async function analyzeTweetBackground(tweet_text, author = 'TwitterUser') {
     }
   }
 
+  if (busyError) {
+    throw busyError;
+  }
+
   console.error('❌ [BACKGROUND] All tweet analysis URLs failed');
   throw new Error('Tweet analysis failed - backend not available');
 }
+
+async function cancelAnalysisBackground(request_id) {
+  const urls = ['http://127.0.0.1:5000/api/analyze-tweet/cancel', 'http://localhost:5000/api/analyze-tweet/cancel'];
+
+  for (const url of urls) {
+    try {
+      const response = await fetch(url, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ request_id })
+      });
+      if (response.ok) {
+        console.log(`🛑 [BACKGROUND] Cancelled analysis ${request_id}`);
+        return;
+      }
+    } catch (error) {
+      console.error(`❌ [BACKGROUND] Cancel failed ${url}:`, error.message);
+    }
+  }
+}
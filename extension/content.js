@@ -5,6 +5,8 @@ let marketNotesPopup = null;
 let currentEventData = null;
 let currentEventIndex = 0;
 let allEvents = [];
+let priceStreamPort = null;
+let positionsStreamPort = null;
 
 // Helper functions for price validation
 function validatePrice(price, fallback = 0.01) {
@@ -111,14 +113,31 @@ function createPositionCard(position) {
   `;
 }
 
+// Portfolio totals shown next to the positions header
+function createPortfolioSummaryHTML(summary) {
+  if (!summary) {
+    return '';
+  }
+  const totals = summary.totals;
+  const pnlClass = totals.total_pnl >= 0 ? 'positive' : 'negative';
+  const sign = totals.total_pnl >= 0 ? '+' : '-';
+  return `
+    <div class="portfolio-summary">
+      <span>Value: $${totals.market_value.toFixed(2)}</span>
+      <span class="portfolio-pnl ${pnlClass}">P&L: ${sign}$${Math.abs(totals.total_pnl).toFixed(2)}</span>
+    </div>
+  `;
+}
+
 // Function to create positions carousel with real data
 async function createPositionsCarousel() {
   console.log('🔍 [DEBUG] Creating positions carousel with real data...');
   
   // Fetch both open and closed positions separately
-  const [realOpenPositions, realClosedPositions] = await Promise.all([
+  const [realOpenPositions, realClosedPositions, portfolioSummary] = await Promise.all([
     fetchPositions(),
-    fetchClosedPositions()
+    fetchClosedPositions(),
+    fetchPortfolioSummary()
   ]);
   
   let openPositions = [];
@@ -187,6 +206,7 @@ async function createPositionsCarousel() {
     <div class="polymarket-positions-section">
       <div class="positions-header">
         <h3>Polymarket Positions ${isLiveData ? '(Live)' : '(Connecting...)'}</h3>
+        ${createPortfolioSummaryHTML(portfolioSummary)}
         <div class="positions-tabs">
           <button class="tab-button active" data-tab="open">Open (${openPositions.length})</button>
           <button class="tab-button" data-tab="closed">Closed (${closedPositions.length})</button>
@@ -251,6 +271,7 @@ async function injectPositionsSection() {
 
     // Add event listeners for carousel functionality
     setupCarouselListeners();
+    startLivePositionsStream();
     
     console.log('✅ [DEBUG] Positions section injected successfully');
   } catch (error) {
@@ -261,6 +282,50 @@ async function injectPositionsSection() {
   }
 }
 
+// Keep open position cards marked to live prices
+function startLivePositionsStream() {
+  if (positionsStreamPort) {
+    positionsStreamPort.disconnect();
+  }
+
+  const port = chrome.runtime.connect({ name: 'positionsStream' });
+  positionsStreamPort = port;
+  let receivedSnapshot = false;
+
+  port.onMessage.addListener((message) => {
+    if (message.type !== 'positions') return;
+
+    const openTrack = document.querySelector('.polymarket-positions-section [data-tab-content="open"]');
+    if (!openTrack) {
+      // Section was removed (navigated away from the profile)
+      port.disconnect();
+      if (positionsStreamPort === port) positionsStreamPort = null;
+      return;
+    }
+
+    if (message.snapshot) {
+      // The first snapshot matches what was just rendered; later ones mean positions changed
+      if (receivedSnapshot && message.positions.length > 0) {
+        openTrack.innerHTML = message.positions.map(position => createPositionCard(position)).join('');
+      }
+      receivedSnapshot = true;
+      return;
+    }
+
+    (message.changed || []).forEach(position => {
+      const card = openTrack.querySelector(`.position-card[data-position-id="${position.asset}"]`);
+      if (card) {
+        card.outerHTML = createPositionCard(position);
+      }
+    });
+  });
+  port.onDisconnect.addListener(() => {
+    if (positionsStreamPort === port) positionsStreamPort = null;
+  });
+
+  port.postMessage({ action: 'subscribePositions' });
+}
+
 // Function to setup carousel event listeners
 function setupCarouselListeners() {
   const positionsSection = document.querySelector('.polymarket-positions-section');
@@ -577,6 +642,7 @@ function createSingleMarketPopupHTML(marketData, headerControls, carouselControl
             <div class="potential-winnings">
               <span class="winnings-text">Potential payout: <span class="winnings-amount">$0.00</span></span>
               <span class="profit-text">Profit: <span class="profit-amount">$0.00</span></span>
+              <span class="quote-text"></span>
             </div>
           </div>
           <div class="trade-buttons">
@@ -974,6 +1040,64 @@ async function executeTrade(side, amount, marketId = null) {
   });
 }
 
+async function fetchQuote(tokenId, amount) {
+  return new Promise((resolve) => {
+    chrome.runtime.sendMessage({ action: 'fetchQuote', token_id: tokenId, amount }, (response) => {
+      if (chrome.runtime.lastError || !response || !response.success) {
+        console.warn('⚠️ [DEBUG] Quote unavailable:', chrome.runtime.lastError || response?.error);
+        resolve(null);
+        return;
+      }
+      resolve(response.data);
+    });
+  });
+}
+
+// CLOB token bought by a side of a market (the only market when marketId is null)
+function tokenIdForSide(side, marketId) {
+  const markets = (currentEventData && currentEventData.markets) || [];
+  const market = marketId ? markets.find(m => m.id === marketId) : (markets.length === 1 ? markets[0] : null);
+  if (!market || !market.clobTokenIds) return null;
+  try {
+    const tokenIds = typeof market.clobTokenIds === 'string' ? JSON.parse(market.clobTokenIds) : market.clobTokenIds;
+    if (!Array.isArray(tokenIds) || tokenIds.length < 2) return null;
+    return side === 'YES' ? tokenIds[0] : tokenIds[1];
+  } catch (e) {
+    return null;
+  }
+}
+
+let quoteTimer = null;
+let quoteSequence = 0;
+
+// Debounced /api/quote for the amount being typed; a later keystroke supersedes an earlier quote
+function previewQuote(side, amount, marketId, { amountInput, winningsAmount, profitAmount }) {
+  clearTimeout(quoteTimer);
+  const sequence = ++quoteSequence;
+  const quoteText = amountInput.closest('.amount-input-group')?.querySelector('.quote-text');
+  if (quoteText) quoteText.textContent = '';
+
+  const tokenId = tokenIdForSide(side, marketId);
+  if (!tokenId || !(amount > 0)) return;
+
+  quoteTimer = setTimeout(async () => {
+    const quote = await fetchQuote(tokenId, amount);
+    if (!quote || sequence !== quoteSequence || !quote.shares) return;
+
+    const profit = quote.potential_profit;
+    winningsAmount.textContent = `$${validatePayout(quote.potential_payout).toFixed(2)}`;
+    profitAmount.textContent = `$${profit.toFixed(2)}`;
+    profitAmount.style.color = profit >= 0 ? 'rgb(0, 186, 124)' : 'rgb(249, 24, 128)';
+
+    if (quoteText) {
+      quoteText.textContent = quote.fillable
+        ? `Avg fill ${(quote.avg_price * 100).toFixed(1)}¢ · slippage ${(quote.slippage_bps / 100).toFixed(2)}%`
+        : `Only $${(amount - quote.unfilled_amount).toFixed(2)} fillable at current depth`;
+      quoteText.classList.toggle('unfillable', !quote.fillable);
+    }
+  }, 250);
+}
+
 async function fetchPositions() {
   console.log('🔍 [DEBUG] Fetching positions via Chrome messaging...');
 
@@ -996,6 +1120,19 @@ async function fetchPositions() {
   });
 }
 
+async function fetchPortfolioSummary() {
+  return new Promise((resolve) => {
+    chrome.runtime.sendMessage({ action: 'fetchPortfolioSummary' }, (response) => {
+      if (chrome.runtime.lastError || !response || !response.success) {
+        console.error('❌ [DEBUG] Failed to get portfolio summary:', chrome.runtime.lastError || response?.error);
+        resolve(null);
+        return;
+      }
+      resolve(response.data);
+    });
+  });
+}
+
 async function fetchClosedPositions() {
   console.log('🔍 [DEBUG] Fetching closed positions via Chrome messaging...');
 
@@ -1018,15 +1155,53 @@ async function fetchClosedPositions() {
   });
 }
 
-async function analyzeTweetContent(tweet_text, author) {
+// The analysis in flight, so it can be cancelled when nobody will see its result
+let pendingAnalysis = null;
+
+function cancelPendingAnalysis(reason) {
+  if (!pendingAnalysis) return;
+  const { requestId, observer } = pendingAnalysis;
+  pendingAnalysis = null;
+  observer.disconnect();
+  console.log(`🛑 [DEBUG] Cancelling analysis ${requestId} (${reason})`);
+  chrome.runtime.sendMessage({ action: 'cancelAnalysis', request_id: requestId });
+}
+
+window.addEventListener('pagehide', () => cancelPendingAnalysis('page hidden'));
+
+async function analyzeTweetContent(tweet_text, author, tweetElement) {
   console.log('🔍 [DEBUG] Analyzing tweet content via Chrome messaging...');
 
+  // Only one analysis matters at a time: the newest click
+  cancelPendingAnalysis('another tweet was opened');
+  const requestId = crypto.randomUUID();
+  const observer = new IntersectionObserver((entries) => {
+    if (entries.some(entry => !entry.isIntersecting)) {
+      cancelPendingAnalysis('tweet scrolled away');
+    }
+  });
+  if (tweetElement) observer.observe(tweetElement);
+  const analysis = { requestId, observer };
+  pendingAnalysis = analysis;
+
   return new Promise((resolve, reject) => {
     chrome.runtime.sendMessage({
       action: 'analyzeTweet',
       tweet_text: tweet_text,
-      author: author
+      author: author,
+      request_id: requestId
     }, (response) => {
+      const cancelled = pendingAnalysis !== analysis;
+      if (!cancelled) {
+        observer.disconnect();
+        pendingAnalysis = null;
+      }
+      if (cancelled || (response && response.data && response.data.cancelled)) {
+        console.log(`🛑 [DEBUG] Analysis ${requestId} was cancelled`);
+        resolve({ cancelled: true });
+        return;
+      }
+
       if (chrome.runtime.lastError) {
         console.error('❌ [DEBUG] Chrome runtime error for tweet analysis:', chrome.runtime.lastError);
         resolve(null);
@@ -1076,6 +1251,7 @@ function extractTweetContent(button) {
 
 // Function to setup market notes popup handlers
 function setupMarketNotesHandlers() {
+  startLivePriceStream(currentEventData);
   if (!marketNotesPopup) return;
 
   const closeBtn = marketNotesPopup.querySelector('.close-popup');
@@ -1098,6 +1274,7 @@ function setupMarketNotesHandlers() {
   // Close handler
   if (closeBtn) {
     closeBtn.addEventListener('click', () => {
+      stopLivePriceStream();
       marketNotesPopup.remove();
       marketNotesPopup = null;
     });
@@ -1161,6 +1338,68 @@ function setupSingleMarketHandlers() {
   setupTradingHandlers();
 }
 
+// Live prices pushed from the backend price hub (replaces polling /api/prices)
+function startLivePriceStream(eventData) {
+  stopLivePriceStream();
+  if (!eventData || !eventData.markets) return;
+
+  // Map each CLOB token back to the market and side it prices
+  const tokenSides = {};
+  eventData.markets.forEach(market => {
+    try {
+      const tokenIds = typeof market.clobTokenIds === 'string' ? JSON.parse(market.clobTokenIds) : market.clobTokenIds;
+      if (Array.isArray(tokenIds) && tokenIds.length >= 2) {
+        tokenSides[tokenIds[0]] = { marketId: market.id, side: 'yes_price' };
+        tokenSides[tokenIds[1]] = { marketId: market.id, side: 'no_price' };
+      }
+    } catch (e) {
+      console.warn('⚠️ [DEBUG] Could not parse clobTokenIds for price stream:', market.clobTokenIds);
+    }
+  });
+
+  const tokenIds = Object.keys(tokenSides);
+  if (tokenIds.length === 0) return;
+
+  const latest = {};
+  const isMulti = eventData.markets.length > 1;
+  const port = chrome.runtime.connect({ name: 'priceStream' });
+  priceStreamPort = port;
+
+  port.onMessage.addListener((message) => {
+    if (message.type !== 'prices' || !marketNotesPopup) return;
+
+    message.prices.forEach(update => {
+      const target = tokenSides[update.token_id];
+      if (!target || update.price === null || update.price === undefined) return;
+      latest[target.marketId] = latest[target.marketId] || {};
+      latest[target.marketId][target.side] = update.price;
+    });
+
+    const prices = Object.entries(latest)
+      .filter(([, p]) => p.yes_price !== undefined && p.no_price !== undefined)
+      .map(([marketId, p]) => ({ market_id: marketId, yes_price: p.yes_price, no_price: p.no_price }));
+    if (prices.length === 0) return;
+
+    if (isMulti) {
+      updateMultiMarketPrices({ type: 'multi', prices });
+    } else {
+      updateSingleMarketPrices(prices[0]);
+    }
+  });
+  port.onDisconnect.addListener(() => {
+    if (priceStreamPort === port) priceStreamPort = null;
+  });
+
+  port.postMessage({ action: 'subscribePrices', token_ids: tokenIds });
+}
+
+function stopLivePriceStream() {
+  if (priceStreamPort) {
+    priceStreamPort.disconnect();
+    priceStreamPort = null;
+  }
+}
+
 function updateSingleMarketPrices(prices) {
   const yesBtn = marketNotesPopup.querySelector('.yes-side-btn');
   const noBtn = marketNotesPopup.querySelector('.no-side-btn');
@@ -1249,6 +1488,7 @@ function showTradingInterface(marketItem) {
         <div class="potential-winnings">
           <span class="winnings-text">Potential payout: <span class="winnings-amount">$0.00</span></span>
           <span class="profit-text">Profit: <span class="profit-amount">$0.00</span></span>
+          <span class="quote-text"></span>
         </div>
       </div>
       <div class="trade-buttons">
@@ -1473,6 +1713,7 @@ function setupTradingHandlers() {
     console.log('🔍 [DEBUG] Side:', side, 'Raw input:', inputValue, 'Parsed amount:', amount);
 
     if (amount <= 0) {
+      previewQuote(side, 0, null, { amountInput, winningsAmount, profitAmount });
       winningsAmount.textContent = '$0.00';
       profitAmount.textContent = '$0.00';
       profitAmount.style.color = 'rgb(139, 152, 165)';
@@ -1531,6 +1772,9 @@ function setupTradingHandlers() {
     }
 
     console.log('🔍 [DEBUG] === Calculation complete ===\n');
+
+    // Replace the estimate with the expected fill from the live order book
+    previewQuote(side, amount, activeSideBtn.dataset.marketId, { amountInput, winningsAmount, profitAmount });
   }
 
   // Execute trade handlers
@@ -1685,6 +1929,7 @@ function injectPolymarketButtons() {
       // Close existing popup if open
       if (marketNotesPopup) {
         console.log('🔍 [DEBUG] Closing existing popup');
+        stopLivePriceStream();
         marketNotesPopup.remove();
         marketNotesPopup = null;
       }
@@ -1704,7 +1949,16 @@ function injectPolymarketButtons() {
         actualButton.innerHTML = '<div style="color: rgb(139, 152, 165);">🧠 Analyzing...</div>';
 
         // Analyze tweet content using the pipeline
-        const analysisResult = await analyzeTweetContent(tweetContent.text, tweetContent.author);
+        const analysisResult = await analyzeTweetContent(
+          tweetContent.text, tweetContent.author, actualButton.closest('[data-testid="tweet"]')
+        );
+
+        if (analysisResult && analysisResult.cancelled) {
+          // Abandoned (scrolled away or superseded): don't pop up over whatever is on screen now
+          actualButton.innerHTML = `<img src="${chrome.runtime.getURL('icons/pmarket.png')}" alt="Polymarket" width="20" height="20" style="border-radius: 2px; opacity: 0.8;" />`;
+          actualButton.disabled = false;
+          return;
+        }
 
         if (analysisResult && analysisResult.events && analysisResult.events.length > 0) {
           console.log('🎯 [DEBUG] AI found relevant markets!', analysisResult.events.length, 'markets');
@@ -1777,6 +2031,7 @@ function injectPolymarketButtons() {
 // Close popup when clicking outside
 document.addEventListener('click', (e) => {
   if (marketNotesPopup && !marketNotesPopup.contains(e.target) && !e.target.closest('.polymarket-note-button')) {
+    stopLivePriceStream();
     marketNotesPopup.remove();
     marketNotesPopup = null;
   }